@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path):
+    # Tests run in one process, so the shared cache is a LocMemCache too,
+    # and the throttle file is one of their own rather than the checkout's.
+    # Both start empty: test transactions are rolled back without signals,
+    # and cached data would otherwise outlive the rows it was built from.
+    from drones.customthrottling import reset_stores
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+    }
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'THROTTLE_STORE_PATH': tmp_path / 'throttle.sqlite3'}
+    for cache in caches.all():
+        cache.clear()
+    reset_stores()
+    yield
+    reset_stores()
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+from django.conf import settings
+
+# Project specific keys read from the REST_FRAMEWORK setting
+DEFAULTS = {
+    'PAGINATION_COUNT_MODE': 'exact',
+    'PAGINATION_COUNT_CACHE_TIMEOUT': 300,
+    # estimates below this are replaced by an exact count, which is cheap there
+    'PAGINATION_COUNT_ESTIMATE_THRESHOLD': 10000,
+    'RESPONSE_CACHE_TIMEOUT': 60,
+    'CONDITIONAL_GET_FINGERPRINT': 'version',
+    'SHARED_CACHE': 'default',
+    'THROTTLE_STORE': 'sqlite',
+    'THROTTLE_STORE_PATH': os.path.join(tempfile.gettempdir(), 'restful01-throttle.sqlite3'),
+    'THROTTLE_WINDOW': 'sliding',
+    'AUTH_CACHE_TIMEOUT': 60,
+    'NESTED_COLLECTION_LIMIT': 10,
+    'AUTOCOMPLETE_LIMIT': 10,
+    'SERVER_TIMING': True,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'REST_FRAMEWORK', {}).get(name, DEFAULTS[name])
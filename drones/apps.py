@@ -1,6 +1,48 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
 
 
 class DronesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'drones'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework.authtoken.models import Token
+
+        from . import autocomplete, customauthentication, filters, leaderboard, search, tableversions
+        from .models import Competition, Drone, DroneCategory, Pilot
+
+        # leaderboard writers bump its table themselves; its rebuild and
+        # cascades keep their single query deletes
+        tableversions.connect(Competition, Drone, DroneCategory, Pilot, get_user_model(), Token)
+        m2m_changed.connect(tableversions.bump_m2m_tables, dispatch_uid='tableversions_m2m_changed')
+
+        pre_save.connect(leaderboard.remember_competition, sender=Competition, dispatch_uid='leaderboard_competition_pre_save')
+        post_save.connect(leaderboard.update_for_competition, sender=Competition, dispatch_uid='leaderboard_competition_post_save')
+        post_delete.connect(leaderboard.update_for_competition, sender=Competition, dispatch_uid='leaderboard_competition_post_delete')
+        pre_save.connect(leaderboard.remember_drone, sender=Drone, dispatch_uid='leaderboard_drone_pre_save')
+        post_save.connect(leaderboard.update_for_drone, sender=Drone, dispatch_uid='leaderboard_drone_post_save')
+        for model in (Pilot, Drone, DroneCategory):
+            pre_delete.connect(
+                leaderboard.remember_subject_entries,
+                sender=model,
+                dispatch_uid='leaderboard_{0}_pre_delete'.format(model._meta.model_name)
+            )
+            post_delete.connect(
+                leaderboard.refresh_subject_entries,
+                sender=model,
+                dispatch_uid='leaderboard_{0}_post_delete'.format(model._meta.model_name)
+            )
+
+        user_model = get_user_model()
+        post_save.connect(customauthentication.invalidate_user, sender=user_model, dispatch_uid='auth_cache_user_post_save')
+        post_delete.connect(customauthentication.invalidate_user, sender=user_model, dispatch_uid='auth_cache_user_post_delete')
+        post_delete.connect(customauthentication.forget_token, sender=Token, dispatch_uid='auth_cache_token_post_delete')
+
+        autocomplete.register(Drone, Pilot, DroneCategory)
+        # after the name indexes, which set the versions filters.register() takes
+        filters.register(Competition, 'drone__name', 'pilot__name')
+
+        # SQLite drops the search triggers whenever a migration remakes a table
+        post_migrate.connect(search.repair_search_indexes, dispatch_uid='search_repair_indexes')
@@ -0,0 +1,143 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.views import View
+from rest_framework.response import Response
+
+from . import views
+from .conditional import ConditionalGetMixin, set_validators
+from .fastread import FastReadMixin
+from .responsecache import CachedResponseMixin
+
+
+class AsyncReadView(View):
+    """
+    Async GET endpoint serving the list or detail of a sync DRF generic
+    view (view_class) with that view's authentication, permissions,
+    throttling, filters, pagination, conditional GET and response cache.
+
+    The sync steps that may touch the database (authentication on a cache
+    miss, filter choices, the cache and validator lookups) run together in
+    a single sync_to_async() call. The count, the page and the object are
+    then read with the async ORM and rendered without blocking the event
+    loop: the query planner has already loaded every row the serializer
+    reads.
+    """
+    view_class = None
+    http_method_names = ['get', 'head']
+
+    def get_drf_view(self, request, *args, **kwargs):
+        view = self.view_class()
+        view.args = args
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.get_drf_view(request, *args, **kwargs)
+        request = view.request
+        try:
+            response = await self.handle(view, request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        view.response = view.finalize_response(request, response, *args, **kwargs)
+        return view.response
+
+    def prepare(self, view, request, *args, **kwargs):
+        """
+        Returns (response, queryset, validators, cache_key); response is set
+        when the request is answered without reading the queryset.
+        """
+        view.initial(request, *args, **kwargs)
+        validators = None
+        if isinstance(view, ConditionalGetMixin):
+            validators = view.get_request_validators(request)
+            response = view.get_not_modified_response(request, validators)
+            if response is not None:
+                return response, None, validators, None
+        cache_key = None
+        if isinstance(view, CachedResponseMixin):
+            cache_key, response = view.lookup_cached_response(request)
+            if response is not None:
+                return response, None, validators, None
+        queryset = view.filter_queryset(view.get_queryset())
+        return None, queryset, validators, cache_key
+
+    async def handle(self, view, request, *args, **kwargs):
+        response, queryset, validators, cache_key = await sync_to_async(self.prepare)(view, request, *args, **kwargs)
+        if response is None:
+            if (view.lookup_url_kwarg or view.lookup_field) in kwargs:
+                response = await self.retrieve(view, request, queryset)
+            else:
+                response = await self.list(view, request, queryset)
+            if cache_key is not None:
+                view.store_cached_response(cache_key, response)
+        if validators is not None and response.status_code in (200, 304):
+            set_validators(response, *validators)
+        return response
+
+    async def list(self, view, request, queryset):
+        encoder = view.get_row_encoder() if isinstance(view, FastReadMixin) else None
+        if encoder is not None:
+            queryset = view.get_fast_queryset(queryset, encoder)
+
+        def serialize(items):
+            if encoder is not None:
+                return view.encode_rows(items, encoder)
+            return view.get_serializer(items, many=True).data
+
+        paginator = view.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=view)
+            if page is not None:
+                return paginator.get_paginated_response(serialize(page))
+        return Response(serialize([item async for item in queryset]))
+
+    async def retrieve(self, view, request, queryset):
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, ValueError, TypeError):
+            raise Http404
+        view.check_object_permissions(request, instance)
+        return Response(view.get_serializer(instance).data)
+
+
+class AsyncDroneCategoryList(AsyncReadView):
+    view_class = views.DroneCategoryList
+    name = 'async-dronecategory-list'
+
+
+class AsyncDroneCategoryDetail(AsyncReadView):
+    view_class = views.DroneCategoryDetail
+    name = 'async-dronecategory-detail'
+
+
+class AsyncDroneList(AsyncReadView):
+    view_class = views.DroneList
+    name = 'async-drone-list'
+
+
+class AsyncDroneDetail(AsyncReadView):
+    view_class = views.DroneDetail
+    name = 'async-drone-detail'
+
+
+class AsyncPilotList(AsyncReadView):
+    view_class = views.PilotList
+    name = 'async-pilot-list'
+
+
+class AsyncPilotDetail(AsyncReadView):
+    view_class = views.PilotDetail
+    name = 'async-pilot-detail'
+
+
+class AsyncCompetitionList(AsyncReadView):
+    view_class = views.CompetitionList
+    name = 'async-competition-list'
+
+
+class AsyncCompetitionDetail(AsyncReadView):
+    view_class = views.CompetitionDetail
+    name = 'async-competition-detail'
@@ -0,0 +1,115 @@
+import bisect
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import tableversions
+
+
+class NameIndex:
+    """
+    The names of a model's rows in a sorted array of (folded name, pk,
+    name) entries; a case-insensitive prefix lookup is a bisect plus a
+    slice. The index is loaded on first use and reloaded when the model's
+    table version moves, which another process writing the table does: the
+    versions are in SHARED_CACHE. Writes of this process are
+    applied in place once committed.
+    """
+
+    def __init__(self, model, field='name'):
+        self.model = model
+        self.field = field
+        self.table = model._meta.db_table
+        self.lock = threading.Lock()
+        self.entries = []
+        self.names = {}
+        self.version = None
+
+    def load(self, version):
+        rows = self.model._default_manager.order_by().values_list('pk', self.field)
+        self.names = dict(rows)
+        self.entries = sorted((name.casefold(), pk, name) for pk, name in self.names.items())
+        self.version = version
+
+    def ensure_current(self):
+        version = tableversions.get_table_versions([self.table])[self.table]
+        if version != self.version:
+            self.load(version)
+
+    def insert(self, pk, name):
+        self.discard(pk)
+        self.names[pk] = name
+        bisect.insort(self.entries, (name.casefold(), pk, name))
+
+    def discard(self, pk):
+        name = self.names.pop(pk, None)
+        if name is not None:
+            entry = (name.casefold(), pk, name)
+            i = bisect.bisect_left(self.entries, entry)
+            if i < len(self.entries) and self.entries[i] == entry:
+                del self.entries[i]
+
+    def lookup(self, prefix, limit):
+        """
+        Up to limit (pk, name) pairs whose name starts with prefix, ignoring
+        case, in name order.
+        """
+        prefix = prefix.casefold()
+        with self.lock:
+            self.ensure_current()
+            start = bisect.bisect_left(self.entries, (prefix,))
+            matches = []
+            for folded, pk, name in self.entries[start:start + limit]:
+                if not folded.startswith(prefix):
+                    break
+                matches.append((pk, name))
+            return matches
+
+    def apply(self, pk, name):
+        """
+        Applies a committed write (name None for a delete) and takes the
+        table version it leaves. A write another process committed during
+        the transaction is only seen at the next version change.
+        """
+        with self.lock:
+            if self.version is None:
+                return
+            if name is None:
+                self.discard(pk)
+            else:
+                self.insert(pk, name)
+            self.version = tableversions.set_table_versions(self.table)[self.table]
+
+    def reset(self):
+        with self.lock:
+            self.entries = []
+            self.names = {}
+            self.version = None
+
+    def saved(self, sender, instance, **kwargs):
+        pk, name = instance.pk, getattr(instance, self.field)
+        transaction.on_commit(lambda: self.apply(pk, name), using=kwargs.get('using'))
+
+    def deleted(self, sender, instance, **kwargs):
+        pk = instance.pk
+        transaction.on_commit(lambda: self.apply(pk, None), using=kwargs.get('using'))
+
+    def connect(self):
+        uid = 'autocomplete_{0}'.format(self.table)
+        post_save.connect(self.saved, sender=self.model, weak=False, dispatch_uid=uid + '_post_save')
+        post_delete.connect(self.deleted, sender=self.model, weak=False, dispatch_uid=uid + '_post_delete')
+
+
+_indexes = {}
+
+
+def get_index(model):
+    if model not in _indexes:
+        _indexes.setdefault(model, NameIndex(model))
+    return _indexes[model]
+
+
+def register(*models):
+    for model in models:
+        get_index(model).connect()
@@ -0,0 +1,75 @@
+from django.db import transaction
+
+from . import leaderboard
+from .models import Competition, Drone, Pilot
+from .serializers import CompetitionBulkItemSerializer
+from .tableversions import bump_table_versions
+
+MISSING_OBJECT_MESSAGE = 'Object with name={0} does not exist.'
+
+
+def validate_items(items):
+    """
+    Validates every item and resolves all pilot and drone names with one
+    query per model. Returns a list with either a Competition or an error
+    dict for each item.
+    """
+    validated = []
+    for item in items:
+        serializer = CompetitionBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            validated.append((serializer.validated_data, None))
+        else:
+            validated.append((None, dict(serializer.errors)))
+
+    valid = [data for data, errors in validated if errors is None]
+    pilots = Pilot.objects.only('pk', 'name').in_bulk({data['pilot'] for data in valid}, field_name='name')
+    drones = Drone.objects.only('pk', 'name', 'drone_category').in_bulk({data['drone'] for data in valid}, field_name='name')
+
+    results = []
+    for data, errors in validated:
+        if errors is not None:
+            results.append(errors)
+            continue
+        pilot = pilots.get(data['pilot'])
+        drone = drones.get(data['drone'])
+        errors = {}
+        if pilot is None:
+            errors['pilot'] = [MISSING_OBJECT_MESSAGE.format(data['pilot'])]
+        if drone is None:
+            errors['drone'] = [MISSING_OBJECT_MESSAGE.format(data['drone'])]
+        if errors:
+            results.append(errors)
+            continue
+        results.append(Competition(
+            pilot=pilot,
+            drone=drone,
+            distance_in_feet=data['distance_in_feet'],
+            distance_achievement_date=data['distance_achievement_date'],
+        ))
+    return results
+
+
+def bulk_create_competitions(items, all_or_nothing=False, batch_size=1000):
+    """
+    Returns (results, errors): the created competitions (None for rejected
+    items) and a list of {'index', 'errors'} entries. With all_or_nothing
+    any error rejects the whole batch.
+    """
+    validated = validate_items(items)
+    errors = [
+        {'index': index, 'errors': result}
+        for index, result in enumerate(validated)
+        if not isinstance(result, Competition)
+    ]
+    if errors and all_or_nothing:
+        return [None] * len(items), errors
+    competitions = [result for result in validated if isinstance(result, Competition)]
+    if competitions:
+        with transaction.atomic():
+            Competition.objects.bulk_create(competitions, batch_size=batch_size)
+            leaderboard.refresh_for_competitions(competitions)
+        # bulk_create sends no post_save signals
+        bump_table_versions(Competition._meta.db_table)
+    results = [result if isinstance(result, Competition) else None for result in validated]
+    return results, errors
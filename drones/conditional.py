@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import math
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .apisettings import get_setting
+from .tableversions import get_table_versions
+
+VERSION = 'version'
+TIMESTAMP = 'timestamp'
+
+
+def get_updated_field(model):
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            return field.name
+    return None
+
+
+def get_model_fingerprints(models):
+    """
+    Returns {table: (marker, last modified timestamp)} for models.
+
+    The 'version' fingerprint reads the per-table write versions from the
+    SHARED_CACHE, which every worker process has to see (Redis in
+    settings.py) or a worker answers 304 for data another worker changed. The 'timestamp'
+    fingerprint runs one MAX(updated)/COUNT(*) query per model with an
+    auto_now field instead, and does not depend on the cache.
+    """
+    tables = {model._meta.db_table: model for model in models}
+    fingerprints = {}
+    if get_setting('CONDITIONAL_GET_FINGERPRINT') == TIMESTAMP:
+        for table, model in tables.items():
+            updated_field = get_updated_field(model)
+            if updated_field is None:
+                continue
+            values = model._default_manager.aggregate(last=Max(updated_field), count=Count('pk'))
+            last = values['last'].timestamp() if values['last'] is not None else 0
+            fingerprints[table] = ('{0}:{1}'.format(last, values['count']), last)
+    versions = get_table_versions(set(tables) - set(fingerprints))
+    for table, version in versions.items():
+        fingerprints[table] = (str(version), version / 1e9)
+    return fingerprints
+
+
+def get_validators(models, path, query_params, accept='', version=None, authenticated=False):
+    """
+    Returns the (etag, last_modified) pair for a response built from models.
+    Nothing is serialized; the ETag covers the request parameters that
+    change the representation and the fingerprints of the models.
+    """
+    fingerprints = get_model_fingerprints(models)
+    query = sorted((key, value) for key in query_params for value in query_params.getlist(key))
+    parts = [
+        path,
+        repr(query),
+        accept,
+        str(version),
+        str(authenticated),
+        repr(sorted((table, marker) for table, (marker, _) in fingerprints.items())),
+    ]
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+    # rounded up so that a write later in the same second is never hidden
+    last_modified = math.ceil(max((last for _, last in fingerprints.values()), default=0)) or None
+    return etag, last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def get_request_validators(request, models):
+    return get_validators(
+        models,
+        request.path,
+        request.query_params,
+        accept=request.accepted_media_type,
+        version=request.version,
+        authenticated=request.user.is_authenticated,
+    )
+
+
+def get_not_modified_response(request, validators):
+    etag, last_modified = validators
+    return get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+
+
+def get_conditional_get_response(request, load_validators, build_response):
+    """
+    Returns the 304 for a GET/HEAD request matching load_validators(), or
+    the response of build_response() carrying them. Other methods are
+    passed through untouched.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return build_response()
+    validators = load_validators()
+    response = get_not_modified_response(request, validators)
+    if response is None:
+        response = build_response()
+        if response.status_code != 200:
+            return response
+    return set_validators(response, *validators)
+
+
+def condition_on(*models):
+    """
+    ConditionalGetMixin for function views whose responses are built from
+    models. Goes below @api_view, so authentication, permissions and
+    throttling are checked before a 304 is answered.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return get_conditional_get_response(
+                request,
+                lambda: get_request_validators(request, models),
+                lambda: view(request, *args, **kwargs),
+            )
+        return wrapped
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match/If-Modified-Since with 304 before the queryset
+    is evaluated or the serializer runs. Authentication, permissions and
+    throttling have already been checked by then.
+    """
+
+    def get_request_validators(self, request):
+        return get_request_validators(request, self.get_dependency_models())
+
+    def get_not_modified_response(self, request, validators):
+        return get_not_modified_response(request, validators)
+
+    def get_conditional_response(self, request, build_response):
+        return get_conditional_get_response(request, lambda: self.get_request_validators(request), build_response)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
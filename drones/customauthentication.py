@@ -0,0 +1,180 @@
+import hashlib
+import hmac
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .apisettings import get_setting
+from .tableversions import bump_table_versions, get_table_versions
+
+TOKEN = 'token'
+BASIC = 'basic'
+# the password hash is never cached, the rebuilt user defers it
+EXCLUDED_FIELDS = ('password',)
+
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def record(scheme, hit):
+    with _stats_lock:
+        (_hits if hit else _misses)[scheme] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        stats = {}
+        for scheme in sorted(set(_hits) | set(_misses)):
+            total = _hits[scheme] + _misses[scheme]
+            stats[scheme] = {
+                'hits': _hits[scheme],
+                'misses': _misses[scheme],
+                'hit_rate': round(_hits[scheme] / total, 4) if total else None,
+            }
+        return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _hits.clear()
+        _misses.clear()
+
+
+def get_user_generation_key(user_pk):
+    # per-user versions live next to the table versions and are bumped the same way
+    return 'authuser:{0}'.format(user_pk)
+
+
+def get_user_generation(user_pk):
+    key = get_user_generation_key(user_pk)
+    return get_table_versions([key])[key]
+
+
+def get_token_cache_key(key):
+    return 'auth:token:{0}'.format(hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+
+def get_basic_cache_key(userid, password):
+    message = '{0}\0{1}'.format(userid, password).encode('utf-8')
+    digest = hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
+    return 'auth:basic:{0}'.format(digest)
+
+
+def dump_instance(instance, excluded=()):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in excluded
+    }
+
+
+def load_instance(model, values):
+    """
+    Rebuilds a model instance from dump_instance() values without a query.
+    """
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def get_cached(cache_key):
+    """
+    Returns the cached entry under cache_key, or None when there is none or
+    its user was saved or deleted since it was stored.
+    """
+    entry = cache.get(cache_key)
+    if entry is None:
+        return None
+    if entry['generation'] != get_user_generation(entry['user'][get_user_model()._meta.pk.attname]):
+        return None
+    user = load_instance(get_user_model(), entry['user'])
+    if not user.is_active:
+        return None
+    return user, entry
+
+
+def get_auth_versions():
+    tables = [get_user_model()._meta.db_table, Token._meta.db_table]
+    return get_table_versions(tables)
+
+
+def set_cached(cache_key, user, versions, **extra):
+    """
+    Stores an authentication looked up after reading versions. If a user or
+    token was written since, the lookup may predate the write the user
+    generation already reflects, so nothing is stored.
+    """
+    generation = get_user_generation(user.pk)
+    if get_auth_versions() != versions:
+        return
+    entry = {'generation': generation, 'user': dump_instance(user, EXCLUDED_FIELDS)}
+    entry.update(extra)
+    cache.set(cache_key, entry, get_setting('AUTH_CACHE_TIMEOUT'))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication keeping verified token -> user results in the cache,
+    so a request with a known token runs no query. Entries are keyed by a
+    hash of the token and hold only its creation time; the token is rebuilt
+    from the key the client presented, which is never stored.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        cached = get_cached(cache_key)
+        if cached is not None:
+            user, entry = cached
+            record(TOKEN, hit=True)
+            token = load_instance(self.get_model(), {
+                'key': key, 'user_id': user.pk, 'created': entry['token_created'],
+            })
+            return user, token
+        record(TOKEN, hit=False)
+        versions = get_auth_versions()
+        user, token = super().authenticate_credentials(key)
+        set_cached(cache_key, user, versions, token_created=token.created)
+        return user, token
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication keeping verified credentials in the cache under an
+    HMAC of the user id and password, so that the password hasher runs once
+    per TTL instead of on every request.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache_key = get_basic_cache_key(userid, password)
+        cached = get_cached(cache_key)
+        if cached is not None:
+            record(BASIC, hit=True)
+            return cached[0], None
+        record(BASIC, hit=False)
+        versions = get_auth_versions()
+        user, auth = super().authenticate_credentials(userid, password, request)
+        set_cached(cache_key, user, versions)
+        return user, auth
+
+
+def invalidate_user(sender, instance, **kwargs):
+    """
+    Drops every cached authentication of a user when it is saved (new
+    password, deactivation) or deleted. Connected after the table version
+    receivers, which set_cached() relies on. The generations are in
+    SHARED_CACHE, so the other workers drop their entries too; otherwise
+    they would trust the old credentials for up to AUTH_CACHE_TIMEOUT
+    seconds.
+    """
+    bump_table_versions(get_user_generation_key(instance.pk))
+
+
+def forget_token(sender, instance, **kwargs):
+    # the entry of this process goes now, those of the others at the commit
+    cache.delete(get_token_cache_key(instance.key))
+    bump_table_versions(get_user_generation_key(instance.user_id))
@@ -1,4 +1,318 @@
-from rest_framework.pagination import LimitOffsetPagination
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from . import pagecount
+
 
 class LimitOffsetPaginationWithUpperBound(LimitOffsetPagination):
-    max_limit = 8
\ No newline at end of file
+    max_limit = 8
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_strategy = pagecount.get_count_strategy(view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        self.count_mode, count = self.count_strategy(queryset)
+        return count
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for the async views, reading the count and the
+        page through the async ORM.
+        """
+        self.count_strategy = pagecount.get_count_strategy(view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count_mode, self.count = await pagecount.acount(self.count_strategy, queryset)
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [item async for item in queryset[self.offset:self.offset + self.limit]]
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_mode'] = self.count_mode
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count_mode'] = {
+            'type': 'string',
+            'enum': sorted(pagecount.COUNT_STRATEGIES),
+        }
+        return response_schema
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder keeping the microseconds of datetimes and times, which
+    it cuts to milliseconds. A position rounded down would seek back onto
+    rows of the page it came from.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def add_pk_tiebreak(ordering, model):
+    """
+    ordering plus the pk, in the direction of the last field, unless it
+    already orders by the pk. The result orders rows the same way on
+    every query.
+    """
+    ordering = list(ordering)
+    pk_name = model._meta.pk.name
+    if not any(field.lstrip('-') in ('pk', pk_name) for field in ordering):
+        descending = bool(ordering) and ordering[-1].startswith('-')
+        ordering.append('-pk' if descending else 'pk')
+    return tuple(ordering)
+
+
+class KeysetPaginationWithUpperBound(BasePagination):
+    """
+    Keyset (cursor) pagination over the view's ordering plus a pk tiebreak.
+    Each page seeks past the last row it returned, so deep pages cost the
+    same as the first one and no COUNT(*) is run.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 8
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page([item async for item in queryset])
+
+    def get_page_queryset(self, queryset, request, view):
+        """
+        The queryset of the requested page plus one row, which tells whether
+        there is another page.
+        """
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor['reverse']
+
+        ordering = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(ordering, self.cursor['position']))
+        return queryset[:self.limit + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.cursor is not None and self.cursor['reverse']:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_limit(self, request):
+        try:
+            limit = _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            limit = self.default_limit
+        return min(limit, self.max_limit)
+
+    def get_ordering(self, queryset, view):
+        ordering = list(queryset.query.order_by)
+        if not ordering:
+            ordering = list(getattr(view, 'cursor_ordering', None) or queryset.query.get_meta().ordering)
+        if not all(isinstance(field, str) and field != '?' for field in ordering):
+            raise NotFound('Keyset pagination requires ordering by plain fields.')
+        return add_pk_tiebreak(ordering, queryset.model)
+
+    def reverse_ordering(self, ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+    def get_seek_filter(self, ordering, position):
+        """
+        Rows strictly after position in ordering. The leading column is also
+        bounded on its own so that the database can seek on its index.
+        """
+        seek = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{'{0}__{1}'.format(name, lookup): value})
+            equal &= Q(**{name: value})
+        leading = ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{'{0}__{1}'.format(leading.lstrip('-'), bound): position[0]}) & seek
+
+    def get_position(self, item):
+        position = []
+        for field in self.ordering:
+            value = item
+            for attr in field.lstrip('-').split('__'):
+                value = value[attr] if isinstance(value, dict) else getattr(value, attr)
+            position.append(value)
+        return position
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps(
+            {'o': self.ordering, 'p': position, 'r': reverse},
+            cls=CursorJSONEncoder,
+            separators=(',', ':')
+        )
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            ordering, position, reverse = tuple(payload['o']), payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or not isinstance(position, list) or len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {'position': position, 'reverse': reverse}
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.limit_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class LimitOffsetOrKeysetPagination(BasePagination):
+    """
+    Offset pagination unless the view sets pagination_mode = 'cursor' or
+    the request asks for ?pagination=cursor (or carries a cursor).
+    """
+    OFFSET = 'offset'
+    CURSOR = 'cursor'
+    mode_query_param = 'pagination'
+    offset_pagination_class = LimitOffsetPaginationWithUpperBound
+    keyset_pagination_class = KeysetPaginationWithUpperBound
+
+    def __init__(self):
+        self.paginator = self.offset_pagination_class()
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def get_mode(self, request, view):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in (self.OFFSET, self.CURSOR):
+            return mode
+        if request.query_params.get(self.keyset_pagination_class.cursor_query_param):
+            return self.CURSOR
+        return getattr(view, 'pagination_mode', self.OFFSET)
+
+    def select_paginator(self, request, view):
+        if self.get_mode(request, view) == self.CURSOR:
+            self.paginator = self.keyset_pagination_class()
+        else:
+            self.paginator = self.offset_pagination_class()
+        return self.paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.select_paginator(request, view).paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await self.select_paginator(request, view).apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [{
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Pagination mode, offset or cursor.',
+            'schema': {'type': 'string', 'enum': [self.OFFSET, self.CURSOR]},
+        }]
+        parameters += self.offset_pagination_class().get_schema_operation_parameters(view)
+        keyset_parameters = self.keyset_pagination_class().get_schema_operation_parameters(view)
+        parameters += [p for p in keyset_parameters if p['name'] != self.keyset_pagination_class.limit_query_param]
+        return parameters
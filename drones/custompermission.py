@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -9,4 +10,15 @@ class IsCurrentUserOwnerOrReadOnly(permissions.BasePermission):
         else:
             # the method is not safe, return False 
             # only owners are granted permission for unsafe methods
-            return obj.owner == request.user
\ No newline at end of file
+            return obj.onwer == request.user
+
+
+class IsInternalIPOrStaff(permissions.BasePermission):
+    """
+    Requests from INTERNAL_IPS (a local metrics scraper) or by staff users.
+    """
+
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS:
+            return True
+        return bool(request.user and request.user.is_staff)
@@ -0,0 +1,220 @@
+import random
+import sqlite3
+import threading
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import (
+    AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle,
+)
+
+from .apisettings import get_setting
+
+FIXED = 'fixed'
+SLIDING = 'sliding'
+WINDOWS = (FIXED, SLIDING)
+CACHE = 'cache'
+SQLITE = 'sqlite'
+STORES = (CACHE, SQLITE)
+# one hit in this many also deletes the counters of idle clients
+PRUNE_EVERY = 1000
+
+_PREVIOUS = 'CASE bucket WHEN :bucket THEN previous WHEN :bucket - 1 THEN count ELSE 0 END'
+_CURRENT = 'CASE bucket WHEN :bucket THEN count ELSE 0 END'
+_ALLOWED = '({0}) * :weight + ({1}) < :limit'.format(_PREVIOUS, _CURRENT)
+HIT_SQL = (
+    'INSERT INTO throttle (key, bucket, count, previous, allowed, expires) '
+    'VALUES (:key, :bucket, 1, 0, 1, :expires) '
+    'ON CONFLICT (key) DO UPDATE SET '
+    'previous = {previous}, '
+    'count = ({current}) + ({allowed}), '
+    'allowed = {allowed}, '
+    'bucket = :bucket, '
+    'expires = :expires '
+    'RETURNING count, previous, allowed'
+).format(previous=_PREVIOUS, current=_CURRENT, allowed=_ALLOWED)
+
+
+class ThrottleStore:
+    """
+    Request counters kept in a SQLite file, so that every worker process
+    on the host shares them.
+
+    Each key is one row holding the number of requests allowed in the
+    current window and in the previous one. A check is a single upsert
+    that rolls the window over, compares the estimate with the limit and
+    increments the counter only for allowed requests, all under SQLite's
+    write lock; its cost does not depend on the rate.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle ('
+                'key TEXT PRIMARY KEY, bucket INTEGER NOT NULL, count INTEGER NOT NULL, '
+                'previous INTEGER NOT NULL, allowed INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key, limit, duration, now, window=SLIDING):
+        """
+        Counts a request against key and returns (allowed, count, previous).
+        A fixed window only looks at the requests of the current period; a
+        sliding window also weights the previous period's requests by the
+        part of it that still overlaps the last `duration` seconds.
+        """
+        bucket = int(now // duration)
+        if window == SLIDING:
+            weight = 1 - (now % duration) / duration
+        else:
+            weight = 0
+        count, previous, allowed = self.connection.execute(HIT_SQL, {
+            'key': key,
+            'bucket': bucket,
+            'weight': weight,
+            'limit': limit,
+            'expires': (bucket + 2) * duration,
+        }).fetchone()
+        if random.randrange(PRUNE_EVERY) == 0:
+            self.prune(now)
+        return bool(allowed), count, previous
+
+    def prune(self, now):
+        self.connection.execute('DELETE FROM throttle WHERE expires < ?', (now,))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM throttle')
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class CacheThrottleStore:
+    """
+    Request counters in the SHARED_CACHE (Redis or Memcached), for workers
+    on more than one host. Each window of a key is one counter: a check is
+    an atomic incr() of the current window plus a get() of the previous
+    one, and a request over the limit is taken back with decr(), so only
+    allowed requests count.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def hit(self, key, limit, duration, now, window=SLIDING):
+        cache = caches[self.alias]
+        bucket = int(now // duration)
+        current_key = 'throttle:{0}:{1}'.format(key, bucket)
+        previous = 0
+        weight = 0
+        if window == SLIDING:
+            previous = cache.get('throttle:{0}:{1}'.format(key, bucket - 1), 0)
+            weight = 1 - (now % duration) / duration
+        # kept for the window after it, which weights it
+        cache.add(current_key, 0, timeout=2 * duration)
+        count = cache.incr(current_key)
+        allowed = previous * weight + count - 1 < limit
+        if not allowed:
+            count = cache.decr(current_key)
+        return allowed, count, previous
+
+    def close(self):
+        pass
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    kind = get_setting('THROTTLE_STORE')
+    if kind not in STORES:
+        raise ImproperlyConfigured("THROTTLE_STORE must be 'cache' or 'sqlite', not {0!r}".format(kind))
+    if kind == CACHE:
+        key = (kind, get_setting('SHARED_CACHE'))
+    else:
+        key = (kind, str(get_setting('THROTTLE_STORE_PATH')))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store_class = CacheThrottleStore if kind == CACHE else ThrottleStore
+            store = _stores[key] = store_class(key[1])
+        return store
+
+
+def reset_stores():
+    """
+    Closes this thread's connections to the stores and forgets them, so that
+    get_store() opens the store the settings currently name.
+    """
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+class SharedSimpleRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle counting requests in the store THROTTLE_STORE names
+    instead of a per-process cache of timestamp lists.
+    """
+    window = None
+
+    def get_window(self):
+        window = self.window or get_setting('THROTTLE_WINDOW')
+        if window not in WINDOWS:
+            raise ImproperlyConfigured("THROTTLE_WINDOW must be 'fixed' or 'sliding', not {0!r}".format(window))
+        return window
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        self.allowed, self.count, self.previous = get_store().hit(
+            '{0}:{1}'.format(self.key, self.duration),
+            self.num_requests,
+            self.duration,
+            self.now,
+            self.get_window()
+        )
+        return self.allowed
+
+    def wait(self):
+        elapsed = self.now % self.duration
+        remaining = self.duration - elapsed
+        if self.get_window() == FIXED:
+            return remaining
+        if self.count >= self.num_requests:
+            # after the rollover these requests become the weighted previous window
+            return remaining + (1 - self.num_requests / self.count) * self.duration
+        # the previous window's weight has to fall until one more request fits
+        weight = (self.num_requests - self.count) / self.previous
+        return max(0, (1 - weight) * self.duration - elapsed)
+
+
+class SharedAnonRateThrottle(AnonRateThrottle, SharedSimpleRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(UserRateThrottle, SharedSimpleRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(ScopedRateThrottle, SharedSimpleRateThrottle):
+    pass
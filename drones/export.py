@@ -0,0 +1,104 @@
+import csv
+import json
+import logging
+import time
+
+from django.http import StreamingHttpResponse
+from django.utils.encoding import force_str
+
+logger = logging.getLogger(__name__)
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+# rows are joined into buffers of about this many characters before being sent
+BUFFER_SIZE = 64 * 1024
+
+
+def format_value(value):
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows, fields):
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=force_str)
+    for row in rows:
+        yield encoder.encode({field: format_value(value) for field, value in zip(fields, row)}) + '\n'
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([format_value(value) for value in row])
+
+
+WRITERS = {
+    NDJSON: ndjson_lines,
+    CSV: csv_lines,
+}
+
+
+class RowCounter:
+    def __init__(self, rows):
+        self.rows = 0
+        self._rows = rows
+
+    def __iter__(self):
+        for row in self._rows:
+            self.rows += 1
+            yield row
+
+
+def buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_rows(queryset, columns, fields, export_format, chunk_size=CHUNK_SIZE):
+    """
+    Yields the export in chunks of text. Rows are read through a chunked
+    (server-side on PostgreSQL) cursor over a values_list() projection, so
+    memory stays flat whatever the number of rows. Throughput is logged
+    once the stream is exhausted.
+    """
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    counted = RowCounter(rows)
+    started = time.perf_counter()
+    yield from buffered(WRITERS[export_format](counted, fields))
+    elapsed = time.perf_counter() - started
+    logger.info(
+        'Exported %d %s rows as %s in %.3fs (%.0f rows/s)',
+        counted.rows, queryset.model._meta.label, export_format, elapsed,
+        counted.rows / elapsed if elapsed else 0,
+    )
+
+
+def streaming_response(queryset, columns, fields, export_format, filename):
+    response = StreamingHttpResponse(
+        stream_rows(queryset, columns, fields, export_format),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = 'attachment; filename="{0}.{1}"'.format(filename, export_format)
+    return response
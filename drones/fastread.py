@@ -0,0 +1,159 @@
+from rest_framework import serializers
+from rest_framework.relations import HyperlinkedIdentityField, ManyRelatedField, SlugRelatedField
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from .fieldsets import get_fieldset_serializer
+from .hyperlinks import build_url
+from .queryplanner import MAX_PLANS
+
+# marks the step of the url field, bound to the request in encode()
+URL = object()
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+class RowEncoder:
+    """
+    Turns values() rows into the data serializer would produce for the
+    same instances, without building instances or serializer fields.
+
+    The serializer's fields are inspected once; every output key is then
+    a (name, column, convert) triple applied to the row dict. Only flat
+    serializers are supported: model fields, read-only fields following
+    foreign keys, slug related fields and the url identity field.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = ['pk']
+        self.steps = []
+        self.identity_field = None
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.steps.append(self.compile_field(field))
+
+    def add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return column
+
+    def compile_field(self, field):
+        if isinstance(field, HyperlinkedIdentityField):
+            if field.lookup_field not in ('pk', self.model._meta.pk.name):
+                raise UnsupportedField(field.field_name)
+            self.identity_field = field.view_name, field.lookup_url_kwarg, field.format, field.reverse
+            return field.field_name, 'pk', URL
+        if field.source == '*' or isinstance(field, (serializers.BaseSerializer, ManyRelatedField)):
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, serializers.SerializerMethodField):
+            raise UnsupportedField(field.field_name)
+        column = '__'.join(field.source_attrs)
+        model = self.model
+        for attr in field.source_attrs[:-1]:
+            model_field = model._meta.get_field(attr)
+            if not model_field.many_to_one:
+                raise UnsupportedField(field.field_name)
+            model = model_field.related_model
+        if isinstance(field, SlugRelatedField):
+            column = '{0}__{1}'.format(column, field.slug_field)
+            return field.field_name, self.add_column(column), None
+        if field.source_attrs[-1] not in {model_field.name for model_field in model._meta.concrete_fields} | {'pk'}:
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, serializers.ReadOnlyField):
+            return field.field_name, self.add_column(column), None
+        return field.field_name, self.add_column(column), field.to_representation
+
+    def get_columns(self, ordering=()):
+        """
+        The values() columns to fetch; ordering columns are added because
+        keyset pagination reads the cursor position from the rows.
+        """
+        columns = list(self.columns)
+        for field in ordering:
+            name = field.lstrip('-')
+            if name not in columns:
+                columns.append(name)
+        return columns
+
+    def get_url_converter(self, request, format):
+        view_name, lookup_url_kwarg, field_format, reverse = self.identity_field
+        if format and field_format and field_format != format:
+            format = field_format
+
+        def convert(pk):
+            return build_url(view_name, lookup_url_kwarg, pk, request, format, reverse)
+        return convert
+
+    def encode(self, rows, request=None, format=None):
+        steps = [
+            (name, column, self.get_url_converter(request, format) if convert is URL else convert)
+            for name, column, convert in self.steps
+        ]
+        results = ReturnList(serializer=None)
+        for row in rows:
+            data = {}
+            for name, column, convert in steps:
+                value = row[column]
+                if value is not None and convert is not None:
+                    value = convert(value)
+                data[name] = value
+            results.append(data)
+        return results
+
+
+_encoders = {}
+
+
+def get_row_encoder(serializer, cache_key=None):
+    """
+    The RowEncoder of serializer (a class or, with a cache_key, an
+    instance holding a field selection), or None when one of its fields needs an instance. Built once
+    per serializer class and key.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    key = (type(serializer), cache_key)
+    if key in _encoders:
+        return _encoders[key]
+    try:
+        encoder = RowEncoder(serializer)
+    except UnsupportedField:
+        encoder = None
+    if cache_key is None or len(_encoders) < MAX_PLANS:
+        _encoders[key] = encoder
+    return encoder
+
+
+class FastReadMixin:
+    """
+    With fast_read = True, list() reads a values() projection of the
+    serializer's fields and encodes the rows with a RowEncoder instead of
+    serializing model instances. The output is identical.
+    """
+    fast_read = False
+
+    def get_row_encoder(self):
+        if not self.fast_read:
+            return None
+        return get_row_encoder(*get_fieldset_serializer(self))
+
+    def get_fast_queryset(self, queryset, encoder):
+        ordering = list(queryset.query.order_by or queryset.query.get_meta().ordering)
+        ordering += getattr(self, 'cursor_ordering', None) or ()
+        return queryset.values(*encoder.get_columns(field for field in ordering if isinstance(field, str)))
+
+    def encode_rows(self, rows, encoder):
+        return encoder.encode(rows, request=self.request, format=self.format_kwarg)
+
+    def list(self, request, *args, **kwargs):
+        encoder = self.get_row_encoder()
+        if encoder is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.get_fast_queryset(self.filter_queryset(self.get_queryset()), encoder)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.encode_rows(page, encoder))
+        return Response(self.encode_rows(queryset, encoder))
@@ -0,0 +1,127 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField
+from rest_framework.utils.field_mapping import get_detail_view_name
+
+from .hyperlinks import CachedHyperlinkedRelatedField
+from .nested import BoundedListSerializer, BoundedManyRelatedField
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+# context key of a (fields, expand) selection given without a request
+FIELDSET = 'fieldset'
+
+
+def parse_paths(value):
+    paths = {path.strip() for path in value.split(',')}
+    paths.discard('')
+    return frozenset(paths)
+
+
+def get_selection(request):
+    """
+    Returns (fields, expand): the dotted field paths of ?fields= and
+    ?expand=, each None when the parameter is absent. An empty ?fields= is
+    ignored, an empty ?expand= expands nothing. Writes ignore both: their
+    data is validated against every field and the result rendered in full.
+    """
+    params = getattr(request, 'query_params', None)
+    if not params or request.method not in SAFE_METHODS:
+        return None, None
+    fields = parse_paths(params[FIELDS_PARAM]) if FIELDS_PARAM in params else None
+    expand = parse_paths(params[EXPAND_PARAM]) if EXPAND_PARAM in params else None
+    return fields or None, expand
+
+
+def get_path(serializer):
+    names = []
+    while serializer.parent is not None:
+        if serializer.field_name:
+            names.append(serializer.field_name)
+        serializer = serializer.parent
+    return '.'.join(reversed(names))
+
+
+def is_expanded(expand, path):
+    prefix = path + '.'
+    return path in expand or any(other.startswith(prefix) for other in expand)
+
+
+def collapse(field):
+    """
+    The link field rendered in place of a nested serializer that was not
+    expanded, or field itself when its model has no detail view name.
+    """
+    many = isinstance(field, serializers.ListSerializer)
+    child = field.child if many else field
+    model = getattr(getattr(child, 'Meta', None), 'model', None)
+    if model is None:
+        return field
+    kwargs = {'read_only': True}
+    if field.source is not None:
+        kwargs['source'] = field.source
+    view_name = get_detail_view_name(model)
+    if not many:
+        return CachedHyperlinkedRelatedField(view_name=view_name, **kwargs)
+    child_relation = CachedHyperlinkedRelatedField(read_only=True, view_name=view_name)
+    if isinstance(field, BoundedListSerializer):
+        return BoundedManyRelatedField(child_relation=child_relation, limit=field._limit, **kwargs)
+    return ManyRelatedField(child_relation=child_relation, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin rendering the fields selected by ?fields= (dotted
+    paths reach into nested serializers, a bare nested name keeps all of
+    its fields). When ?expand= is given, nested serializers not named in
+    it are rendered as links to their objects. Without either parameter,
+    and on writes, every field is rendered.
+    """
+
+    def get_selection(self):
+        selection = self.context.get(FIELDSET)
+        if selection is None:
+            selection = get_selection(self.context.get('request'))
+        return selection
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expand = self.get_selection()
+        if selected is None and expand is None:
+            return fields
+        path = get_path(self)
+        prefix = path + '.' if path else ''
+        if selected is not None:
+            wanted = {other[len(prefix):].split('.')[0] for other in selected if other.startswith(prefix)}
+            if wanted or not path:
+                fields = {name: field for name, field in fields.items() if name in wanted}
+        if expand is not None:
+            for name, field in fields.items():
+                if isinstance(field, serializers.BaseSerializer) and not is_expanded(expand, prefix + name):
+                    fields[name] = collapse(field)
+        return fields
+
+
+def get_rendered_paths(serializer, prefix=''):
+    for name, field in serializer.fields.items():
+        child = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(child, serializers.BaseSerializer):
+            yield prefix + name + '/'
+            yield from get_rendered_paths(child, prefix + name + '.')
+        else:
+            yield prefix + name
+
+
+def get_fieldset_serializer(view):
+    """
+    Returns (serializer, key) for planning the queries of view: the
+    serializer class and None without a selection, else a serializer
+    holding the request's selection and a key naming the fields it
+    renders, so that equivalent selections share query plans.
+    """
+    serializer_class = view.get_serializer_class()
+    selection = get_selection(getattr(view, 'request', None))
+    if selection == (None, None) or not issubclass(serializer_class, SparseFieldsetMixin):
+        return serializer_class, None
+    serializer = serializer_class(context={FIELDSET: selection})
+    return serializer, ','.join(get_rendered_paths(serializer))
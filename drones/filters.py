@@ -1,6 +1,233 @@
+import threading
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.choices import BaseChoiceIterator
 from django_filters import rest_framework as filters
+from django_filters.fields import ChoiceField
+from . import tableversions
 from .models import Competition
 
+class ReferencedValues:
+    """
+    The distinct values of a related column that rows of model reference
+    (the names of the drones that have competitions), as AllValuesFilter
+    offers them, with the number of rows referencing each related row.
+    They are loaded on first use and reloaded when the version of either
+    table moves, which another process writing them does: the versions are
+    in SHARED_CACHE. Writes of this process are applied in place once
+    committed, so building a filterset costs one SHARED_CACHE read.
+    """
+
+    def __init__(self, model, field_name):
+        relation, self.field = field_name.split('__', 1)
+        self.model = model
+        self.field_name = field_name
+        self.attname = model._meta.get_field(relation).attname
+        self.related_model = model._meta.get_field(relation).related_model
+        self.tables = (model._meta.db_table, self.related_model._meta.db_table)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.values = {}
+        self.choices = None
+        self.versions = None
+
+    def load(self, versions):
+        rows = self.model._default_manager.order_by().values_list(self.attname, self.field_name).annotate(
+            count=Count('pk')
+        )
+        self.counts = {}
+        self.values = {}
+        for pk, value, count in rows:
+            self.counts[pk] = count
+            self.values[pk] = value
+        self.choices = None
+        self.versions = versions
+
+    def get_choices(self):
+        """
+        Returns (values, valid): the sorted distinct values and the set of
+        their string forms.
+        """
+        with self.lock:
+            versions = tableversions.get_table_versions(self.tables)
+            if versions != self.versions:
+                self.load(versions)
+            if self.choices is None:
+                values = sorted(set(self.values.values()))
+                self.choices = (values, frozenset(str(value) for value in values))
+            return self.choices
+
+    def add(self, pk, delta):
+        if pk is None:
+            return
+        count = self.counts.get(pk, 0) + delta
+        if count > 0:
+            if pk not in self.values:
+                self.values[pk] = self.related_model._default_manager.filter(pk=pk).values_list(
+                    self.field, flat=True
+                ).first()
+            self.counts[pk] = count
+        else:
+            self.counts.pop(pk, None)
+            self.values.pop(pk, None)
+        self.choices = None
+
+    def apply(self, change):
+        """
+        Applies a committed write and takes the table versions it leaves.
+        Runs after the table version receivers and the name indexes, which
+        give the tables their new versions. A write another process
+        committed during the transaction is only seen at the next version
+        change.
+        """
+        with self.lock:
+            if self.versions is None:
+                return
+            change()
+            self.versions = tableversions.get_table_versions(self.tables)
+
+    def rename(self, pk, value):
+        if pk in self.values:
+            self.values[pk] = value
+            self.choices = None
+
+    def remove(self, pk):
+        self.counts.pop(pk, None)
+        if self.values.pop(pk, None) is not None:
+            self.choices = None
+
+    def saved(self, sender, instance, created=False, raw=False, **kwargs):
+        if raw:
+            return
+        old = None
+        if not created:
+            old = getattr(instance, '_referenced_values', {}).get(self.attname)
+            if old is None:
+                return
+        new = getattr(instance, self.attname)
+        if old == new:
+            return
+
+        def change():
+            self.add(old, -1)
+            self.add(new, 1)
+        transaction.on_commit(lambda: self.apply(change), using=kwargs.get('using'))
+
+    def deleted(self, sender, instance, **kwargs):
+        pk = getattr(instance, self.attname)
+        transaction.on_commit(lambda: self.apply(lambda: self.add(pk, -1)), using=kwargs.get('using'))
+
+    def related_saved(self, sender, instance, created=False, **kwargs):
+        if created:
+            return
+        pk, value = instance.pk, getattr(instance, self.field)
+        transaction.on_commit(lambda: self.apply(lambda: self.rename(pk, value)), using=kwargs.get('using'))
+
+    def related_deleted(self, sender, instance, **kwargs):
+        pk = instance.pk
+        transaction.on_commit(lambda: self.apply(lambda: self.remove(pk)), using=kwargs.get('using'))
+
+    def connect(self):
+        uid = 'filterchoices_{0}_{1}'.format(self.model._meta.label_lower, self.field_name)
+        post_save.connect(self.saved, sender=self.model, weak=False, dispatch_uid=uid + '_post_save')
+        post_delete.connect(self.deleted, sender=self.model, weak=False, dispatch_uid=uid + '_post_delete')
+        post_save.connect(self.related_saved, sender=self.related_model, weak=False, dispatch_uid=uid + '_related_post_save')
+        post_delete.connect(self.related_deleted, sender=self.related_model, weak=False, dispatch_uid=uid + '_related_post_delete')
+
+
+_values = {}
+
+
+def get_referenced_values(model, field_name):
+    key = (model, field_name)
+    if key not in _values:
+        _values.setdefault(key, ReferencedValues(model, field_name))
+    return _values[key]
+
+
+def remember_references(sender, instance, raw=False, **kwargs):
+    """
+    Keeps the related pks an updated row referenced before the save, for
+    ReferencedValues.saved(); one query for all the filters of the model.
+    """
+    instance._referenced_values = {}
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    attnames = sorted({values.attname for (model, _), values in _values.items() if model is sender})
+    row = sender._default_manager.filter(pk=instance.pk).values(*attnames).first()
+    instance._referenced_values = row or {}
+
+
+def register(model, *field_names):
+    for field_name in field_names:
+        get_referenced_values(model, field_name).connect()
+    pre_save.connect(
+        remember_references, sender=model, dispatch_uid='filterchoices_{0}_pre_save'.format(model._meta.label_lower)
+    )
+
+
+def get_choice_values(model, field_name):
+    return get_referenced_values(model, field_name).get_choices()
+
+
+def is_choice_value(model, field_name, value):
+    """
+    Whether value is one of the choices. A value missing from the cached
+    choices is looked up through model before it is rejected, in case it
+    was written without a signal (bulk_create(), raw SQL) or the versions
+    have not caught up with the write yet.
+    """
+    if str(value) in get_choice_values(model, field_name)[1]:
+        return True
+    return model._default_manager.filter(**{field_name: value}).exists()
+
+
+class ValueChoices(BaseChoiceIterator):
+    """
+    Lazy choices: only rendering a form lists them.
+    """
+
+    def __init__(self, model, field_name):
+        self.model = model
+        self.field_name = field_name
+
+    def __iter__(self):
+        for value in get_choice_values(self.model, self.field_name)[0]:
+            yield (value, value)
+
+    def __len__(self):
+        return len(get_choice_values(self.model, self.field_name)[0])
+
+
+class CachedChoiceField(ChoiceField):
+    def __init__(self, *args, **kwargs):
+        # ValueChoices, before it is wrapped in the field's choice iterator
+        self.value_choices = kwargs['choices']
+        super().__init__(*args, **kwargs)
+
+    def valid_value(self, value):
+        return is_choice_value(self.value_choices.model, self.value_choices.field_name, value)
+
+
+class CachedAllValuesFilter(filters.ChoiceFilter):
+    """
+    AllValuesFilter that offers the values of the related column the
+    filtered rows reference (e.g. the names of the drones that competed)
+    from ReferencedValues, instead of running SELECT DISTINCT over the
+    filtered model's join each time a filterset is built. The model and
+    field need registering in DronesConfig.ready().
+    """
+    field_class = CachedChoiceField
+
+    @property
+    def field(self):
+        if not hasattr(self, '_field'):
+            self.extra['choices'] = ValueChoices(self.model, self.field_name)
+        return super().field
+
+
 class CompetitionFilter(filters.FilterSet):
     from_achievement_date = filters.DateTimeFilter(
         field_name='distance_achievement_date',
@@ -19,8 +246,8 @@ class CompetitionFilter(filters.FilterSet):
         lookup_expr='lte'
     )
     
-    drone_name = filters.AllValuesFilter(field_name='drone__name')
-    pilot_name = filters.AllValuesFilter(field_name='pilot__name')
+    drone_name = CachedAllValuesFilter(field_name='drone__name')
+    pilot_name = CachedAllValuesFilter(field_name='pilot__name')
 
 
     class Meta:
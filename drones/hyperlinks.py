@@ -0,0 +1,159 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.urls import NoReverseMatch, get_script_prefix, get_urlconf
+from rest_framework import serializers
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField
+from rest_framework.reverse import reverse as drf_reverse
+from rest_framework.settings import api_settings
+
+# reversed in place of the pk; the url is split around it into a template
+SENTINEL = 987654321987654321
+LINKS = 'links'
+RESOLVED = 'resolved'
+
+_templates = {}
+
+_stats_lock = threading.Lock()
+_responses = Counter()
+_links = Counter()
+_resolved = Counter()
+
+
+def record(view_name, counts):
+    with _stats_lock:
+        _responses[view_name] += 1
+        _links[view_name] += counts[LINKS]
+        _resolved[view_name] += counts[RESOLVED]
+
+
+def get_stats():
+    with _stats_lock:
+        endpoints = {
+            name: {
+                'responses': _responses[name],
+                'links': _links[name],
+                'resolved': _resolved[name],
+                'links_per_response': round(_links[name] / _responses[name], 2),
+            }
+            for name in sorted(_responses)
+        }
+        return {
+            'templates': len(_templates),
+            'links': sum(_links.values()),
+            'resolved': sum(_resolved.values()),
+            'endpoints': endpoints,
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        _responses.clear()
+        _links.clear()
+        _resolved.clear()
+
+
+def get_request_counts(request):
+    """
+    The links built and urls resolved for request, kept on the request
+    together with its scheme and host.
+    """
+    counts = getattr(request, '_hyperlink_counts', None)
+    if counts is None:
+        counts = Counter({LINKS: 0, RESOLVED: 0})
+        counts.base = request.build_absolute_uri('/')[:-1]
+        request._hyperlink_counts = counts
+    return counts
+
+
+def get_template_key(view_name, lookup_url_kwarg, request, format, reverse):
+    override = api_settings.URL_FORMAT_OVERRIDE
+    return (
+        view_name,
+        lookup_url_kwarg,
+        format,
+        reverse,
+        get_urlconf(settings.ROOT_URLCONF),
+        get_script_prefix(),
+        getattr(request, 'version', None),
+        type(getattr(request, 'versioning_scheme', None)),
+        # reverse() keeps ?format= on the links of such requests
+        request.GET.get(override) if override else None,
+    )
+
+
+def make_url_template(view_name, lookup_url_kwarg, request, format, reverse, base):
+    """
+    Returns (prefix, suffix) such that base + prefix + pk + suffix is the
+    url reverse() builds for the pk, or None when the url can not be split.
+    """
+    try:
+        url = reverse(view_name, kwargs={lookup_url_kwarg: SENTINEL}, request=request, format=format)
+    except NoReverseMatch:
+        return None
+    if not url.startswith(base) or url.count(str(SENTINEL)) != 1:
+        return None
+    return tuple(url[len(base):].split(str(SENTINEL)))
+
+
+def build_url(view_name, lookup_url_kwarg, lookup_value, request, format, reverse=drf_reverse):
+    """
+    reverse(view_name, kwargs={lookup_url_kwarg: lookup_value}, ...) for
+    integer lookups from a template resolved once per view name, url
+    namespace/version and format; other values are reversed.
+    """
+    if request is None:
+        return reverse(view_name, kwargs={lookup_url_kwarg: lookup_value}, request=request, format=format)
+    counts = get_request_counts(request)
+    counts[LINKS] += 1
+    if type(lookup_value) is int:
+        key = get_template_key(view_name, lookup_url_kwarg, request, format, reverse)
+        if key not in _templates:
+            counts[RESOLVED] += 1
+            _templates.setdefault(key, make_url_template(view_name, lookup_url_kwarg, request, format, reverse, counts.base))
+        template = _templates[key]
+        if template is not None:
+            return '{0}{1}{2}{3}'.format(counts.base, template[0], lookup_value, template[1])
+    counts[RESOLVED] += 1
+    return reverse(view_name, kwargs={lookup_url_kwarg: lookup_value}, request=request, format=format)
+
+
+class CachedHyperlinkMixin:
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+        lookup_value = getattr(obj, self.lookup_field)
+        return build_url(view_name, self.lookup_url_kwarg, lookup_value, request, format, self.reverse)
+
+
+class CachedHyperlinkedRelatedField(CachedHyperlinkMixin, HyperlinkedRelatedField):
+    pass
+
+
+class CachedHyperlinkedIdentityField(CachedHyperlinkMixin, HyperlinkedIdentityField):
+    pass
+
+
+class CachedHyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
+    """
+    HyperlinkedModelSerializer whose url and related link fields build
+    their urls from cached templates.
+    """
+    serializer_related_field = CachedHyperlinkedRelatedField
+    serializer_url_field = CachedHyperlinkedIdentityField
+
+
+class HyperlinkStatsMixin:
+    """
+    Records how many links each response built and how many of them needed
+    a url resolution, and reports both in an X-Hyperlinks header.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        counts = getattr(request, '_hyperlink_counts', None)
+        if counts is not None:
+            record(self.name, counts)
+            response['X-Hyperlinks'] = '{0}={1}, {2}={3}'.format(LINKS, counts[LINKS], RESOLVED, counts[RESOLVED])
+        return response
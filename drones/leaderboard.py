@@ -0,0 +1,312 @@
+import datetime
+import re
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Q, QuerySet, Window
+from django.db.models.functions import Rank, TruncMonth, TruncYear
+from django.utils.dateparse import parse_datetime
+
+from .models import Competition, Drone, DroneCategory, LeaderboardEntry, Pilot
+from .tableversions import bump_table_versions
+
+PERIOD_RE = re.compile(r'^(all|\d{4}|\d{4}-(0[1-9]|1[0-2]))$')
+SUBJECT_FIELDS = {
+    LeaderboardEntry.PILOT: 'pilot_id',
+    LeaderboardEntry.DRONE: 'drone_id',
+}
+
+
+def get_periods(date):
+    if isinstance(date, str):
+        # the instance a competition was created from may still hold the raw value
+        date = parse_datetime(date)
+    date = date.astimezone(datetime.timezone.utc)
+    return (LeaderboardEntry.ALL_TIME, '{0:04d}'.format(date.year), '{0:04d}-{1:02d}'.format(date.year, date.month))
+
+
+def get_period_range(period):
+    if period == LeaderboardEntry.ALL_TIME:
+        return None
+    year, _, month = period.partition('-')
+    year = int(year)
+    if month:
+        start = datetime.datetime(year, int(month), 1, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(year + int(month) // 12, int(month) % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+    else:
+        start = datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc)
+        end = datetime.datetime(year + 1, 1, 1, tzinfo=datetime.timezone.utc)
+    return start, end
+
+
+def get_keys(pilot_id, drone_id, drone_category_id, date):
+    """
+    The (board, subject, drone category, period) entries a competition
+    counts towards.
+    """
+    keys = set()
+    for period in get_periods(date):
+        for category_id in (None, drone_category_id):
+            keys.add((LeaderboardEntry.PILOT, pilot_id, category_id, period))
+            keys.add((LeaderboardEntry.DRONE, drone_id, category_id, period))
+    return keys
+
+
+def get_competition_keys(competitions):
+    rows = competitions.values_list('pilot_id', 'drone_id', 'drone__drone_category_id', 'distance_achievement_date')
+    keys = set()
+    for row in rows.iterator():
+        keys |= get_keys(*row)
+    return keys
+
+
+def ranked(entries):
+    """
+    Annotates entries of one board scope with their rank, computed when
+    they are read: entries with the same best distance share a rank.
+    """
+    return entries.annotate(rank=Window(Rank(), order_by=F('best_distance_in_feet').desc()))
+
+
+def lock_subjects(keys):
+    """
+    Locks the pilot and drone rows of keys until the transaction ends, so
+    that concurrent refreshes of a subject's entries run one after the
+    other. Pilots are locked before drones, each in pk order. NO KEY UPDATE
+    does not conflict with the KEY SHARE locks inserting a competition takes
+    on its pilot and drone.
+    """
+    no_key = connection.features.has_select_for_no_key_update
+    for board, model in ((LeaderboardEntry.PILOT, Pilot), (LeaderboardEntry.DRONE, Drone)):
+        subject_ids = {key[1] for key in keys if key[0] == board}
+        if subject_ids:
+            list(model.objects.select_for_update(no_key=no_key).filter(pk__in=subject_ids).order_by('pk').values_list('pk'))
+
+
+def get_bests(keys):
+    """
+    Returns {key: best distance or None} from the competitions table, with
+    one query per pilot or drone: a filtered MAX per category and period.
+    """
+    by_subject = defaultdict(list)
+    for key in keys:
+        by_subject[key[:2]].append(key)
+    bests = {}
+    for (board, subject_id), subject_keys in by_subject.items():
+        aggregates = {}
+        for index, (_, _, drone_category_id, period) in enumerate(subject_keys):
+            condition = Q()
+            if drone_category_id is not None:
+                condition &= Q(drone__drone_category_id=drone_category_id)
+            period_range = get_period_range(period)
+            if period_range is not None:
+                condition &= Q(
+                    distance_achievement_date__gte=period_range[0],
+                    distance_achievement_date__lt=period_range[1]
+                )
+            aggregates['best_{0}'.format(index)] = Max('distance_in_feet', filter=condition or None)
+        values = Competition.objects.filter(**{SUBJECT_FIELDS[board]: subject_id}).aggregate(**aggregates)
+        for index, key in enumerate(subject_keys):
+            bests[key] = values['best_{0}'.format(index)]
+    return bests
+
+
+def get_entries(keys):
+    """
+    Returns {key: entry} for the existing entries of keys, in one query.
+    """
+    subjects = Q(pk__in=[])
+    for board, subject_field in SUBJECT_FIELDS.items():
+        subject_ids = {key[1] for key in keys if key[0] == board}
+        if subject_ids:
+            subjects |= Q(board=board, **{subject_field + '__in': subject_ids})
+    entries = LeaderboardEntry.objects.filter(subjects, period__in={key[3] for key in keys}).order_by()
+    found = {}
+    for entry in entries:
+        key = (entry.board, getattr(entry, SUBJECT_FIELDS[entry.board]), entry.drone_category_id, entry.period)
+        if key in keys:
+            found[key] = entry
+    return found
+
+
+def refresh_entries(keys):
+    """
+    Recomputes the entries of keys from the competitions table and writes
+    the changes with one bulk create, update and delete each.
+    """
+    if not keys:
+        return
+    with transaction.atomic():
+        lock_subjects(keys)
+        bests = get_bests(keys)
+        entries = get_entries(keys)
+        created, updated, deleted = [], [], []
+        for key, best in bests.items():
+            entry = entries.get(key)
+            if best is None:
+                if entry is not None:
+                    deleted.append(entry.pk)
+            elif entry is None:
+                board, subject_id, drone_category_id, period = key
+                created.append(LeaderboardEntry(
+                    board=board,
+                    period=period,
+                    drone_category_id=drone_category_id,
+                    best_distance_in_feet=best,
+                    **{SUBJECT_FIELDS[board]: subject_id}
+                ))
+            elif entry.best_distance_in_feet != best:
+                entry.best_distance_in_feet = best
+                updated.append(entry)
+        if created:
+            LeaderboardEntry.objects.bulk_create(created)
+        if updated:
+            LeaderboardEntry.objects.bulk_update(updated, ['best_distance_in_feet'])
+        if deleted:
+            LeaderboardEntry.objects.filter(pk__in=deleted).delete()
+    if created or updated or deleted:
+        # bulk writes send no signals
+        bump_table_versions(LeaderboardEntry._meta.db_table)
+
+
+def refresh_for_competitions(competitions):
+    """
+    Brings the leaderboards up to date after competitions were written
+    without signals, e.g. by bulk_create().
+    """
+    keys = set()
+    for competition in competitions:
+        keys |= get_keys(
+            competition.pilot_id,
+            competition.drone_id,
+            competition.drone.drone_category_id,
+            competition.distance_achievement_date
+        )
+    refresh_entries(keys)
+
+
+def rebuild():
+    """
+    Rebuilds every leaderboard from the competitions table.
+    """
+    groupings = [
+        None,
+        (TruncYear('distance_achievement_date', tzinfo=datetime.timezone.utc), '{0:%Y}'),
+        (TruncMonth('distance_achievement_date', tzinfo=datetime.timezone.utc), '{0:%Y-%m}'),
+    ]
+    entries = []
+    for board, subject_field in SUBJECT_FIELDS.items():
+        for by_category in (False, True):
+            for grouping in groupings:
+                fields = {'subject': F(subject_field)}
+                if by_category:
+                    fields['category'] = F('drone__drone_category_id')
+                if grouping is not None:
+                    fields['bucket'] = grouping[0]
+                rows = Competition.objects.order_by().values(**fields).annotate(best=Max('distance_in_feet'))
+                scopes = defaultdict(list)
+                for row in rows.iterator():
+                    if grouping is None:
+                        period = LeaderboardEntry.ALL_TIME
+                    else:
+                        period = grouping[1].format(row['bucket'])
+                    scopes[(row.get('category'), period)].append((row['best'], row['subject']))
+                for (category_id, period), scope in scopes.items():
+                    for best, subject_id in scope:
+                        entries.append(LeaderboardEntry(
+                            board=board,
+                            period=period,
+                            drone_category_id=category_id,
+                            best_distance_in_feet=best,
+                            **{subject_field: subject_id}
+                        ))
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    bump_table_versions(LeaderboardEntry._meta.db_table)
+    return len(entries)
+
+
+def remember_competition(sender, instance, raw=False, **kwargs):
+    instance._leaderboard_keys = set()
+    if raw or instance.pk is None:
+        return
+    instance._leaderboard_keys = get_competition_keys(Competition.objects.filter(pk=instance.pk))
+
+
+def is_cascade(origin):
+    """
+    Whether a competition is deleted because its pilot or drone (or what
+    owns the drone) is; remove_subject_entries() covers those deletes.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not Competition
+
+
+def update_for_competition(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or is_cascade(origin):
+        return
+    keys = getattr(instance, '_leaderboard_keys', set())
+    drone_category_id = Drone.objects.filter(pk=instance.drone_id).values_list('drone_category_id', flat=True).first()
+    if drone_category_id is not None:
+        keys = keys | get_keys(instance.pilot_id, instance.drone_id, drone_category_id, instance.distance_achievement_date)
+    refresh_entries(keys)
+
+
+def remember_drone(sender, instance, raw=False, **kwargs):
+    instance._leaderboard_category_id = None
+    if raw or instance.pk is None:
+        return
+    instance._leaderboard_category_id = Drone.objects.filter(pk=instance.pk).values_list(
+        'drone_category_id', flat=True
+    ).first()
+
+
+def update_for_drone(sender, instance, created=False, raw=False, **kwargs):
+    old_category_id = getattr(instance, '_leaderboard_category_id', None)
+    if raw or created or old_category_id in (None, instance.drone_category_id):
+        return
+    # the drone changed category: its results move to the other category boards
+    competitions = Competition.objects.filter(drone_id=instance.pk)
+    keys = get_competition_keys(competitions)
+    for pilot_id, date in competitions.values_list('pilot_id', 'distance_achievement_date').iterator():
+        keys |= get_keys(pilot_id, instance.pk, old_category_id, date)
+    refresh_entries(keys)
+
+
+def remember_subject_entries(sender, instance, **kwargs):
+    """
+    Collects, before a pilot, drone or drone category is deleted, the other
+    entries its competitions count towards; its own entries go with the
+    cascade. refresh_subject_entries() refreshes them once, not for every
+    cascaded competition.
+    """
+    if sender is Pilot:
+        competitions = Competition.objects.filter(pilot=instance)
+    elif sender is Drone:
+        competitions = Competition.objects.filter(drone=instance)
+    else:
+        competitions = Competition.objects.filter(drone__drone_category=instance)
+    keys = get_competition_keys(competitions)
+    if sender is DroneCategory:
+        keys = {key for key in keys if key[2] != instance.pk}
+    else:
+        board = LeaderboardEntry.PILOT if sender is Pilot else LeaderboardEntry.DRONE
+        keys = {key for key in keys if key[:2] != (board, instance.pk)}
+    instance._leaderboard_keys = keys
+
+
+def refresh_subject_entries(sender, instance, **kwargs):
+    """
+    Refreshes the entries remember_subject_entries() collected, once the
+    pilot, drone or drone category and its competitions are deleted.
+    """
+    keys = getattr(instance, '_leaderboard_keys', None)
+    if keys:
+        refresh_entries(keys)
+
+
+def validate_period(period):
+    return bool(PERIOD_RE.match(period))
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives the ASGI application in-process with concurrent GET requests and '
+        'compares requests/s and latency of the sync views and their async/ twins.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once.')
+        parser.add_argument(
+            '--paths', default='/drone-categories/,/drones/,/competitions/',
+            help='Comma separated sync paths; each is also requested under /async.'
+        )
+        parser.add_argument(
+            '--bypass-cache', action='store_true',
+            help='Add a distinct query parameter to every request so that the response cache never hits.'
+        )
+
+    async def request(self, application, path, query, client):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode('ascii'),
+            'query_string': query.encode('ascii'),
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept', b'application/json')],
+            # a distinct client per request keeps the anonymous throttles out of the way
+            'client': (client, 50000),
+            'server': ('localhost', 80),
+        }
+        done = asyncio.Event()
+        status = []
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body' and not message.get('more_body', False):
+                done.set()
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        done.set()
+        return time.perf_counter() - started, status[0] if status else None
+
+    async def run(self, application, path, requests, concurrency, bypass_cache):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                query = '_={0}'.format(i) if bypass_cache else ''
+                client = '10.{0}.{1}.{2}'.format(i // 65536 % 256, i // 256 % 256, i % 256)
+                return await self.request(application, path, query, client)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(status != 200 for _, status in results)
+        return {
+            'rps': requests / elapsed,
+            'p50': latencies[len(latencies) // 2] * 1000,
+            'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            'errors': errors,
+        }
+
+    def handle(self, *args, **options):
+        application = get_asgi_application()
+        self.stdout.write('{0:<32}{1:>10}{2:>10}{3:>10}{4:>8}'.format('endpoint', 'req/s', 'p50 ms', 'p99 ms', 'non-200'))
+        for path in options['paths'].split(','):
+            for endpoint in (path, '/async' + path):
+                result = asyncio.run(self.run(
+                    application, endpoint, options['requests'], options['concurrency'], options['bypass_cache']
+                ))
+                self.stdout.write('{0:<32}{1:>10.0f}{2:>10.1f}{3:>10.1f}{4:>8}'.format(
+                    endpoint, result['rps'], result['p50'], result['p99'], result['errors']
+                ))
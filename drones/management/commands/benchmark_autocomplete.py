@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from drones import autocomplete, views
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the per-request time of the autocomplete endpoints with '
+        '?search= on the drone, pilot and category lists, for prefixes of '
+        'the existing names.'
+    )
+    # list view, autocomplete view
+    endpoints = (
+        (views.DroneList, views.DroneAutocomplete),
+        (views.PilotList, views.PilotAutocomplete),
+        (views.DroneCategoryList, views.DroneCategoryAutocomplete),
+    )
+    # no throttling, authentication or response cache in the timings
+    overrides = {'throttle_classes': (), 'authentication_classes': (), 'permission_classes': ()}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=200, help='Prefixes looked up per path.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def get_prefixes(self, model, count, rng):
+        names = list(model.objects.values_list('name', flat=True)[:1000])
+        if not names:
+            return []
+        prefixes = []
+        for _ in range(count):
+            name = rng.choice(names)
+            prefixes.append(name[:rng.randint(1, min(len(name), 8))])
+        return prefixes
+
+    def time_per_lookup(self, lookup, prefixes):
+        started = time.perf_counter()
+        for prefix in prefixes:
+            lookup(prefix)
+        return (time.perf_counter() - started) / len(prefixes)
+
+    def get_requester(self, view_class, **overrides):
+        view = view_class.as_view(**self.overrides, **overrides)
+        factory = APIRequestFactory()
+
+        def request(prefix):
+            response = view(factory.get('/', {'search': prefix}, HTTP_HOST='localhost'))
+            response.render()
+            assert response.status_code == 200, response.status_code
+        return request
+
+    def write(self, label, seconds):
+        self.stdout.write('  {0:<22}{1:>12,.1f} us'.format(label, seconds * 1e6))
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        for list_view, autocomplete_view in self.endpoints:
+            model = list_view.queryset.model
+            prefixes = self.get_prefixes(model, options['lookups'], rng)
+            if not prefixes:
+                self.stdout.write('{0}: no rows'.format(list_view.name))
+                continue
+            index = autocomplete.get_index(model)
+            index.lookup('', 1)
+            list_overrides = {'cache_responses': False} if hasattr(list_view, 'cache_responses') else {}
+            self.stdout.write('{0} ({1} names)'.format(list_view.name, len(index.entries)))
+            self.write('index lookup', self.time_per_lookup(lambda prefix: index.lookup(prefix, 10), prefixes))
+            self.write('autocomplete endpoint', self.time_per_lookup(self.get_requester(autocomplete_view), prefixes))
+            self.write('list ?search=', self.time_per_lookup(self.get_requester(list_view, **list_overrides), prefixes))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from drones import views
+from drones.fastread import get_row_encoder
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares rows/s of the drone and competition list serializers with '
+        'their values() row encoders over the existing rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows read per run.')
+        parser.add_argument('--runs', type=int, default=5, help='Runs per path; the best one is reported.')
+
+    def get_view(self, view_class):
+        view = view_class()
+        view.request = Request(APIRequestFactory().get('/', HTTP_HOST='localhost'))
+        view.format_kwarg = None
+        view.kwargs = {}
+        return view
+
+    def best(self, read, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            count = len(read())
+            timings.append(time.perf_counter() - started)
+        return count / min(timings) if count else 0
+
+    def handle(self, *args, **options):
+        rows, runs = options['rows'], options['runs']
+        for view_class in (views.DroneList, views.CompetitionList):
+            view = self.get_view(view_class)
+            queryset = view.get_queryset()[:rows]
+            encoder = get_row_encoder(view.get_serializer_class())
+            fast_queryset = view.get_fast_queryset(view.get_queryset(), encoder)[:rows]
+            serializer = self.best(lambda: view.get_serializer(queryset.all(), many=True).data, runs)
+            fast = self.best(lambda: view.encode_rows(fast_queryset.all(), encoder), runs)
+            self.stdout.write(view_class.name)
+            self.stdout.write('  {0:<12}{1:>12,.0f} rows/s'.format('serializer', serializer))
+            self.stdout.write('  {0:<12}{1:>12,.0f} rows/s'.format('encoder', fast))
@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import AnonRateThrottle
+
+from drones.customthrottling import FIXED, SLIDING, SharedAnonRateThrottle
+
+
+class Command(BaseCommand):
+    help = 'Compares the throughput of the cache-backed and the shared throttle classes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=5000, help='Throttle checks per run.')
+        parser.add_argument(
+            '--rates', default='100/hour,10000/hour,1000000/hour',
+            help='Comma separated rates; the history lists grow with the rate.'
+        )
+
+    def get_throttle(self, throttle_class, rate, window=None):
+        throttle = throttle_class()
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+        if window is not None:
+            throttle.window = window
+        return throttle
+
+    def run(self, throttle_class, rate, checks, window=None):
+        # a new client address per run, so runs start from empty counters
+        self.runs += 1
+        request = APIRequestFactory().get('/', REMOTE_ADDR='10.255.{0}.{1}'.format(self.runs // 256, self.runs % 256))
+        request.user = AnonymousUser()
+        throttle = self.get_throttle(throttle_class, rate, window)
+        started = time.perf_counter()
+        for _ in range(checks):
+            throttle.allow_request(request, None)
+        return checks / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        self.runs = 0
+        for rate in options['rates'].split(','):
+            results = [
+                ('AnonRateThrottle', self.run(AnonRateThrottle, rate, checks)),
+                ('SharedAnonRateThrottle (fixed)', self.run(SharedAnonRateThrottle, rate, checks, FIXED)),
+                ('SharedAnonRateThrottle (sliding)', self.run(SharedAnonRateThrottle, rate, checks, SLIDING)),
+            ]
+            self.stdout.write('{0}, {1} checks'.format(rate, checks))
+            for name, per_second in results:
+                self.stdout.write('  {0:<34}{1:>12,.0f} checks/s'.format(name, per_second))
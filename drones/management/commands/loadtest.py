@@ -0,0 +1,437 @@
+import base64
+import http.client
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from drones.models import Competition, Drone, DroneCategory, Pilot
+from toys.models import Toy
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+USERNAME = 'loadtest'
+PASSWORD = 'loadtestP4ssw0rD'
+# endpoint -> model whose pks the detail reads pick from
+ENDPOINTS = {
+    'drone-categories': DroneCategory,
+    'drones': Drone,
+    'pilots': Pilot,
+    'competitions': Competition,
+    'toys': Toy,
+}
+SERVER_TIMING_DB = re.compile(r'(?:^|,\s*)db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def percentile(latencies, p):
+    """
+    The nearest-rank percentile p of sorted latencies.
+    """
+    if not latencies:
+        return None
+    return latencies[max(math.ceil(len(latencies) * p / 100) - 1, 0)]
+
+
+def summarize(samples, elapsed):
+    """
+    Throughput, latency percentiles (ms), statuses and queries per request
+    of (latency, status, queries, db seconds) samples.
+    """
+    latencies = sorted(latency for latency, _, _, _ in samples)
+    statuses = {}
+    for _, status, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    timed = [(queries, db) for _, _, queries, db in samples if queries is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(status is None or status >= 400 for _, status, _, _ in samples),
+        'statuses': statuses,
+        'rps': len(samples) / elapsed if elapsed else None,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+        'p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+        'p95_ms': percentile(latencies, 95) * 1000 if latencies else None,
+        'p99_ms': percentile(latencies, 99) * 1000 if latencies else None,
+        'queries_per_request': sum(queries for queries, _ in timed) / len(timed) if timed else None,
+        'db_ms_per_request': sum(db for _, db in timed) / len(timed) if timed else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts the API with runserver (or targets --url) and drives a mix of list, '
+        'detail and create requests at drone-categories/, drones/, pilots/, competitions/ '
+        'and toys/ from concurrent clients. Reports requests/s, p50/p95/p99 latency, '
+        'queries per request and the peak RSS of the server, and writes them to a JSON '
+        'file. Run it with --settings=restful01.loadtest_settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of measured traffic.')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Seconds of traffic before measuring.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Clients sending requests at once.')
+        parser.add_argument(
+            '--endpoints', default=','.join(ENDPOINTS),
+            help='Comma separated endpoints, picked with equal weight.'
+        )
+        parser.add_argument('--write-ratio', type=float, default=0.1, help='Share of requests that create a row.')
+        parser.add_argument(
+            '--detail-ratio', type=float, default=0.5, help='Share of the reads that get one row instead of a page.'
+        )
+        parser.add_argument('--limit', type=int, default=4, help='?limit= of the list reads.')
+        parser.add_argument('--rows', type=int, default=1000, help='Rows of every model created if missing.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--url', help='Target an already running server (gunicorn, uvicorn) instead of starting runserver.'
+        )
+        parser.add_argument(
+            '--prepare', action='store_true',
+            help='With --url, migrate and fill the database of --settings first. It has to be the database '
+                 'the server uses; without --prepare it is only read.'
+        )
+        parser.add_argument(
+            '--keep-alive', action='store_true',
+            help='Reuse connections. runserver answers a reused connection about 40 ms late '
+                 '(Nagle and delayed ACKs), so only use it with --url.'
+        )
+        parser.add_argument('--server-log', help='File the output of the started server goes to.')
+        parser.add_argument('--output', default='loadtest-results.json', help='JSON file the results go to.')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare with.')
+
+    def prepare(self, rows):
+        """
+        Migrates the database, creates the load test user and its token and
+        fills every model up to rows rows.
+        """
+        call_command('migrate', verbosity=0, interactive=False)
+        user, created = User.objects.get_or_create(username=USERNAME)
+        if created:
+            user.set_password(PASSWORD)
+            user.save()
+        token, _ = Token.objects.get_or_create(user=user)
+        now = timezone.now()
+        self.fill(DroneCategory, rows, lambda i, rng: DroneCategory(name='Load category {0}'.format(i)))
+        category_ids = list(DroneCategory.objects.values_list('pk', flat=True)[:rows])
+        self.fill(Drone, rows, lambda i, rng: Drone(
+            name='Load drone {0}'.format(i),
+            onwer=user,
+            drone_category_id=rng.choice(category_ids),
+            manufacturing_date=now,
+            has_it_completed_missions=rng.random() < 0.5,
+        ))
+        self.fill(Pilot, rows, lambda i, rng: Pilot(
+            name='Load pilot {0}'.format(i), gender=rng.choice((Pilot.MALE, Pilot.FEMALE)), reces_count=rng.randint(0, 50)
+        ))
+        drone_ids = list(Drone.objects.values_list('pk', flat=True)[:rows])
+        pilot_ids = list(Pilot.objects.values_list('pk', flat=True)[:rows])
+        self.fill(Competition, rows, lambda i, rng: Competition(
+            pilot_id=rng.choice(pilot_ids),
+            drone_id=rng.choice(drone_ids),
+            distance_in_feet=rng.randint(100, 10000),
+            distance_achievement_date=now,
+        ))
+        self.fill(Toy, rows, lambda i, rng: Toy(
+            name='Load toy {0}'.format(i),
+            description='Toy number {0} of the load test'.format(i),
+            toy_category=rng.choice(('Action figures', 'Puzzles', 'Board games')),
+            release_date=now,
+        ))
+        return token.key
+
+    def get_token(self):
+        """
+        The key of the load test user's token, read from a database prepared
+        by an earlier run.
+        """
+        try:
+            key = Token.objects.filter(user__username=USERNAME).values_list('key', flat=True).first()
+        except DatabaseError:
+            key = None
+        if key is None:
+            raise CommandError(
+                'The database of --settings has no load test user. Run once with --prepare, '
+                'with --settings pointing at the database the server at --url uses.'
+            )
+        return key
+
+    def fill(self, model, rows, build):
+        count = model.objects.count()
+        if count >= rows:
+            return
+        rng = random.Random(count)
+        model.objects.bulk_create(
+            (build(i, rng) for i in range(count, rows)), batch_size=500, ignore_conflicts=True
+        )
+
+    def get_pools(self, endpoints, rows):
+        self.pks = {
+            endpoint: list(ENDPOINTS[endpoint].objects.order_by('?').values_list('pk', flat=True)[:rows])
+            for endpoint in endpoints
+        }
+        self.counts = {endpoint: ENDPOINTS[endpoint].objects.count() for endpoint in endpoints}
+        self.names = {
+            'drone-categories': list(DroneCategory.objects.values_list('name', flat=True)[:rows]),
+            'drones': list(Drone.objects.values_list('name', flat=True)[:rows]),
+            'pilots': list(Pilot.objects.values_list('name', flat=True)[:rows]),
+        }
+        for endpoint, pks in self.pks.items():
+            if not pks:
+                raise CommandError('{0} has no rows to read.'.format(endpoint))
+
+    def get_payload(self, endpoint, name, rng):
+        now = timezone.now().isoformat()
+        if endpoint == 'drone-categories':
+            return {'name': name}
+        if endpoint == 'drones':
+            return {
+                'name': name,
+                'drone_category': rng.choice(self.names['drone-categories']),
+                'manufacturing_date': now,
+                'has_it_completed_missions': False,
+            }
+        if endpoint == 'pilots':
+            return {'name': name, 'gender': Pilot.MALE, 'reces_count': rng.randint(0, 50)}
+        if endpoint == 'competitions':
+            return {
+                'pilot': rng.choice(self.names['pilots']),
+                'drone': rng.choice(self.names['drones']),
+                'distance_in_feet': rng.randint(100, 10000),
+                'distance_achievement_date': now,
+            }
+        return {
+            'name': name[:50],
+            'description': 'Created by the load test',
+            'toy_category': 'Load',
+            'release_date': now,
+        }
+
+    def get_headers(self, endpoint, method):
+        headers = {'Accept': 'application/json', 'Host': self.host}
+        if endpoint == 'pilots':
+            headers['Authorization'] = 'Token {0}'.format(self.token)
+        elif endpoint == 'drones' and method == 'POST':
+            headers['Authorization'] = 'Basic {0}'.format(self.basic)
+        if method == 'POST':
+            headers['Content-Type'] = 'application/json'
+        if not self.options['keep_alive']:
+            headers['Connection'] = 'close'
+        return headers
+
+    def choose(self, rng, name):
+        """
+        The next request: (endpoint, key, method, path, body).
+        """
+        endpoint = rng.choice(self.endpoints)
+        if rng.random() < self.options['write_ratio']:
+            body = json.dumps(self.get_payload(endpoint, name, rng))
+            return endpoint, 'POST {0}/'.format(endpoint), 'POST', '/{0}/'.format(endpoint), body
+        if rng.random() < self.options['detail_ratio']:
+            path = '/{0}/{1}/'.format(endpoint, rng.choice(self.pks[endpoint]))
+            return endpoint, 'GET {0}/<pk>/'.format(endpoint), 'GET', path, None
+        limit = self.options['limit']
+        offset = rng.randrange(max(self.counts[endpoint] - limit, 0) + 1)
+        path = '/{0}/?limit={1}&offset={2}'.format(endpoint, limit, offset)
+        return endpoint, 'GET {0}/'.format(endpoint), 'GET', path, None
+
+    def work(self, worker, started, samples):
+        rng = random.Random(self.options['seed'] * 1000 + worker)
+        warmup_until = started + self.options['warmup']
+        deadline = warmup_until + self.options['duration']
+        client = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            endpoint, key, method, path, body = self.choose(rng, 'Load {0} {1}-{2}'.format(self.run_id, worker, i))
+            headers = self.get_headers(endpoint, method)
+            sent = time.perf_counter()
+            try:
+                client.request(method, self.prefix + path, body=body, headers=headers)
+                response = client.getresponse()
+                response.read()
+                status = response.status
+                timing = SERVER_TIMING_DB.search(response.getheader('Server-Timing') or '')
+            except (http.client.HTTPException, OSError):
+                client.close()
+                status = timing = None
+            if not self.options['keep_alive'] or status is None:
+                client.close()
+                client = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            latency = time.perf_counter() - sent
+            if sent >= warmup_until:
+                queries = int(timing.group(2)) if timing else None
+                db = float(timing.group(1)) / 1000 if timing else None
+                samples.append((key, latency, status, queries, db))
+        client.close()
+
+    def run_traffic(self):
+        concurrency = self.options['concurrency']
+        samples = [[] for _ in range(concurrency)]
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self.work, args=(worker, started, samples[worker]))
+            for worker in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [sample for worker_samples in samples for sample in worker_samples]
+
+    def get_free_port(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    def start_server(self, port, log):
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '127.0.0.1:{0}'.format(port),
+            '--noreload', '--skip-checks',
+        ]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        server = subprocess.Popen(command, env=env, stdout=log, stderr=log)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('The server exited with status {0}; see --server-log.'.format(server.returncode))
+            try:
+                client = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                client.request('GET', '/', headers={'Host': '127.0.0.1', 'Accept': 'application/json'})
+                client.getresponse().read()
+                client.close()
+                return server
+            except OSError:
+                time.sleep(0.1)
+        server.kill()
+        raise CommandError('The server did not answer within 30 seconds.')
+
+    def stop_server(self, server):
+        """
+        Stops the server and returns its peak RSS in bytes.
+        """
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+        if resource is None:
+            return None
+        # the server is the only child process; ru_maxrss is in KiB, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def write_results(self, results):
+        self.stdout.write('{0:<30}{1:>9}{2:>9}{3:>9}{4:>9}{5:>9}{6:>8}'.format(
+            'request', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'errors'
+        ))
+        rows = sorted(results['requests'].items()) + [('total', results['total'])]
+        for key, summary in rows:
+            queries = summary['queries_per_request']
+            self.stdout.write('{0:<30}{1:>9.1f}{2:>9.1f}{3:>9.1f}{4:>9.1f}{5:>9}{6:>8}'.format(
+                key, summary['rps'], summary['p50_ms'], summary['p95_ms'], summary['p99_ms'],
+                '-' if queries is None else '{0:.1f}'.format(queries), summary['errors']
+            ))
+        peak_rss = results['server']['peak_rss_bytes']
+        if peak_rss is not None:
+            self.stdout.write('server peak RSS: {0:.1f} MiB'.format(peak_rss / 2 ** 20))
+
+    def write_comparison(self, results, path):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        self.stdout.write('compared with {0}:'.format(path))
+        self.stdout.write('{0:<30}{1:>12}{2:>12}'.format('request', 'req/s', 'p95'))
+        rows = sorted(results['requests'].items()) + [('total', results['total'])]
+        for key, summary in rows:
+            before = baseline['total'] if key == 'total' else baseline['requests'].get(key)
+            if not before or not before['rps'] or not before['p95_ms']:
+                continue
+            self.stdout.write('{0:<30}{1:>+11.1f}%{2:>+11.1f}%'.format(
+                key,
+                (summary['rps'] / before['rps'] - 1) * 100,
+                (summary['p95_ms'] / before['p95_ms'] - 1) * 100,
+            ))
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.endpoints = [endpoint.strip() for endpoint in options['endpoints'].split(',') if endpoint.strip()]
+        unknown = set(self.endpoints) - set(ENDPOINTS)
+        if unknown or not self.endpoints:
+            raise CommandError('Expected endpoints among {0}.'.format(', '.join(ENDPOINTS)))
+        if settings.DEBUG:
+            self.stderr.write('DEBUG is on and keeps every query in memory; use --settings=restful01.loadtest_settings.')
+        if options['url'] and not options['prepare']:
+            # the server may use another database than --settings: leave it alone
+            self.token = self.get_token()
+        else:
+            self.token = self.prepare(options['rows'])
+        self.basic = base64.b64encode('{0}:{1}'.format(USERNAME, PASSWORD).encode()).decode('ascii')
+        self.get_pools(self.endpoints, options['rows'])
+        self.run_id = uuid.uuid4().hex[:8]
+
+        server = None
+        if options['url']:
+            url = urlsplit(options['url'])
+            self.host, self.port, self.prefix = url.hostname, url.port or 80, url.path.rstrip('/')
+        else:
+            self.host, self.port, self.prefix = '127.0.0.1', self.get_free_port(), ''
+            log = open(options['server_log'], 'wb') if options['server_log'] else subprocess.DEVNULL
+            try:
+                server = self.start_server(self.port, log)
+            finally:
+                if options['server_log']:
+                    log.close()
+        try:
+            samples = self.run_traffic()
+        finally:
+            peak_rss = self.stop_server(server) if server else None
+
+        if not samples:
+            raise CommandError('No request finished within --duration.')
+        duration = options['duration']
+        by_key = {}
+        for key, *sample in samples:
+            by_key.setdefault(key, []).append(sample)
+        results = {
+            'started': timezone.now().isoformat(),
+            'options': {
+                name: options[name] for name in (
+                    'duration', 'warmup', 'concurrency', 'endpoints', 'write_ratio', 'detail_ratio', 'limit',
+                    'rows', 'seed', 'url',
+                )
+            },
+            'environment': {
+                'database': connection.vendor,
+                'settings': settings.SETTINGS_MODULE,
+                'server': options['url'] or 'runserver',
+                'django': django.get_version(),
+                'python': sys.version.split()[0],
+            },
+            'total': summarize([sample for _, *sample in samples], duration),
+            'requests': {key: summarize(key_samples, duration) for key, key_samples in by_key.items()},
+            'server': {'peak_rss_bytes': peak_rss},
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        self.write_results(results)
+        self.stdout.write('results written to {0}'.format(options['output']))
+        if options['compare']:
+            self.write_comparison(results, options['compare'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from drones import leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the pilot and drone leaderboards from the competitions table.'
+
+    def handle(self, *args, **options):
+        count = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt {0} leaderboard entries.'.format(count)))
@@ -0,0 +1,174 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from drones import leaderboard, seeding
+from drones.models import Competition, Drone, DroneCategory, Pilot
+
+CATEGORY_KINDS = ('Quadcopter', 'Hexacopter', 'Octocopter', 'Fixed wing', 'Hybrid VTOL', 'Racing', 'Cinewhoop')
+
+
+def build_categories(context, start, stop):
+    rng = seeding.get_rng(context['seed'], 'categories', start)
+    return [
+        DroneCategory(name='{0} {1}'.format(rng.choice(CATEGORY_KINDS), context['offset'] + i))
+        for i in range(start, stop)
+    ]
+
+
+def build_drones(context, start, stop):
+    rng = seeding.get_rng(context['seed'], 'drones', start)
+    category_ids = context['category_ids']
+    return [
+        Drone(
+            name='{0} {1} {2}'.format(rng.choice(seeding.ADJECTIVES), rng.choice(seeding.NOUNS), context['offset'] + i),
+            onwer_id=rng.choice(context['owner_ids']),
+            # a few categories hold most drones
+            drone_category_id=category_ids[seeding.skewed_index(rng, len(category_ids), 2.0)],
+            manufacturing_date=seeding.random_datetime(rng, context['manufactured_from'], context['end']),
+            has_it_completed_missions=rng.random() < 0.4,
+        )
+        for i in range(start, stop)
+    ]
+
+
+def build_pilots(context, start, stop):
+    rng = seeding.get_rng(context['seed'], 'pilots', start)
+    return [
+        Pilot(
+            name='{0} {1} {2}'.format(rng.choice(seeding.FIRST_NAMES), rng.choice(seeding.LAST_NAMES), context['offset'] + i),
+            gender=rng.choice((Pilot.MALE, Pilot.FEMALE)),
+            reces_count=int(rng.expovariate(1 / 20)),
+        )
+        for i in range(start, stop)
+    ]
+
+
+def build_competitions(context, start, stop):
+    rng = seeding.get_rng(context['seed'], 'competitions', start)
+    pilot_ids = context['pilot_ids']
+    drone_ids = context['drone_ids']
+    competitions = []
+    for _ in range(start, stop):
+        pilot = seeding.skewed_index(rng, len(pilot_ids), context['skew'])
+        if rng.random() < 0.8:
+            # most flights are on one of the pilot's three own drones
+            drone = (pilot * 7919 + rng.randrange(3)) % len(drone_ids)
+        else:
+            drone = rng.randrange(len(drone_ids))
+        competitions.append(Competition(
+            pilot_id=pilot_ids[pilot],
+            drone_id=drone_ids[drone],
+            distance_in_feet=min(int(rng.lognormvariate(7, 0.6)), 100000),
+            distance_achievement_date=seeding.random_datetime(rng, context['start'], context['end']),
+        ))
+    return competitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds a synthetic dataset of drone categories, drones, pilots and competitions, '
+        'generated deterministically from --seed. A few pilots (see --skew) have most of '
+        'the competitions. Rows are bulk_create()d in batches; --workers builds the '
+        'batches in parallel processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--drones', type=int, default=200000)
+        parser.add_argument('--pilots', type=int, default=100000)
+        parser.add_argument('--competitions', type=int, default=2000000)
+        parser.add_argument('--owners', type=int, default=100, help='Users owning the drones.')
+        parser.add_argument(
+            '--skew', type=float, default=3.0,
+            help='Competitions per pilot skew: 1 is uniform, at 3 the top 1%% of the pilots have a fifth of them.'
+        )
+        parser.add_argument('--start', default='2022-01-01', help='First competition date.')
+        parser.add_argument('--end', default='2026-01-01', help='Competitions happen before this date.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes building the batches.')
+        parser.add_argument(
+            '--rebuild-leaderboards', action='store_true',
+            help='Rebuild the leaderboards afterwards (minutes and gigabytes for millions of competitions).'
+        )
+
+    def get_owner_ids(self, count):
+        usernames = ['seed{0}'.format(i) for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        # one hash for everybody; seeded users are not meant to log in
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=username, password=password) for username in usernames if username not in existing]
+        )
+        return list(User.objects.filter(username__in=usernames).order_by('pk').values_list('pk', flat=True))
+
+    def get_ids(self, model, seed):
+        """
+        Every pk of model, shuffled so that the pilots and drones the skew
+        favours are spread over the table.
+        """
+        ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        random.Random('{0}:{1}'.format(seed, model._meta.model_name)).shuffle(ids)
+        return ids
+
+    def handle(self, *args, **options):
+        try:
+            start, end = seeding.parse_date(options['start']), seeding.parse_date(options['end'])
+        except ValueError:
+            raise CommandError('--start and --end must be dates such as 2022-01-01.')
+        if start >= end:
+            raise CommandError('--start must be before --end.')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive.')
+        seed = options['seed']
+        batch = {
+            'batch_size': options['batch_size'],
+            'workers': options['workers'],
+            'stdout': self.stdout,
+            'verbosity': options['verbosity'],
+        }
+        context = {'seed': seed, 'start': start, 'end': end, 'skew': options['skew']}
+        # names carry a number after the rows already there, to stay unique
+        with seeding.BulkLoad(DroneCategory, Drone, Pilot, Competition):
+            seeding.insert(
+                DroneCategory, build_categories, {**context, 'offset': DroneCategory.objects.count()},
+                options['categories'], label='categories', ignore_conflicts=True, **batch
+            )
+            if options['drones']:
+                context['owner_ids'] = self.get_owner_ids(options['owners'])
+                context['category_ids'] = self.get_ids(DroneCategory, seed)
+                if not context['owner_ids'] or not context['category_ids']:
+                    raise CommandError('Drones need at least one owner and one category.')
+                context['manufactured_from'] = start.replace(year=start.year - 2)
+                seeding.insert(
+                    Drone, build_drones, {**context, 'offset': Drone.objects.count()},
+                    options['drones'], label='drones', ignore_conflicts=True, **batch
+                )
+            seeding.insert(
+                Pilot, build_pilots, {**context, 'offset': Pilot.objects.count()},
+                options['pilots'], label='pilots', ignore_conflicts=True, **batch
+            )
+            if options['competitions']:
+                context = {
+                    'seed': seed, 'start': start, 'end': end, 'skew': options['skew'],
+                    'pilot_ids': self.get_ids(Pilot, seed),
+                    'drone_ids': self.get_ids(Drone, seed),
+                }
+                if not context['pilot_ids'] or not context['drone_ids']:
+                    raise CommandError('Competitions need at least one pilot and one drone.')
+                seeding.insert(
+                    Competition, build_competitions, context, options['competitions'], label='competitions', **batch
+                )
+        if options['rebuild_leaderboards']:
+            started = time.perf_counter()
+            count = leaderboard.rebuild()
+            self.stdout.write('Rebuilt {0:,} leaderboard entries in {1:.1f} s.'.format(
+                count, time.perf_counter() - started
+            ))
+        elif options['competitions']:
+            self.stdout.write('The leaderboards are out of date; run rebuild_leaderboards.')
+        self.stdout.write(self.style.SUCCESS('Seeded with --seed {0}.'.format(seed)))
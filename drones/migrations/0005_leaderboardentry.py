@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-17 11:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0004_updated_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('pilot', 'Pilot'), ('drone', 'Drone')], max_length=5)),
+                ('period', models.CharField(default='all', max_length=7)),
+                ('best_distance_in_feet', models.IntegerField()),
+                ('rank', models.PositiveIntegerField()),
+                ('drone', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='drones.drone')),
+                ('drone_category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='drones.dronecategory')),
+                ('pilot', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='drones.pilot')),
+            ],
+            options={
+                'ordering': ['-best_distance_in_feet', 'pk'],
+                'indexes': [models.Index(fields=['board', 'period', 'drone_category', 'best_distance_in_feet'], name='leaderboard_scope_best_idx')],
+            },
+        ),
+    ]
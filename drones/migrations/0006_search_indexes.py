@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# A frozen copy of the index DDL in drones/search.py, so that later changes
+# there do not change what this migration does.
+# table -> text columns in the full-text index
+SEARCH_INDEXES = {
+    'drones_drone': ('name',),
+    'drones_pilot': ('name',),
+}
+
+
+def get_sqlite_sql(table, columns):
+    fts = '"{0}_fts"'.format(table)
+    names = ', '.join('"{0}"'.format(column) for column in columns)
+    new = ', '.join('new."{0}"'.format(column) for column in columns)
+    old = ', '.join('old."{0}"'.format(column) for column in columns)
+    delete = "INSERT INTO {0}({0}, rowid, {1}) VALUES ('delete', old.\"id\", {2});".format(fts, names, old)
+    insert = 'INSERT INTO {0}(rowid, {1}) VALUES (new."id", {2});'.format(fts, names, new)
+    return [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {0} USING fts5({1}, content=\"{2}\", content_rowid=\"id\", "
+        "tokenize='porter unicode61 remove_diacritics 2')".format(fts, names, table),
+        'CREATE TRIGGER IF NOT EXISTS "{0}_fts_ai" AFTER INSERT ON "{0}" BEGIN {1} END'.format(table, insert),
+        'CREATE TRIGGER IF NOT EXISTS "{0}_fts_ad" AFTER DELETE ON "{0}" BEGIN {1} END'.format(table, delete),
+        'CREATE TRIGGER IF NOT EXISTS "{0}_fts_au" AFTER UPDATE ON "{0}" BEGIN {1} {2} END'.format(
+            table, delete, insert
+        ),
+        "INSERT INTO {0}({0}) VALUES ('rebuild')".format(fts),
+    ]
+
+
+def get_postgresql_sql(table, columns):
+    document = " || ' ' || ".join("coalesce(\"{0}\", '')".format(column) for column in columns)
+    return [
+        'CREATE INDEX IF NOT EXISTS "{0}_search_idx" ON "{0}" USING gin ((to_tsvector(\'english\', {1})))'.format(
+            table, document
+        ),
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, columns in SEARCH_INDEXES.items():
+        if vendor == 'sqlite':
+            statements = get_sqlite_sql(table, columns)
+        elif vendor == 'postgresql':
+            statements = get_postgresql_sql(table, columns)
+        else:
+            statements = []
+        for sql in statements:
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_INDEXES:
+        if vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute('DROP TRIGGER IF EXISTS "{0}_fts_{1}"'.format(table, suffix))
+            schema_editor.execute('DROP TABLE IF EXISTS "{0}_fts"'.format(table))
+        elif vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX IF EXISTS "{0}_search_idx"'.format(table))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0005_leaderboardentry'),
+    ]
+
+    operations = [
+        # FTS5 tables and triggers on SQLite, GIN indexes on PostgreSQL
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.2 on 2026-10-17 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0006_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='competition',
+            name='drone',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='drones.drone'),
+        ),
+        migrations.AlterField(
+            model_name='competition',
+            name='pilot',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='competitions', to='drones.pilot'),
+        ),
+        migrations.AlterField(
+            model_name='drone',
+            name='drone_category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='drones', to='drones.dronecategory'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['distance_in_feet', 'id'], name='competition_distance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['distance_achievement_date', 'id'], name='competition_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['pilot', 'distance_in_feet', 'id'], name='competition_pilot_dist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['drone', 'distance_in_feet', 'id'], name='competition_drone_dist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['manufacturing_date', 'id'], name='drone_manufacturing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(fields=['drone_category', 'name', 'id'], name='drone_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('has_it_completed_missions', True)), fields=['name', 'id'], name='drone_completed_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('has_it_completed_missions', False)), fields=['name', 'id'], name='drone_pending_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('has_it_completed_missions', True)), fields=['manufacturing_date', 'id'], name='drone_completed_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drone',
+            index=models.Index(condition=models.Q(('has_it_completed_missions', False)), fields=['manufacturing_date', 'id'], name='drone_pending_date_idx'),
+        ),
+    ]
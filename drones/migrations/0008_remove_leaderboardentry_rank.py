@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-17 13:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drones', '0007_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='leaderboardentry',
+            name='rank',
+        ),
+    ]
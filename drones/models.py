@@ -3,6 +3,7 @@ from django.db import models
 # Create your models here.
 class DroneCategory(models.Model):
     name = models.CharField(max_length=250, unique=True)
+    updated_timestamp = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -22,15 +23,46 @@ class Drone(models.Model):
     drone_category = models.ForeignKey(
         DroneCategory, 
         related_name='drones',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        # drone_category_name_idx leads with it
+        db_index=False
         )
     manufacturing_date = models.DateTimeField()
     has_it_completed_missions = models.BooleanField(default=False)
     inserted_timestamp = models.DateTimeField(auto_now_add=True)
+    updated_timestamp = models.DateTimeField(auto_now=True)
     
     
     class Meta:
         ordering = ['name']
+        # the filters and orderings of drones/, each ending with the pk
+        # tiebreak that keyset pagination adds to the ordering. A boolean
+        # filter is rendered as WHERE has_it_completed_missions (or NOT ...),
+        # which SQLite only answers from partial indexes on that condition.
+        indexes = [
+            models.Index(fields=['manufacturing_date', 'id'], name='drone_manufacturing_idx'),
+            models.Index(fields=['drone_category', 'name', 'id'], name='drone_category_name_idx'),
+            models.Index(
+                fields=['name', 'id'],
+                condition=models.Q(has_it_completed_missions=True),
+                name='drone_completed_name_idx'
+            ),
+            models.Index(
+                fields=['name', 'id'],
+                condition=models.Q(has_it_completed_missions=False),
+                name='drone_pending_name_idx'
+            ),
+            models.Index(
+                fields=['manufacturing_date', 'id'],
+                condition=models.Q(has_it_completed_missions=True),
+                name='drone_completed_date_idx'
+            ),
+            models.Index(
+                fields=['manufacturing_date', 'id'],
+                condition=models.Q(has_it_completed_missions=False),
+                name='drone_pending_date_idx'
+            ),
+        ]
         
     def __str__(self):
         return self.name
@@ -48,6 +80,7 @@ class Pilot(models.Model):
     gender = models.CharField(max_length=2, choices=GENDER_CHOICES, default=MALE)
     reces_count = models.IntegerField()
     inserted_timestamp = models.DateTimeField(auto_now_add=True)
+    updated_timestamp = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -57,19 +90,75 @@ class Pilot(models.Model):
     
 
 class Competition(models.Model):
+    # the pilot and drone indexes below lead with them
     pilot = models.ForeignKey(
         Pilot,
         related_name='competitions',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     
     drone = models.ForeignKey(
         Drone,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     
     distance_in_feet = models.IntegerField()
     distance_achievement_date = models.DateTimeField()
+    updated_timestamp = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-distance_in_feet']
+        # -distance_in_feet (the default) and distance_achievement_date
+        # orderings and ranges, alone or within a pilot or drone (the
+        # pilot_name/drone_name filters and a pilot's competitions); read
+        # backwards for descending orderings
+        indexes = [
+            models.Index(fields=['distance_in_feet', 'id'], name='competition_distance_idx'),
+            models.Index(fields=['distance_achievement_date', 'id'], name='competition_date_idx'),
+            models.Index(fields=['pilot', 'distance_in_feet', 'id'], name='competition_pilot_dist_idx'),
+            models.Index(fields=['drone', 'distance_in_feet', 'id'], name='competition_drone_dist_idx'),
+        ]
+
+class LeaderboardEntry(models.Model):
+    PILOT = 'pilot'
+    DRONE = 'drone'
+    BOARD_CHOICES = [
+        (PILOT, 'Pilot'),
+        (DRONE, 'Drone')
+    ]
+    ALL_TIME = 'all'
+    
+    # one entry per pilot or drone, per board scope: all time, a year
+    # ('2025') or a month ('2025-06'), overall or within a drone category
+    board = models.CharField(max_length=5, choices=BOARD_CHOICES)
+    period = models.CharField(max_length=7, default=ALL_TIME)
+    drone_category = models.ForeignKey(
+        DroneCategory,
+        null=True,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    pilot = models.ForeignKey(
+        Pilot,
+        null=True,
+        related_name='leaderboard_entries',
+        on_delete=models.CASCADE
+    )
+    drone = models.ForeignKey(
+        Drone,
+        null=True,
+        related_name='leaderboard_entries',
+        on_delete=models.CASCADE
+    )
+    best_distance_in_feet = models.IntegerField()
     
     class Meta:
-        ordering = ['-distance_in_feet']
\ No newline at end of file
+        ordering = ['-best_distance_in_feet', 'pk']
+        indexes = [
+            models.Index(
+                fields=['board', 'period', 'drone_category', 'best_distance_in_feet'],
+                name='leaderboard_scope_best_idx'
+            ),
+        ]
@@ -0,0 +1,65 @@
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+
+from .apisettings import get_setting
+
+
+def get_window_attr(name):
+    """
+    The attribute the query planner prefetches the first items of the
+    related collection name into.
+    """
+    return '_first_{0}'.format(name)
+
+
+def get_first(related, limit):
+    """
+    The first limit objects of a related manager, queryset or list. A
+    prefetched manager is sliced in memory, any other one with LIMIT.
+    """
+    if isinstance(related, models.Manager):
+        related = related.all()
+    return related[:limit]
+
+
+class BoundedFieldMixin:
+    """
+    Renders at most limit related objects (NESTED_COLLECTION_LIMIT when not
+    given). The query planner prefetches only that many per parent, into
+    the window attribute; sliced prefetches need their own attribute.
+    """
+
+    def __init__(self, *args, limit=None, **kwargs):
+        self._limit = limit
+        super().__init__(*args, **kwargs)
+
+    @property
+    def limit(self):
+        if self._limit is None:
+            return get_setting('NESTED_COLLECTION_LIMIT')
+        return self._limit
+
+    def get_window(self, instance):
+        if len(self.source_attrs) != 1:
+            return None
+        return getattr(instance, get_window_attr(self.source_attrs[0]), None)
+
+
+class BoundedListSerializer(BoundedFieldMixin, serializers.ListSerializer):
+    def get_attribute(self, instance):
+        window = self.get_window(instance)
+        if window is not None:
+            return window
+        return super().get_attribute(instance)
+
+    def to_representation(self, data):
+        return super().to_representation(get_first(data, self.limit))
+
+
+class BoundedManyRelatedField(BoundedFieldMixin, ManyRelatedField):
+    def get_attribute(self, instance):
+        window = self.get_window(instance)
+        if window is not None:
+            return window
+        return get_first(super().get_attribute(instance), self.limit)
@@ -0,0 +1,78 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from .apisettings import get_setting
+from .tableversions import get_queryset_tables, get_table_versions
+
+EXACT = 'exact'
+CACHED = 'cached'
+ESTIMATED = 'estimated'
+
+
+def exact_count(queryset):
+    return EXACT, queryset.count()
+
+
+def cached_count(queryset):
+    """
+    Exact count cached under the SQL of the filtered queryset and the
+    versions of every table it reads, so any write to them invalidates it.
+    """
+    query = queryset.order_by().query
+    sql, params = query.sql_with_params()
+    digest = hashlib.md5('{0}|{1!r}'.format(sql, params).encode('utf-8')).hexdigest()
+    versions = get_table_versions(get_queryset_tables(queryset))
+    key = 'pagecount:{0}:{1}'.format(
+        digest,
+        ':'.join(str(versions[table]) for table in sorted(versions))
+    )
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, get_setting('PAGINATION_COUNT_CACHE_TIMEOUT'))
+    return CACHED, count
+
+
+def estimated_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        # SQLite keeps no usable row estimates, the cached count is the cheap path there
+        return cached_count(queryset)
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < get_setting('PAGINATION_COUNT_ESTIMATE_THRESHOLD'):
+        return exact_count(queryset)
+    return ESTIMATED, estimate
+
+
+COUNT_STRATEGIES = {
+    EXACT: exact_count,
+    CACHED: cached_count,
+    ESTIMATED: estimated_count,
+}
+
+
+def get_count_strategy(view=None):
+    mode = getattr(view, 'pagination_count_mode', None) or get_setting('PAGINATION_COUNT_MODE')
+    try:
+        return COUNT_STRATEGIES[mode]
+    except KeyError:
+        raise ImproperlyConfigured(
+            'Unknown pagination count mode {0!r}, expected one of {1}.'.format(mode, sorted(COUNT_STRATEGIES))
+        )
+
+
+async def acount(count_strategy, queryset):
+    """
+    Runs count_strategy from async code, exact counts through the async ORM.
+    """
+    if count_strategy is exact_count:
+        return EXACT, await queryset.acount()
+    return await sync_to_async(count_strategy)(queryset)
@@ -0,0 +1,278 @@
+import bisect
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from rest_framework.renderers import BaseRenderer
+
+from .apisettings import get_setting
+
+SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# histogram name, RequestTimings attribute, buckets, help
+HISTOGRAMS = (
+    ('api_request_duration_seconds', 'total', SECONDS, 'Time spent in the middleware stack and the view.'),
+    ('api_db_duration_seconds', 'db', SECONDS, 'Time spent running SQL queries.'),
+    ('api_db_queries', 'queries', QUERIES, 'SQL queries run per request.'),
+    ('api_auth_duration_seconds', 'auth', SECONDS, 'Time spent authenticating and checking permissions.'),
+    ('api_throttle_duration_seconds', 'throttle', SECONDS, 'Time spent checking throttles.'),
+    ('api_serialize_duration_seconds', 'serialize', SECONDS, 'Time spent in the view handler outside SQL.'),
+    ('api_render_duration_seconds', 'render', SECONDS, 'Time spent rendering the response body.'),
+    ('api_response_size_bytes', 'size', BYTES, 'Size of the response body.'),
+)
+# Server-Timing metric, RequestTimings attribute
+SERVER_TIMINGS = (
+    ('db', 'db'),
+    ('auth', 'auth'),
+    ('throttle', 'throttle'),
+    ('serialize', 'serialize'),
+    ('render', 'render'),
+    ('total', 'total'),
+)
+
+_stats_lock = threading.Lock()
+# (histogram name, endpoint, method) -> [per bucket counts + overflow, sum, count]
+_histograms = {}
+# (endpoint, method, status) -> requests
+_requests = {}
+
+
+class RequestTimings:
+    """
+    The phases of one request, in seconds. Phases that did not run stay
+    None; db overlaps every other phase.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.db = 0.0
+        self.queries = 0
+        self.auth = None
+        self.throttle = None
+        self.serialize = None
+        self.render = None
+        self.size = None
+        self.handler_started = None
+
+    def add(self, phase, seconds):
+        setattr(self, phase, (getattr(self, phase) or 0.0) + seconds)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper hook: times every query of the request
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def get_server_timing(self):
+        metrics = []
+        for name, attr in SERVER_TIMINGS:
+            value = getattr(self, attr)
+            if value is None:
+                continue
+            metric = '{0};dur={1:.2f}'.format(name, value * 1000)
+            if name == 'db':
+                metric += ';desc="{0} queries"'.format(self.queries)
+            metrics.append(metric)
+        return ', '.join(metrics)
+
+
+def get_timings(request):
+    return getattr(request, '_timings', None)
+
+
+def record(endpoint, method, status, timings):
+    with _stats_lock:
+        key = (endpoint, method, status)
+        _requests[key] = _requests.get(key, 0) + 1
+        for name, attr, buckets, _ in HISTOGRAMS:
+            value = getattr(timings, attr)
+            if value is None:
+                continue
+            histogram = _histograms.get((name, endpoint, method))
+            if histogram is None:
+                histogram = _histograms[(name, endpoint, method)] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+
+def reset_stats():
+    with _stats_lock:
+        _histograms.clear()
+        _requests.clear()
+
+
+def format_labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join('{0}="{1}"'.format(name, value) for name, value in escaped) + '}'
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def get_metrics():
+    """
+    Every histogram and request counter of this process in the Prometheus
+    text exposition format.
+    """
+    with _stats_lock:
+        histograms = {key: (list(counts), total, count) for key, (counts, total, count) in _histograms.items()}
+        requests = dict(_requests)
+    lines = [
+        '# HELP api_requests_total Requests answered, by endpoint, method and status.',
+        '# TYPE api_requests_total counter',
+    ]
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append('api_requests_total{0} {1}'.format(format_labels(endpoint=endpoint, method=method, status=status), count))
+    for name, _, buckets, help_text in HISTOGRAMS:
+        lines.append('# HELP {0} {1}'.format(name, help_text))
+        lines.append('# TYPE {0} histogram'.format(name))
+        for (histogram, endpoint, method), (counts, total, count) in sorted(histograms.items()):
+            if histogram != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = format_labels(endpoint=endpoint, method=method, le=format_number(bound))
+                lines.append('{0}_bucket{1} {2}'.format(name, labels, cumulative))
+            labels = format_labels(endpoint=endpoint, method=method)
+            lines.append('{0}_sum{1} {2}'.format(name, labels, format_number(total)))
+            lines.append('{0}_count{1} {2}'.format(name, labels, count))
+    return '\n'.join(lines) + '\n'
+
+
+class PerformanceMiddleware:
+    """
+    Times every request: SQL queries through an execute wrapper, the
+    phases PerformanceMixin marks in DRF views, the total and the size of
+    the response. Adds a Server-Timing header (unless SERVER_TIMING is
+    False) and records the request in the per-endpoint histograms served
+    by metrics/. Async requests are timed without their SQL, which runs in
+    other threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = request._timings = RequestTimings()
+        # connection.execute_wrapper() without a context manager per alias
+        wrapped = [connections[alias] for alias in connections]
+        for connection in wrapped:
+            connection.execute_wrappers.append(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            for connection in wrapped:
+                connection.execute_wrappers.remove(timings)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = request._timings = RequestTimings()
+        timings.db = timings.queries = None
+        response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        timings.total = time.perf_counter() - timings.started
+        if not response.streaming:
+            timings.size = len(response.content)
+        if get_setting('SERVER_TIMING'):
+            response['Server-Timing'] = timings.get_server_timing()
+        match = request.resolver_match
+        record(match.view_name if match else 'unmatched', request.method, response.status_code, timings)
+        return response
+
+
+class TimedRenderer:
+    """
+    Proxy of a renderer adding the time of render() to the request's
+    render phase.
+    """
+
+    def __init__(self, renderer, timings):
+        self.renderer = renderer
+        self.timings = timings
+
+    def __getattr__(self, name):
+        return getattr(self.renderer, name)
+
+    def render(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.renderer.render(*args, **kwargs)
+        finally:
+            self.timings.add('render', time.perf_counter() - started)
+
+
+class PerformanceMixin:
+    """
+    Marks the auth (authentication and permissions), throttle, serialize
+    (the handler's time outside SQL) and render phases of a DRF view for
+    PerformanceMiddleware.
+    """
+
+    def timed(self, request, phase, check, *args):
+        timings = get_timings(request)
+        if timings is None:
+            return check(*args)
+        started = time.perf_counter()
+        try:
+            return check(*args)
+        finally:
+            timings.add(phase, time.perf_counter() - started)
+
+    def perform_authentication(self, request):
+        self.timed(request, 'auth', super().perform_authentication, request)
+
+    def check_permissions(self, request):
+        self.timed(request, 'auth', super().check_permissions, request)
+
+    def check_throttles(self, request):
+        self.timed(request, 'throttle', super().check_throttles, request)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        timings = get_timings(request)
+        if timings is not None:
+            timings.handler_started = (time.perf_counter(), timings.db)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        timings = get_timings(request)
+        if timings is not None and timings.handler_started is not None:
+            started, db = timings.handler_started
+            timings.serialize = max(time.perf_counter() - started - (timings.db - db), 0.0)
+            timings.handler_started = None
+        response = super().finalize_response(request, response, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if timings is not None and renderer is not None and not isinstance(renderer, TimedRenderer):
+            response.accepted_renderer = TimedRenderer(renderer, timings)
+        return response
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        return str(data).encode(self.charset)
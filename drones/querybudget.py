@@ -0,0 +1,84 @@
+import re
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+PLACEHOLDERS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    The shape of a statement: literals replaced by ?, IN lists collapsed to
+    a single ? and whitespace squeezed, so the queries an N+1 runs for every
+    row of a page have the same shape.
+    """
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = PLACEHOLDERS.sub('(?)', sql)
+    return SPACE.sub(' ', sql).strip()
+
+
+class QueryShapes(CaptureQueriesContext):
+    """
+    CaptureQueriesContext counting the captured queries by shape.
+    """
+
+    @property
+    def shapes(self):
+        return Counter(normalize_sql(query['sql']) for query in self.captured_queries)
+
+
+def find_growing_shapes(runs):
+    """
+    The shapes run more than once whose count grows with the fixture size,
+    from a list of (size, shapes Counter) in growing size, as shape ->
+    counts per size. A query per row of a page is an N+1.
+    """
+    growing = {}
+    for shape in set().union(*(shapes for _, shapes in runs)):
+        counts = [shapes[shape] for _, shapes in runs]
+        if counts[-1] > 1 and counts[-1] > counts[0]:
+            growing[shape] = counts
+    return growing
+
+
+def get_query_budget(view_class):
+    return getattr(view_class, 'query_budget', None)
+
+
+class QueryBudgetMixin:
+    """
+    For API test cases: requests an endpoint once per fixture size and
+    fails if a request runs more queries than the budget or repeats a
+    statement more often as the fixtures grow. Caches are cleared before
+    every request, so the budget covers a cold request.
+    """
+
+    def reset_query_caches(self):
+        cache.clear()
+
+    def check_query_budget(self, budget, urls, using=connection):
+        """
+        urls is a list of (fixture size, url) in growing size.
+        """
+        runs = []
+        problems = []
+        for size, url in urls:
+            self.reset_query_caches()
+            with QueryShapes(using) as context:
+                response = self.client.get(url, format='json')
+            assert response.status_code < 400, (url, response.status_code)
+            if len(context) > budget:
+                problems.append('{0} ran {1} queries, the budget is {2}'.format(url, len(context), budget))
+            runs.append((size, context.shapes))
+        sizes = '/'.join(str(size) for size, _ in urls)
+        for shape, counts in sorted(find_growing_shapes(runs).items()):
+            problems.append('N+1: {0} runs {1} times at sizes {2}: {3}'.format(
+                urls[-1][1], '/'.join(str(count) for count in counts), sizes, shape
+            ))
+        assert not problems, '\n'.join(problems)
@@ -0,0 +1,227 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.relations import (
+    HyperlinkedRelatedField, ManyRelatedField, RelatedField, SlugRelatedField,
+)
+
+from .custompagination import add_pk_tiebreak
+from .fieldsets import get_fieldset_serializer
+from .nested import get_window_attr
+
+# plans of sparse fieldsets are only kept while there are fewer than this
+MAX_PLANS = 1000
+
+
+class QueryPlan:
+    """
+    The select_related/prefetch_related/only() calls needed to render a
+    serializer without any per-row queries.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select_related = set()
+        self.prefetch_related = {}
+        self.columns = {model._meta.pk.name}
+        self.restrict_columns = True
+        self.models = {model}
+
+    def select(self, path):
+        self.select_related.add(path)
+        self.columns.add(path)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(
+                *(self.prefetch_related[lookup] for lookup in sorted(self.prefetch_related))
+            )
+        if self.restrict_columns:
+            queryset = queryset.only(*sorted(self.columns))
+        return queryset
+
+
+_plans = {}
+
+
+def get_query_plan(serializer, model, cache_key=None):
+    if isinstance(serializer, type):
+        serializer_class, serializer = serializer, None
+    else:
+        serializer_class = type(serializer)
+    key = (serializer_class, model, cache_key)
+    plan = _plans.get(key)
+    if plan is None:
+        if serializer is None:
+            serializer = serializer_class()
+        plan = QueryPlan(model)
+        _plan_serializer(serializer, model, plan)
+        if cache_key is None or len(_plans) < MAX_PLANS:
+            _plans[key] = plan
+    return plan
+
+
+def plan_queryset(queryset, serializer, cache_key=None):
+    return get_query_plan(serializer, queryset.model, cache_key).apply(queryset)
+
+
+def _get_model_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+    # get_FOO_display() only needs the FOO column
+    if name.startswith('get_') and name.endswith('_display'):
+        try:
+            return model._meta.get_field(name[4:-8])
+        except FieldDoesNotExist:
+            pass
+    return None
+
+
+def _is_forward_relation(model_field):
+    return model_field.is_relation and (model_field.many_to_one or model_field.one_to_one)
+
+
+def _walk_relations(model, attrs, plan, prefix):
+    """
+    Follows the single-valued relations in attrs[:-1], selecting each hop,
+    and returns the model and path prefix the last attribute lives on.
+    """
+    for attr in attrs[:-1]:
+        model_field = _get_model_field(model, attr)
+        if model_field is None or not _is_forward_relation(model_field):
+            plan.restrict_columns = False
+            return None, None
+        plan.select(prefix + model_field.name)
+        prefix = prefix + model_field.name + '__'
+        model = model_field.related_model
+        plan.models.add(model)
+    return model, prefix
+
+
+def _plan_many(field, model, plan, prefix):
+    model_field = _get_model_field(model, field.source_attrs[-1])
+    if model_field is None or not model_field.is_relation:
+        plan.restrict_columns = False
+        return
+    related_model = model_field.related_model
+    child = field.child if isinstance(field, serializers.ListSerializer) else field.child_relation
+    child_plan = QueryPlan(related_model)
+    if isinstance(child, serializers.BaseSerializer):
+        _plan_serializer(child, related_model, child_plan)
+    else:
+        _plan_related(child, related_model, child_plan, '', source_attrs=None)
+    if model_field.one_to_many:
+        # reverse foreign keys are matched back to their parent on this column
+        child_plan.columns.add(model_field.field.name)
+    plan.models.update(child_plan.models)
+    lookup = prefix + model_field.name
+    queryset = child_plan.apply(related_model._default_manager.all())
+    limit = getattr(field, 'limit', None)
+    if limit is None:
+        plan.prefetch_related[lookup] = Prefetch(lookup, queryset=queryset)
+        return
+    # a window per parent, in the same order as the nested list's endpoint
+    ordering = queryset.query.order_by or related_model._meta.ordering
+    queryset = queryset.order_by(*add_pk_tiebreak(ordering, related_model))[:limit]
+    plan.prefetch_related[lookup] = Prefetch(
+        lookup, queryset=queryset, to_attr=get_window_attr(field.source_attrs[-1])
+    )
+
+
+def _plan_related(field, model, plan, prefix, source_attrs):
+    """
+    Plans a single related field. With source_attrs=None the field renders
+    instances of model itself (the child of a many related field).
+    """
+    if source_attrs is not None:
+        model_field = _get_model_field(model, source_attrs[-1])
+        if model_field is None or not _is_forward_relation(model_field):
+            plan.restrict_columns = False
+            return
+        related_model = model_field.related_model
+        plan.models.add(related_model)
+        path = prefix + model_field.name
+    else:
+        related_model, path = model, None
+    if isinstance(field, SlugRelatedField):
+        lookup_field = field.slug_field
+    else:
+        lookup_field = getattr(field, 'lookup_field', 'pk')
+    if lookup_field == 'pk':
+        # pk-only lookups read the foreign key column, no join needed
+        if path is not None:
+            plan.columns.add(path)
+        return
+    if _get_model_field(related_model, lookup_field) is None:
+        plan.restrict_columns = False
+        return
+    if path is None:
+        plan.columns.add(lookup_field)
+    else:
+        plan.select(path)
+        plan.columns.add(path + '__' + lookup_field)
+
+
+def _plan_serializer(serializer, model, plan, prefix=''):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                _plan_serializer(field, model, plan, prefix)
+            elif isinstance(field, HyperlinkedRelatedField):
+                lookup_field = field.lookup_field
+                if lookup_field != 'pk':
+                    plan.columns.add(prefix + lookup_field)
+            else:
+                plan.restrict_columns = False
+            continue
+        owner, owner_prefix = _walk_relations(model, field.source_attrs, plan, prefix)
+        if owner is None:
+            continue
+        if isinstance(field, (serializers.ListSerializer, ManyRelatedField)):
+            _plan_many(field, owner, plan, owner_prefix)
+        elif isinstance(field, serializers.BaseSerializer):
+            model_field = _get_model_field(owner, field.source_attrs[-1])
+            if model_field is None or not _is_forward_relation(model_field):
+                plan.restrict_columns = False
+                continue
+            path = owner_prefix + model_field.name
+            plan.select(path)
+            plan.models.add(model_field.related_model)
+            _plan_serializer(field, model_field.related_model, plan, path + '__')
+        elif isinstance(field, RelatedField):
+            _plan_related(field, owner, plan, owner_prefix, field.source_attrs)
+        else:
+            model_field = _get_model_field(owner, field.source_attrs[-1])
+            if model_field is None or not model_field.concrete:
+                plan.restrict_columns = False
+                continue
+            plan.columns.add(owner_prefix + model_field.name)
+
+
+class QueryPlanMixin:
+    """
+    Builds select_related/prefetch_related/only() for the view's queryset
+    from the fields its serializer renders.
+    """
+    # models read outside of the serializer, e.g. by filters
+    extra_dependencies = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer, cache_key = get_fieldset_serializer(self)
+        return plan_queryset(queryset, serializer, cache_key)
+
+    def get_dependency_models(self):
+        """
+        Every model whose rows can change this view's responses.
+        """
+        plan = get_query_plan(self.get_serializer_class(), self.queryset.model)
+        return set(plan.models) | set(self.extra_dependencies)
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from .apisettings import get_setting
+from .tableversions import get_table_versions
+
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def record(view_name, hit):
+    with _stats_lock:
+        (_hits if hit else _misses)[view_name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        endpoints = {
+            name: {'hits': _hits[name], 'misses': _misses[name]}
+            for name in sorted(set(_hits) | set(_misses))
+        }
+        return {
+            'hits': sum(_hits.values()),
+            'misses': sum(_misses.values()),
+            'endpoints': endpoints,
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        _hits.clear()
+        _misses.clear()
+
+
+def to_cacheable(data):
+    """
+    Copies response data into plain dicts, lists and strings. DRF's
+    Hyperlink strings pickle the name of the instance they point to, which
+    loads its deferred columns one query per link.
+    """
+    if isinstance(data, dict):
+        return {key: to_cacheable(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [to_cacheable(value) for value in data]
+    if isinstance(data, str):
+        return str(data)
+    return data
+
+
+class CachedResponseMixin:
+    """
+    Caches the data of GET list/detail responses. Keys carry the versions of
+    every table the serializer reads, so a write to any of them (renaming a
+    category also changes the drone lists showing its name) makes the old
+    entries unreachable. Entries are kept in each process's default cache;
+    the versions come from SHARED_CACHE, so every worker sees the writes.
+    """
+    cache_responses = False
+
+    def get_response_cache_key(self, request):
+        query = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+        versions = get_table_versions({model._meta.db_table for model in self.get_dependency_models()})
+        parts = [
+            request.scheme,
+            request.get_host(),
+            request.path,
+            repr(query),
+            str(request.version),
+            str(request.user.is_authenticated),
+            request.accepted_media_type,
+            repr(sorted(versions.items())),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        return 'response:{0}:{1}'.format(self.name, digest)
+
+    def can_cache_response(self, request):
+        return (
+            self.cache_responses
+            and request.method == 'GET'
+            and not isinstance(request.accepted_renderer, BrowsableAPIRenderer)
+        )
+
+    def lookup_cached_response(self, request):
+        """
+        Returns (key, response). key is None when the request can not be
+        cached, response is None on a miss.
+        """
+        if not self.can_cache_response(request):
+            return None, None
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is None:
+            record(self.name, hit=False)
+            return key, None
+        record(self.name, hit=True)
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return key, response
+
+    def store_cached_response(self, key, response):
+        if response.status_code == 200:
+            cache.set(key, to_cacheable(response.data), get_setting('RESPONSE_CACHE_TIMEOUT'))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_cached_response(self, request, build_response):
+        key, response = self.lookup_cached_response(request)
+        if key is None:
+            return build_response()
+        if response is not None:
+            return response
+        return self.store_cached_response(key, build_response())
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,177 @@
+import re
+
+from django.apps import apps as global_apps
+from django.db import connections, router
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+# model label -> text columns in the full-text index
+SEARCH_INDEXES = {
+    'toys.Toy': ('name', 'description'),
+    'drones.Drone': ('name',),
+    'drones.Pilot': ('name',),
+}
+TS_CONFIG = 'english'
+FTS5_TOKENIZER = 'porter unicode61 remove_diacritics 2'
+RANK = 'search_rank'
+
+
+def get_terms(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def get_names(connection, model, columns):
+    quote = connection.ops.quote_name
+    table = model._meta.db_table
+    return {
+        'table': quote(table),
+        'fts': quote(table + '_fts'),
+        'index': quote(table + '_search_idx'),
+        'trigger': table + '_fts_{0}',
+        'pk': quote(model._meta.pk.column),
+        'columns': ', '.join(quote(model._meta.get_field(column).column) for column in columns),
+        'new': ', '.join('new.' + quote(model._meta.get_field(column).column) for column in columns),
+        'old': ', '.join('old.' + quote(model._meta.get_field(column).column) for column in columns),
+    }
+
+
+def get_tsvector_sql(connection, model, columns, qualified=False):
+    quote = connection.ops.quote_name
+    prefix = quote(model._meta.db_table) + '.' if qualified else ''
+    document = " || ' ' || ".join(
+        "coalesce({0}{1}, '')".format(prefix, quote(model._meta.get_field(column).column)) for column in columns
+    )
+    return "to_tsvector('{0}', {1})".format(TS_CONFIG, document)
+
+
+def create_search_index(connection, model, columns):
+    """
+    Creates the full-text index of model's columns if it is missing: an
+    external content FTS5 table kept in sync by triggers on SQLite, a GIN
+    expression index on PostgreSQL. Other databases get none and search
+    falls back to substring matching.
+    """
+    names = get_names(connection, model, columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [model._meta.db_table + '_fts']
+            )
+            exists = cursor.fetchone() is not None
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content={table}, "
+                "content_rowid={pk}, tokenize='{tokenizer}')".format(tokenizer=FTS5_TOKENIZER, **names)
+            )
+            delete = "INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.{pk}, {old});".format(**names)
+            insert = "INSERT INTO {fts}(rowid, {columns}) VALUES (new.{pk}, {new});".format(**names)
+            triggers = (
+                ('ai', 'AFTER INSERT ON {table}', insert),
+                ('ad', 'AFTER DELETE ON {table}', delete),
+                ('au', 'AFTER UPDATE ON {table}', delete + ' ' + insert),
+            )
+            for suffix, event, body in triggers:
+                cursor.execute('CREATE TRIGGER IF NOT EXISTS {0} {1} BEGIN {2} END'.format(
+                    connection.ops.quote_name(names['trigger'].format(suffix)), event.format(**names), body
+                ))
+            if not exists:
+                cursor.execute("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(**names))
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE INDEX IF NOT EXISTS {0} ON {1} USING gin (({2}))'.format(
+                names['index'], names['table'], get_tsvector_sql(connection, model, columns)
+            ))
+
+
+def drop_search_index(connection, model, columns):
+    names = get_names(connection, model, columns)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute('DROP TRIGGER IF EXISTS {0}'.format(
+                    connection.ops.quote_name(names['trigger'].format(suffix))
+                ))
+            cursor.execute('DROP TABLE IF EXISTS {fts}'.format(**names))
+        elif connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS {index}'.format(**names))
+
+
+def repair_search_indexes(sender, app_config, using, apps=global_apps, **kwargs):
+    """
+    post_migrate receiver. SQLite rebuilds a table to alter it, which drops
+    its triggers; recreating them after every migrate keeps the index in
+    sync.
+    """
+    for label, columns in SEARCH_INDEXES.items():
+        if label.startswith(app_config.label + '.'):
+            try:
+                model = apps.get_model(label)
+            except LookupError:
+                continue
+            if router.allow_migrate_model(using, model):
+                create_search_index(connections[using], model, columns)
+
+
+def search(queryset, text):
+    """
+    Filters queryset to the rows matching every word of text (as a prefix)
+    and annotates them with search_rank, higher for better matches. The
+    ordering of queryset is kept.
+    """
+    terms = get_terms(text)
+    if not terms:
+        return queryset
+    model = queryset.model
+    columns = SEARCH_INDEXES.get(model._meta.label)
+    connection = connections[queryset.db]
+    if columns is None:
+        raise ValueError('{0} has no search index.'.format(model._meta.label))
+    names = get_names(connection, model, columns)
+    if connection.vendor == 'sqlite':
+        match = ' '.join('"{0}"*'.format(term) for term in terms)
+        matches = RawSQL(
+            '{table}.{pk} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)'.format(**names),
+            [match], output_field=BooleanField()
+        )
+        # The ranks of all matches are collected once into a JSON object
+        # keyed by rowid, as a subquery correlated on the row would run the
+        # MATCH again for every row. FTS5's rank is lower for better matches.
+        rank = RawSQL(
+            "json_extract((SELECT json_group_object(rowid, -rank) FROM {fts} WHERE {fts} MATCH %s), "
+            "'$.\"' || {table}.{pk} || '\"')".format(**names),
+            [match], output_field=FloatField()
+        )
+    elif connection.vendor == 'postgresql':
+        tsquery = ' & '.join('{0}:*'.format(term) for term in terms)
+        vector = get_tsvector_sql(connection, model, columns, qualified=True)
+        matches = RawSQL(
+            "{0} @@ to_tsquery('{1}', %s)".format(vector, TS_CONFIG), [tsquery], output_field=BooleanField()
+        )
+        rank = RawSQL(
+            "ts_rank({0}, to_tsquery('{1}', %s))".format(vector, TS_CONFIG), [tsquery], output_field=FloatField()
+        )
+    else:
+        matches = Q()
+        for term in terms:
+            matches &= Q(*(Q(**{column + '__icontains': term}) for column in columns), _connector=Q.OR)
+        rank = Value(0.0, output_field=FloatField())
+    return queryset.filter(matches).annotate(**{RANK: rank})
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ?search= through the full-text index of models in SEARCH_INDEXES,
+    ranked best first unless the request orders the results itself; other
+    models keep SearchFilter's search_fields lookups.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model._meta.label not in SEARCH_INDEXES:
+            return super().filter_queryset(request, queryset, view)
+        text = request.query_params.get(self.search_param, '')
+        if not get_terms(text):
+            return queryset
+        queryset = search(queryset, text)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-' + RANK, 'pk')
+        return queryset
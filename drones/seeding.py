@@ -0,0 +1,181 @@
+import datetime
+import multiprocessing
+import random
+import time
+
+import django
+from django.apps import apps
+from django.db import connection, connections
+
+from . import search, tableversions
+
+ADJECTIVES = (
+    'Swift', 'Silent', 'Crimson', 'Golden', 'Iron', 'Lunar', 'Solar', 'Arctic', 'Shadow', 'Storm',
+    'Rapid', 'Brave', 'Electric', 'Falcon', 'Cobalt', 'Amber', 'Phantom', 'Turbo', 'Nova', 'Vortex',
+)
+NOUNS = (
+    'Hawk', 'Falcon', 'Eagle', 'Raven', 'Sparrow', 'Hornet', 'Comet', 'Arrow', 'Glider', 'Rotor',
+    'Drifter', 'Scout', 'Ranger', 'Voyager', 'Pioneer', 'Orbit', 'Pulse', 'Blade', 'Kite', 'Wasp',
+)
+FIRST_NAMES = (
+    'Ava', 'Liam', 'Noah', 'Emma', 'Mia', 'Lucas', 'Sofia', 'Mateo', 'Zoe', 'Hugo',
+    'Ines', 'Leo', 'Nora', 'Ivan', 'Yuki', 'Omar', 'Lena', 'Tariq', 'Chloe', 'Diego',
+)
+LAST_NAMES = (
+    'Novak', 'Garcia', 'Smith', 'Kim', 'Rossi', 'Silva', 'Dubois', 'Muller', 'Tanaka', 'Khan',
+    'Jensen', 'Costa', 'Moreau', 'Ivanova', 'Nguyen', 'Okafor', 'Larsen', 'Haddad', 'Brown', 'Santos',
+)
+
+
+def get_rng(seed, label, start):
+    """
+    The random generator of one batch. It depends only on the seed, the
+    model and the batch's first row, so a dataset does not change with
+    the number of workers.
+    """
+    return random.Random('{0}:{1}:{2}'.format(seed, label, start))
+
+
+def skewed_index(rng, count, skew):
+    """
+    An index below count, 0 the most likely: skew 1 is uniform, higher
+    skews give the first indexes a growing share.
+    """
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def random_datetime(rng, start, end):
+    return start + datetime.timedelta(seconds=rng.randrange(int((end - start).total_seconds())))
+
+
+def parse_date(value):
+    return datetime.datetime.combine(datetime.date.fromisoformat(value), datetime.time(), datetime.timezone.utc)
+
+
+class Progress:
+    """
+    Writes a line with the rows inserted so far and the rate at most every
+    interval seconds, and a summary at the end.
+    """
+
+    def __init__(self, stdout, label, total, verbosity=1, interval=2.0):
+        self.stdout = stdout
+        self.label = label
+        self.total = total
+        self.verbosity = verbosity
+        self.interval = interval
+        self.done = 0
+        self.started = self.reported = time.perf_counter()
+
+    def add(self, rows):
+        self.done += rows
+        now = time.perf_counter()
+        if self.verbosity >= 2 or (self.verbosity >= 1 and now - self.reported >= self.interval):
+            self.reported = now
+            self.stdout.write('  {0}: {1:,}/{2:,} ({3:,.0f} rows/s)'.format(
+                self.label, self.done, self.total, self.done / (now - self.started)
+            ))
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        if self.verbosity >= 1:
+            self.stdout.write('{0}: {1:,} rows in {2:.1f} s ({3:,.0f} rows/s)'.format(
+                self.label, self.done, elapsed, self.done / elapsed if elapsed else 0
+            ))
+        return elapsed
+
+
+_context = None
+
+
+def _set_context(context):
+    global _context
+    if not apps.ready:
+        # a spawned (not forked) worker
+        django.setup()
+    _context = context
+
+
+def _build(task):
+    build, start, stop = task
+    return build(_context, start, stop)
+
+
+def _insert(task):
+    model, build, start, stop, ignore_conflicts = task
+    batch = build(_context, start, stop)
+    model.objects.bulk_create(batch, batch_size=len(batch), ignore_conflicts=ignore_conflicts)
+    return len(batch)
+
+
+def generate(build, context, count, batch_size, workers=1):
+    """
+    Yields the batches build(context, start, stop) covering count rows, in
+    order. With more than one worker the batches are built in a process
+    pool, which gets context once; build must be a module level function.
+    """
+    tasks = [(build, start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+    if workers <= 1 or len(tasks) <= 1:
+        _set_context(context)
+        for task in tasks:
+            yield _build(task)
+        return
+    with multiprocessing.Pool(workers, _set_context, (context,)) as pool:
+        yield from pool.imap(_build, tasks)
+
+
+def insert(model, build, context, count, batch_size, workers=1, label=None, stdout=None, verbosity=1,
+           ignore_conflicts=False):
+    """
+    bulk_create()s count rows of model, batch_size at a time, from the
+    instances build(context, start, stop) returns, reporting the progress.
+    On SQLite, which has a single writer, workers only build the batches;
+    on other databases each worker also inserts its batches.
+    """
+    progress = Progress(stdout, label or model._meta.db_table, count, verbosity)
+    if workers > 1 and count > batch_size and connection.vendor != 'sqlite':
+        tasks = [
+            (model, build, start, min(start + batch_size, count), ignore_conflicts)
+            for start in range(0, count, batch_size)
+        ]
+        # forked workers open connections of their own
+        connections.close_all()
+        with multiprocessing.Pool(workers, _set_context, (context,)) as pool:
+            for rows in pool.imap_unordered(_insert, tasks):
+                progress.add(rows)
+    else:
+        for batch in generate(build, context, count, batch_size, workers):
+            model.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+            progress.add(len(batch))
+    progress.finish()
+
+
+class BulkLoad:
+    """
+    Context manager for a large load. On SQLite it turns off fsync for the
+    connection. The full-text indexes of models are dropped on entry and
+    rebuilt once on exit, instead of being updated row by row. The tables'
+    versions are bumped on exit, as bulk_create() sends no signals.
+    """
+
+    def __init__(self, *models):
+        self.models = models
+        self.indexed = [model for model in models if model._meta.label in search.SEARCH_INDEXES]
+
+    def __enter__(self):
+        # SQLite refuses to change it inside a transaction
+        self.unsynced = connection.vendor == 'sqlite' and not connection.in_atomic_block
+        if self.unsynced:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+        for model in self.indexed:
+            search.drop_search_index(connection, model, search.SEARCH_INDEXES[model._meta.label])
+        return self
+
+    def __exit__(self, *exc_info):
+        for model in self.indexed:
+            search.create_search_index(connection, model, search.SEARCH_INDEXES[model._meta.label])
+        if self.unsynced:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = FULL')
+        tableversions.bump_table_versions(*(model._meta.db_table for model in self.models))
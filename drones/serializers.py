@@ -1,33 +1,36 @@
 from rest_framework import serializers
-from .models import Pilot, Drone, Competition, DroneCategory
+from .models import Pilot, Drone, Competition, DroneCategory, LeaderboardEntry
 import drones.views
 from django.contrib.auth.models import User
+from .fieldsets import SparseFieldsetMixin
+from .hyperlinks import CachedHyperlinkedIdentityField, CachedHyperlinkedModelSerializer, CachedHyperlinkedRelatedField
+from .nested import BoundedListSerializer, BoundedManyRelatedField
 
 
-class UserDroneSerializer(serializers.HyperlinkedModelSerializer):
+class UserDroneSerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
     class Meta:
         model = Drone
         fields = ['url', 'name']
         
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class UserSerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
     drones = UserDroneSerializer(many=True, read_only=True)
     class Meta:
         model = User
         fields = ['url', 'pk','username', 'drones']
 
-class DroneCategorySerializer(serializers.HyperlinkedModelSerializer):
-    drones = serializers.HyperlinkedRelatedField(
-        many = True,
-        read_only = True,
-        view_name = 'drone-detail'
+class DroneCategorySerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
+    drones = BoundedManyRelatedField(
+        child_relation=CachedHyperlinkedRelatedField(read_only=True, view_name='drone-detail'),
+        read_only=True,
     )
+    drones_url = CachedHyperlinkedIdentityField(view_name='dronecategory-drone-list')
     class Meta:
         model = DroneCategory
-        fields = ['url', 'pk', 'name', 'drones']
+        fields = ['url', 'pk', 'name', 'drones', 'drones_url']
         
         
         
-class DroneSerializer(serializers.HyperlinkedModelSerializer):
+class DroneSerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
     drone_category = serializers.SlugRelatedField(
         queryset=DroneCategory.objects.all(),slug_field='name'
         
@@ -38,7 +41,7 @@ class DroneSerializer(serializers.HyperlinkedModelSerializer):
         fields = ['url', 'name','onwer', 'inserted_timestamp','drone_category', 'manufacturing_date', 'has_it_completed_missions']
         
         
-class CompetitionSerializer(serializers.HyperlinkedModelSerializer):
+class CompetitionSerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
     
     drone = DroneSerializer()
     
@@ -46,17 +49,19 @@ class CompetitionSerializer(serializers.HyperlinkedModelSerializer):
         model = Competition
         fields = ['url', 'pk', 'drone', 'distance_in_feet', 'distance_achievement_date']
 
-class PilotSerializer(serializers.HyperlinkedModelSerializer):
-    competitions = CompetitionSerializer(many=True, read_only=True)
+class PilotSerializer(SparseFieldsetMixin, CachedHyperlinkedModelSerializer):
+    competitions = BoundedListSerializer(child=CompetitionSerializer(), read_only=True)
+    competitions_url = CachedHyperlinkedIdentityField(view_name='pilot-competition-list')
     gender = serializers.ChoiceField(choices=Pilot.GENDER_CHOICES)
     gender_description = serializers.CharField(source= 'get_gender_display', read_only=True)
     
     class Meta:
         model = Pilot
-        fields = ['url', 'name', 'gender', 'gender_description', 'reces_count', 'inserted_timestamp', 'competitions']
+        fields = ['url', 'name', 'gender', 'gender_description', 'reces_count', 'inserted_timestamp', 'competitions', 'competitions_url']
         
 
-class PilotCompetitionSerializer(serializers.ModelSerializer):
+class PilotCompetitionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    serializer_url_field = CachedHyperlinkedIdentityField
     pilot = serializers.SlugRelatedField(queryset=Pilot.objects.all(),
     slug_field='name')
     # Display the drone's name
@@ -70,4 +75,29 @@ class PilotCompetitionSerializer(serializers.ModelSerializer):
         'distance_in_feet',
         'distance_achievement_date',
         'pilot',
-        'drone')
\ No newline at end of file
+        'drone')
+
+class CompetitionBulkItemSerializer(serializers.Serializer):
+    # names are resolved for the whole batch at once, not per item
+    pilot = serializers.CharField(max_length=250)
+    drone = serializers.CharField(max_length=250)
+    distance_in_feet = serializers.IntegerField()
+    distance_achievement_date = serializers.DateTimeField()
+
+
+class PilotLeaderboardEntrySerializer(serializers.ModelSerializer):
+    pilot = serializers.SlugRelatedField(read_only=True, slug_field='name')
+    drone_category = serializers.SlugRelatedField(read_only=True, slug_field='name')
+    rank = serializers.IntegerField(read_only=True)
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rank', 'pilot', 'best_distance_in_feet', 'period', 'drone_category')
+
+
+class DroneLeaderboardEntrySerializer(serializers.ModelSerializer):
+    drone = serializers.SlugRelatedField(read_only=True, slug_field='name')
+    drone_category = serializers.SlugRelatedField(read_only=True, slug_field='name')
+    rank = serializers.IntegerField(read_only=True)
+    class Meta:
+        model = LeaderboardEntry
+        fields = ('rank', 'drone', 'best_distance_in_feet', 'period', 'drone_category')
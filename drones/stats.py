@@ -0,0 +1,93 @@
+import datetime
+
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import CumeDist, TruncDay, TruncMonth, TruncYear
+
+UTC = datetime.timezone.utc
+# group_by value: (expression building the group key, formatter for the key)
+GROUPINGS = {
+    'pilot': (lambda: F('pilot__name'), str),
+    'drone': (lambda: F('drone__name'), str),
+    'drone_category': (lambda: F('drone__drone_category__name'), str),
+    'day': (lambda: TruncDay('distance_achievement_date', tzinfo=UTC), '{0:%Y-%m-%d}'.format),
+    'month': (lambda: TruncMonth('distance_achievement_date', tzinfo=UTC), '{0:%Y-%m}'.format),
+    'year': (lambda: TruncYear('distance_achievement_date', tzinfo=UTC), '{0:%Y}'.format),
+}
+DEFAULT_PERCENTILES = (50, 90, 99)
+MAX_PERCENTILES = 5
+
+
+def parse_percentiles(value):
+    """
+    Parses '50,90,99' into (50, 90, 99). Raises ValueError for anything
+    else than up to MAX_PERCENTILES integers between 1 and 100.
+    """
+    if not value:
+        return DEFAULT_PERCENTILES
+    percentiles = sorted({int(part) for part in value.split(',')})
+    if len(percentiles) > MAX_PERCENTILES or not all(1 <= percentile <= 100 for percentile in percentiles):
+        raise ValueError(value)
+    return tuple(percentiles)
+
+
+def _get_converters(expression, connection):
+    return connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
+
+
+def competition_stats(queryset, group_by, percentiles=DEFAULT_PERCENTILES):
+    """
+    Aggregates the distances of the (already filtered) competitions in one
+    query, grouped by GROUPINGS[group_by].
+
+    The filtered queryset becomes a subquery that adds CUME_DIST() over each
+    group, and the outer query takes COUNT/AVG/MIN/MAX plus, for every
+    percentile p, the smallest distance whose cumulative distribution
+    reaches p (the percentile_disc() definition). Window functions are
+    available on both PostgreSQL and SQLite, so no rows reach Python.
+    """
+    build_key, format_key = GROUPINGS[group_by]
+    rows = queryset.order_by().annotate(
+        stat_group=build_key(),
+        stat_value=F('distance_in_feet'),
+        stat_cume=Window(
+            CumeDist(),
+            partition_by=[build_key()],
+            order_by=F('distance_in_feet').asc()
+        ),
+    ).values_list('stat_group', 'stat_value', 'stat_cume')
+    inner_sql, inner_params = rows.query.sql_with_params()
+    percentile_columns = ''.join(
+        ', MIN(CASE WHEN stat_cume >= %s THEN stat_value END)' for _ in percentiles
+    )
+    sql = (
+        'SELECT stat_group, COUNT(*), AVG(stat_value), MIN(stat_value), MAX(stat_value){0} '
+        'FROM ({1}) stat_rows WHERE stat_group IS NOT NULL '
+        'GROUP BY stat_group ORDER BY stat_group'
+    ).format(percentile_columns, inner_sql)
+    # CUME_DIST() is a float, compare against a slightly lower bound
+    params = [percentile / 100 - 1e-9 for percentile in percentiles] + list(inner_params)
+
+    connection = connections[queryset.db]
+    key_expression = rows.query.annotations['stat_group']
+    converters = _get_converters(key_expression, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        results = []
+        for row in cursor.fetchall():
+            key = row[0]
+            for converter in converters:
+                key = converter(key, key_expression, connection)
+            count, average, minimum, maximum = row[1:5]
+            results.append({
+                'group': format_key(key),
+                'count': count,
+                'avg_distance_in_feet': round(float(average), 2),
+                'min_distance_in_feet': minimum,
+                'max_distance_in_feet': maximum,
+                'percentiles': {
+                    'p{0}'.format(percentile): value
+                    for percentile, value in zip(percentiles, row[5:])
+                },
+            })
+    return results
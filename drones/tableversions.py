@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .apisettings import get_setting
+
+VERSION_KEY = 'tableversion:{0}'
+
+
+def get_cache():
+    return caches[get_setting('SHARED_CACHE')]
+
+
+def get_table_versions(tables):
+    """
+    Returns {table: version} for the given tables. A version changes every
+    time a row of the table is saved or deleted through the ORM; versions
+    are nanosecond timestamps, so they also tell when the last write was.
+    They live in the SHARED_CACHE, which every worker process has to share
+    for one worker to see the writes of another; what is cached under
+    them can stay in each process's own default cache.
+    """
+    cache = get_cache()
+    keys = {VERSION_KEY.format(table): table for table in tables}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # an unknown (or culled) table counts as just written, never as unchanged
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def set_table_versions(*tables):
+    now = time.time_ns()
+    get_cache().set_many({VERSION_KEY.format(table): now for table in tables}, timeout=None)
+    return {table: now for table in tables}
+
+
+def bump_table_versions(*tables, using=None):
+    """
+    Gives tables new versions once the current transaction commits, or right
+    away outside of one. A version moved before the commit would let a
+    concurrent read, which still sees the old rows, cache them under it.
+    """
+    transaction.on_commit(lambda: set_table_versions(*tables), using=using)
+
+
+def get_queryset_tables(queryset):
+    tables = {queryset.model._meta.db_table}
+    tables.update(join.table_name for join in queryset.query.alias_map.values())
+    return tables
+
+
+def bump_model_table(sender, using=None, **kwargs):
+    bump_table_versions(sender._meta.db_table, using=using)
+
+
+def bump_m2m_tables(sender, instance, action, model, using=None, **kwargs):
+    if action.startswith('post_'):
+        bump_table_versions(
+            sender._meta.db_table, type(instance)._meta.db_table, model._meta.db_table, using=using
+        )
+
+
+def connect(*models):
+    """
+    Bumps the tables of models on every save and delete. The delete receiver
+    is connected per model: one without a sender would stop Django from
+    deleting the rows of any model, cascades included, in a single query.
+    """
+    for model in models:
+        uid = 'tableversions_{0}'.format(model._meta.label_lower)
+        post_save.connect(bump_model_table, sender=model, dispatch_uid=uid + '_post_save')
+        post_delete.connect(bump_model_table, sender=model, dispatch_uid=uid + '_post_delete')
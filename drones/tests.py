@@ -1,13 +1,47 @@
+import base64
+import io
+import json
+import types
+from unittest import mock
+
 from django.test import TestCase
 from django.utils.http import urlencode
-from django.urls import reverse
+from django.urls import include, path, reverse
 from rest_framework import status
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 
-from rest_framework.test import APITestCase
-from drones.models import DroneCategory, Pilot
+from rest_framework.test import APIRequestFactory, APITestCase
+from drones.models import DroneCategory, Pilot, Drone, Competition, LeaderboardEntry
 from rest_framework.authtoken.models import Token
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
 from drones import views
+from drones import asyncviews
+from drones.filters import CompetitionFilter
+from drones.customthrottling import (
+    FIXED, SLIDING, SQLITE, CacheThrottleStore, SharedAnonRateThrottle, ThrottleStore, get_store,
+)
+from drones import responsecache
+from drones import customauthentication
+from drones import hyperlinks
+from drones import leaderboard
+from drones import tableversions
+from drones import performance
+from drones import querybudget
+from drones import search
+from drones import urls as drones_urls
+from drones.querybudget import QueryBudgetMixin
+from rest_framework.request import Request
+from rest_framework.reverse import reverse as drf_reverse
+from drones.fastread import get_row_encoder
+from drones.serializers import DroneCategorySerializer, DroneSerializer, PilotSerializer
+from django.core.cache import cache
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.deletion import Collector
+from django.test.utils import CaptureQueriesContext
+from django.db.models import Count
+from django.utils import timezone
 
 
 class DroneCategoryTest(APITestCase):
@@ -68,6 +102,40 @@ class DroneCategoryTest(APITestCase):
         assert get_response.data['name'] == name
 
 
+class DroneWriteTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.other = User.objects.create_user(username='user02', email='user02@example.com', password='user02P4ssw0rD')
+        DroneCategory.objects.create(name='Quadcopter')
+
+    def post_drone(self, name):
+        data = {
+            'name': name,
+            'drone_category': 'Quadcopter',
+            'manufacturing_date': '2025-06-01T10:00:00Z',
+            'has_it_completed_missions': False,
+        }
+        return self.client.post(reverse(views.DroneList.name), data, format='json')
+
+    def test_post_drone_sets_the_owner(self):
+        self.client.force_authenticate(self.user)
+        response = self.post_drone('Atom')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['onwer'] == 'user01'
+        assert Drone.objects.get().onwer == self.user
+
+    def test_only_the_owner_updates_a_drone(self):
+        self.client.force_authenticate(self.user)
+        self.post_drone('Atom')
+        url = reverse(views.DroneDetail.name, kwargs={'pk': Drone.objects.get().pk})
+        self.client.force_authenticate(self.other)
+        assert self.client.patch(url, {'has_it_completed_missions': True}, format='json').status_code == status.HTTP_403_FORBIDDEN
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(url, {'has_it_completed_missions': True}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['has_it_completed_missions'] is True
+
+
 class PilotTest(APITestCase):
     def post_pilot(self,name, gender, reces_count):
         url = reverse(views.PilotList.name)
@@ -111,3 +179,1539 @@ class PilotTest(APITestCase):
         response = self.post_pilot('Unauthorized Pilot', Pilot.MALE, 5)
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert Pilot.objects.count() == 0
+
+
+class PilotQueryCountTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        # the token is looked up once, later requests take it from the auth cache
+        self.client.get(reverse(views.PilotList.name), format='json')
+
+    def create_pilot_with_competitions(self, name, competitions_count):
+        pilot = Pilot.objects.create(name=name, gender=Pilot.MALE, reces_count=competitions_count)
+        for i in range(competitions_count):
+            drone = Drone.objects.create(
+                name='{0} drone {1}'.format(name, i),
+                onwer=self.user,
+                drone_category=self.drone_category,
+                manufacturing_date=timezone.now(),
+            )
+            Competition.objects.create(
+                pilot=pilot,
+                drone=drone,
+                distance_in_feet=100 + i,
+                distance_achievement_date=timezone.now(),
+            )
+        return pilot
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return len(context.captured_queries)
+
+    def test_pilot_detail_query_count_is_constant(self):
+        small = self.create_pilot_with_competitions('Small', 1)
+        large = self.create_pilot_with_competitions('Large', 6)
+        small_count = self.count_queries(reverse(views.PilotDetail.name, kwargs={'pk': small.pk}))
+        large_count = self.count_queries(reverse(views.PilotDetail.name, kwargs={'pk': large.pk}))
+        assert small_count == large_count
+        # pilot and the competitions prefetch
+        assert large_count <= 2
+
+    def test_pilot_list_query_count_is_constant(self):
+        self.create_pilot_with_competitions('First', 1)
+        url = reverse(views.PilotList.name)
+        first_count = self.count_queries(url)
+        self.create_pilot_with_competitions('Second', 4)
+        self.create_pilot_with_competitions('Third', 3)
+        assert self.count_queries(url) == first_count
+        # token lookup, count, pilots and the competitions prefetch
+        assert first_count <= 4
+
+    def test_pilot_detail_renders_nested_drone(self):
+        pilot = self.create_pilot_with_competitions('Nested', 2)
+        url = reverse(views.PilotDetail.name, kwargs={'pk': pilot.pk})
+        response = self.client.get(url, format='json')
+        competitions = response.data['competitions']
+        assert [c['distance_in_feet'] for c in competitions] == [101, 100]
+        assert competitions[0]['drone']['onwer'] == 'user01'
+        assert competitions[0]['drone']['drone_category'] == 'Quadcopter'
+
+
+class CompetitionKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        drone = Drone.objects.create(
+            name='Atom',
+            onwer=user,
+            drone_category=drone_category,
+            manufacturing_date=timezone.now(),
+        )
+        pilot = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+        # repeated distances make the pk tiebreak matter
+        for distance in (800, 700, 700, 700, 600, 500, 500, 400, 300, 200, 100):
+            Competition.objects.create(
+                pilot=pilot,
+                drone=drone,
+                distance_in_feet=distance,
+                distance_achievement_date=timezone.now(),
+            )
+
+    def get_page(self, url):
+        response = self.client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_cursor_pages_cover_every_competition_once(self):
+        url = f"{reverse(views.CompetitionList.name)}?{urlencode({'pagination': 'cursor', 'limit': 3})}"
+        seen = []
+        pages = 0
+        while url:
+            page = self.get_page(url)
+            assert 'count' not in page
+            seen += [(c['distance_in_feet'], c['pk']) for c in page['results']]
+            url = page['next']
+            pages += 1
+        expected = list(
+            Competition.objects.order_by('-distance_in_feet', '-pk').values_list('distance_in_feet', 'pk')
+        )
+        assert seen == expected
+        assert pages == 4
+
+    def test_cursor_keeps_the_microseconds_of_datetimes(self):
+        # every competition within the same millisecond
+        start = timezone.now().replace(microsecond=123000)
+        for i, competition in enumerate(Competition.objects.order_by('pk')):
+            competition.distance_achievement_date = start + timezone.timedelta(microseconds=(i * 7) % 11 * 50)
+            competition.save()
+        params = {'pagination': 'cursor', 'limit': 2, 'ordering': 'distance_achievement_date'}
+        url = f"{reverse(views.CompetitionList.name)}?{urlencode(params)}"
+        seen = []
+        while url and len(seen) <= 11:
+            page = self.get_page(url)
+            seen += [c['pk'] for c in page['results']]
+            url = page['next']
+        expected = list(Competition.objects.order_by('distance_achievement_date', 'pk').values_list('pk', flat=True))
+        assert seen == expected
+
+    def test_previous_cursor_returns_previous_page(self):
+        url = f"{reverse(views.CompetitionList.name)}?{urlencode({'pagination': 'cursor', 'limit': 3})}"
+        first_page = self.get_page(url)
+        assert first_page['previous'] is None
+        second_page = self.get_page(first_page['next'])
+        previous_page = self.get_page(second_page['previous'])
+        assert previous_page['results'] == first_page['results']
+
+    def test_offset_pagination_is_still_the_default(self):
+        page = self.get_page(reverse(views.CompetitionList.name))
+        assert page['count'] == 11
+        assert len(page['results']) == 4
+
+    def test_invalid_cursor(self):
+        url = f"{reverse(views.CompetitionList.name)}?{urlencode({'cursor': 'not-a-cursor'})}"
+        response = self.client.get(url, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class PaginationCountModeTest(APITestCase):
+    def post_drone_category(self, name):
+        url = reverse(views.DroneCategoryList.name)
+        return self.client.post(url, {'name': name}, format='json')
+
+    def get_collection(self, **params):
+        url = f"{reverse(views.DroneCategoryList.name)}?{urlencode(params)}"
+        response = self.client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_exact_count_mode_is_reported(self):
+        self.post_drone_category('Hexacopter')
+        data = self.get_collection()
+        assert data['count'] == 1
+        assert data['count_mode'] == 'exact'
+
+    def test_cached_count_is_invalidated_on_write(self):
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGINATION_COUNT_MODE': 'cached'}):
+            self.post_drone_category('Hexacopter')
+            data = self.get_collection()
+            assert data['count'] == 1
+            assert data['count_mode'] == 'cached'
+            with CaptureQueriesContext(connection) as context:
+                self.get_collection()
+            assert not any('COUNT(' in query['sql'] for query in context.captured_queries)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post_drone_category('Octocopter')
+            assert self.get_collection()['count'] == 2
+            assert self.get_collection(name='Octocopter')['count'] == 1
+
+    def test_estimated_count_falls_back_to_cached_count_on_sqlite(self):
+        if connection.vendor != 'sqlite':
+            return
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGINATION_COUNT_MODE': 'estimated'}):
+            self.post_drone_category('Hexacopter')
+            data = self.get_collection()
+            assert data['count'] == 1
+            assert data['count_mode'] == 'cached'
+
+    def test_versions_move_when_the_write_commits(self):
+        tables = [DroneCategory._meta.db_table]
+        versions = tableversions.get_table_versions(tables)
+        with self.captureOnCommitCallbacks(execute=True):
+            DroneCategory.objects.create(name='Hexacopter')
+            # a read before the commit still sees the old rows
+            assert tableversions.get_table_versions(tables) == versions
+        assert tableversions.get_table_versions(tables) != versions
+
+    def test_deletes_bump_versions_without_disabling_fast_deletes(self):
+        tables = [DroneCategory._meta.db_table]
+        drone_category = DroneCategory.objects.create(name='Hexacopter')
+        versions = tableversions.get_table_versions(tables)
+        with self.captureOnCommitCallbacks(execute=True):
+            drone_category.delete()
+        assert tableversions.get_table_versions(tables) != versions
+        assert Collector(connection.alias).can_fast_delete(LeaderboardEntry.objects.all())
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        Drone.objects.create(
+            name='Atom',
+            onwer=self.user,
+            drone_category=self.drone_category,
+            manufacturing_date=timezone.now(),
+        )
+
+    def get_drones(self):
+        response = self.client.get(reverse(views.DroneList.name), format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    def test_second_get_is_served_from_cache(self):
+        assert self.get_drones()['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_drones()
+        assert response['X-Cache'] == 'HIT'
+        assert response.data['results'][0]['name'] == 'Atom'
+        assert len(context.captured_queries) == 0
+
+    def test_renaming_category_invalidates_drone_list(self):
+        self.get_drones()
+        url = reverse(views.DroneCategoryDetail.name, kwargs={'pk': self.drone_category.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'name': 'Hexacopter'}, format='json')
+        response = self.get_drones()
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['drone_category'] == 'Hexacopter'
+
+    def test_query_params_are_part_of_the_key(self):
+        self.get_drones()
+        url = f"{reverse(views.DroneList.name)}?{urlencode({'limit': 1})}"
+        response = self.client.get(url, format='json')
+        assert response['X-Cache'] == 'MISS'
+
+    def test_cache_stats_require_admin(self):
+        url = reverse(views.CacheStats.name)
+        assert self.client.get(url, format='json').status_code == status.HTTP_401_UNAUTHORIZED
+        responsecache.reset_stats()
+        self.get_drones()
+        self.get_drones()
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='admin01P4ssw0rD')
+        self.client.force_authenticate(admin)
+        stats = self.client.get(url, format='json').data['responses']
+        assert stats['endpoints'][views.DroneList.name] == {'hits': 1, 'misses': 1}
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.pilot = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+
+    def test_unchanged_pilot_returns_not_modified(self):
+        url = reverse(views.PilotDetail.name, kwargs={'pk': self.pilot.pk})
+        response = self.client.get(url, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        # the token comes from the auth cache and the pilot is never loaded
+        assert len(context.captured_queries) == 0
+
+    def test_write_changes_the_etag(self):
+        url = reverse(views.PilotList.name)
+        etag = self.client.get(url, format='json')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pilot.reces_count = 6
+            self.pilot.save()
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_if_modified_since(self):
+        url = reverse(views.PilotList.name)
+        last_modified = self.client.get(url, format='json')['Last-Modified']
+        response = self.client.get(url, format='json', HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_query_params_change_the_etag(self):
+        url = reverse(views.PilotList.name)
+        etag = self.client.get(url, format='json')['ETag']
+        response = self.client.get(f"{url}?{urlencode({'limit': 1})}", format='json', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_timestamp_fingerprint(self):
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'CONDITIONAL_GET_FINGERPRINT': 'timestamp'}):
+            url = reverse(views.PilotDetail.name, kwargs={'pk': self.pilot.pk})
+            etag = self.client.get(url, format='json')['ETag']
+            response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            Pilot.objects.create(name='Other', gender=Pilot.FEMALE, reces_count=1)
+            response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_200_OK
+
+
+class CompetitionExportTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        drone = Drone.objects.create(
+            name='Atom',
+            onwer=user,
+            drone_category=drone_category,
+            manufacturing_date=timezone.now(),
+        )
+        pilot = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+        for distance in (100, 200, 300, 400, 500, 600, 700, 800, 900, 1000):
+            Competition.objects.create(
+                pilot=pilot,
+                drone=drone,
+                distance_in_feet=distance,
+                distance_achievement_date=timezone.now(),
+            )
+
+    def export(self, **params):
+        url = f"{reverse(views.CompetitionExport.name)}?{urlencode(params)}"
+        response = self.client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_export_streams_every_row(self):
+        lines = self.export().splitlines()
+        assert len(lines) == 10
+        row = json.loads(lines[0])
+        assert row['pilot'] == 'Gaston'
+        assert row['drone'] == 'Atom'
+        assert [json.loads(line)['pk'] for line in lines] == sorted(json.loads(line)['pk'] for line in lines)
+
+    def test_csv_export_applies_competition_filter(self):
+        lines = self.export(export_format='csv', min_distance_in_feet=800).splitlines()
+        assert lines[0] == 'pk,distance_in_feet,distance_achievement_date,pilot,drone'
+        assert sorted(int(line.split(',')[1]) for line in lines[1:]) == [800, 900, 1000]
+
+    def test_unknown_export_format(self):
+        url = f"{reverse(views.CompetitionExport.name)}?{urlencode({'export_format': 'xml'})}"
+        assert self.client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+
+
+class CompetitionBulkCreateTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        for name in ('Atom', 'Ion'):
+            Drone.objects.create(
+                name=name,
+                onwer=user,
+                drone_category=drone_category,
+                manufacturing_date=timezone.now(),
+            )
+        for name in ('Gaston', 'Penelope'):
+            Pilot.objects.create(name=name, gender=Pilot.MALE, reces_count=5)
+
+    def post_results(self, results, **params):
+        url = reverse(views.CompetitionBulkCreate.name)
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return self.client.post(url, results, format='json')
+
+    def result(self, pilot, drone, distance):
+        return {
+            'pilot': pilot,
+            'drone': drone,
+            'distance_in_feet': distance,
+            'distance_achievement_date': '2025-06-22T10:00:00Z',
+        }
+
+    def test_bulk_create_resolves_names_once(self):
+        results = [self.result(pilot, drone, 100 * i) for i, (pilot, drone) in enumerate(
+            [('Gaston', 'Atom'), ('Penelope', 'Ion')] * 10
+        )]
+        with CaptureQueriesContext(connection) as context:
+            response = self.post_results(results)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 20
+        assert Competition.objects.count() == 20
+        lookups = [
+            q for q in context.captured_queries
+            if '"drones_pilot"."name"' in q['sql'] or '"drones_drone"."name"' in q['sql']
+        ]
+        assert len(lookups) == 2
+
+    def test_errors_are_reported_per_item(self):
+        results = [
+            self.result('Gaston', 'Atom', 100),
+            self.result('Nobody', 'Atom', 200),
+            {'pilot': 'Gaston', 'drone': 'Atom', 'distance_in_feet': 'far'},
+        ]
+        response = self.post_results(results)
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data['created'] == 1
+        assert response.data['results'][1:] == [None, None]
+        assert [error['index'] for error in response.data['errors']] == [1, 2]
+        assert 'pilot' in response.data['errors'][0]['errors']
+        assert Competition.objects.count() == 1
+
+    def test_all_or_nothing_mode(self):
+        results = [self.result('Gaston', 'Atom', 100), self.result('Gaston', 'Missing', 200)]
+        response = self.post_results(results, atomic='true')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert Competition.objects.count() == 0
+
+
+class LeaderboardTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.quadcopters = DroneCategory.objects.create(name='Quadcopter')
+        self.hexacopters = DroneCategory.objects.create(name='Hexacopter')
+        self.atom = self.create_drone('Atom', self.quadcopters)
+        self.ion = self.create_drone('Ion', self.hexacopters)
+        self.pilots = {
+            name: Pilot.objects.create(name=name, gender=Pilot.MALE, reces_count=5)
+            for name in ('Gaston', 'Penelope', 'Peter')
+        }
+
+    def create_drone(self, name, drone_category):
+        return Drone.objects.create(
+            name=name,
+            onwer=self.user,
+            drone_category=drone_category,
+            manufacturing_date=timezone.now(),
+        )
+
+    def compete(self, pilot_name, drone, distance, date='2025-06-22T10:00:00Z'):
+        return Competition.objects.create(
+            pilot=self.pilots[pilot_name],
+            drone=drone,
+            distance_in_feet=distance,
+            distance_achievement_date=date,
+        )
+
+    def board(self, board=LeaderboardEntry.PILOT, drone_category=None, period=LeaderboardEntry.ALL_TIME):
+        subject = 'pilot__name' if board == LeaderboardEntry.PILOT else 'drone__name'
+        return list(leaderboard.ranked(LeaderboardEntry.objects.filter(
+            board=board, drone_category=drone_category, period=period
+        )).values_list(subject, 'best_distance_in_feet', 'rank'))
+
+    def test_ranks_follow_competition_writes(self):
+        self.compete('Gaston', self.atom, 500)
+        self.compete('Penelope', self.atom, 700)
+        self.compete('Peter', self.ion, 500)
+        assert self.board() == [('Penelope', 700, 1), ('Gaston', 500, 2), ('Peter', 500, 2)]
+        competition = self.compete('Gaston', self.ion, 900)
+        assert self.board() == [('Gaston', 900, 1), ('Penelope', 700, 2), ('Peter', 500, 3)]
+        assert self.board(drone_category=self.hexacopters) == [('Gaston', 900, 1), ('Peter', 500, 2)]
+        competition.delete()
+        assert self.board() == [('Penelope', 700, 1), ('Gaston', 500, 2), ('Peter', 500, 2)]
+        assert self.board(drone_category=self.hexacopters) == [('Peter', 500, 1)]
+
+    def test_a_competition_refreshes_its_entries_in_a_few_queries(self):
+        self.compete('Penelope', self.atom, 700)
+        # insert, drone category, a savepoint, pilot and drone locks, a best
+        # per board, the existing entries, a bulk create and a bulk update
+        with self.assertNumQueries(11):
+            self.compete('Penelope', self.ion, 900, date='2025-07-01T10:00:00Z')
+        assert self.board() == [('Penelope', 900, 1)]
+        assert self.board(period='2025-06') == [('Penelope', 700, 1)]
+        assert self.board(LeaderboardEntry.DRONE, period='2025') == [('Ion', 900, 1), ('Atom', 700, 2)]
+
+    def test_periods_and_drone_board(self):
+        self.compete('Gaston', self.atom, 500, date='2024-12-31T23:00:00Z')
+        self.compete('Penelope', self.ion, 300, date='2025-01-01T01:00:00Z')
+        assert self.board(period='2024') == [('Gaston', 500, 1)]
+        assert self.board(period='2025-01') == [('Penelope', 300, 1)]
+        assert self.board(LeaderboardEntry.DRONE) == [('Atom', 500, 1), ('Ion', 300, 2)]
+
+    def test_deleting_a_pilot_closes_the_gap(self):
+        self.compete('Gaston', self.atom, 900)
+        self.compete('Penelope', self.atom, 700)
+        self.compete('Peter', self.atom, 500)
+        self.pilots['Gaston'].delete()
+        assert self.board() == [('Penelope', 700, 1), ('Peter', 500, 2)]
+
+    def test_cascaded_competitions_refresh_the_boards_once(self):
+        for distance in range(100, 1100, 100):
+            self.compete('Gaston', self.atom, distance)
+        self.compete('Penelope', self.ion, 300)
+        self.compete('Peter', self.atom, 200)
+        with mock.patch('drones.leaderboard.refresh_entries', wraps=leaderboard.refresh_entries) as refresh_entries:
+            self.pilots['Gaston'].delete()
+        # Atom's all time, 2025 and 2025-06 entries, overall and for quadcopters
+        refresh_entries.assert_called_once()
+        assert len(refresh_entries.call_args.args[0]) == 6
+        assert self.board(LeaderboardEntry.DRONE) == [('Ion', 300, 1), ('Atom', 200, 2)]
+        self.quadcopters.delete()
+        assert self.board(LeaderboardEntry.DRONE) == [('Ion', 300, 1)]
+        assert self.board() == [('Penelope', 300, 1)]
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        self.compete('Gaston', self.atom, 500)
+        self.compete('Penelope', self.ion, 700, date='2024-03-01T10:00:00Z')
+        self.compete('Peter', self.ion, 700)
+        self.compete('Peter', self.atom, 100, date='2024-03-02T10:00:00Z')
+        expected = set(LeaderboardEntry.objects.values_list(
+            'board', 'period', 'drone_category', 'pilot', 'drone', 'best_distance_in_feet'
+        ))
+        call_command('rebuild_leaderboards', stdout=io.StringIO())
+        assert set(LeaderboardEntry.objects.values_list(
+            'board', 'period', 'drone_category', 'pilot', 'drone', 'best_distance_in_feet'
+        )) == expected
+
+    def test_drone_leaderboard_endpoint(self):
+        self.compete('Gaston', self.atom, 500)
+        self.compete('Penelope', self.ion, 700)
+        url = reverse(views.DroneLeaderboard.name)
+        response = self.client.get(f"{url}?{urlencode({'top': 1})}", format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [{
+            'rank': 1, 'drone': 'Ion', 'best_distance_in_feet': 700, 'period': 'all', 'drone_category': None,
+        }]
+        response = self.client.get(f"{url}?{urlencode({'category': 'Quadcopter', 'period': '2025'})}", format='json')
+        assert [entry['drone'] for entry in response.data] == ['Atom']
+        response = self.client.get(f"{url}?{urlencode({'period': 'last week'})}", format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = self.client.get(reverse(views.PilotLeaderboard.name), format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class CompetitionStatsTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        quadcopters = DroneCategory.objects.create(name='Quadcopter')
+        hexacopters = DroneCategory.objects.create(name='Hexacopter')
+        atom = Drone.objects.create(name='Atom', onwer=user, drone_category=quadcopters, manufacturing_date=timezone.now())
+        ion = Drone.objects.create(name='Ion', onwer=user, drone_category=hexacopters, manufacturing_date=timezone.now())
+        gaston = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+        penelope = Pilot.objects.create(name='Penelope', gender=Pilot.FEMALE, reces_count=5)
+        for distance in range(100, 1100, 100):
+            Competition.objects.create(
+                pilot=gaston, drone=atom, distance_in_feet=distance,
+                distance_achievement_date='2025-06-{0:02d}T10:00:00Z'.format(distance // 100)
+            )
+        Competition.objects.create(
+            pilot=penelope, drone=ion, distance_in_feet=2000, distance_achievement_date='2025-07-01T10:00:00Z'
+        )
+        self.url = reverse(views.CompetitionStats.name)
+
+    def get_stats(self, **params):
+        return self.client.get(f'{self.url}?{urlencode(params)}', format='json')
+
+    def test_aggregates_by_pilot(self):
+        response = self.get_stats(group_by='pilot', percentiles='50,90')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == [
+            {
+                'group': 'Gaston', 'count': 10, 'avg_distance_in_feet': 550.0,
+                'min_distance_in_feet': 100, 'max_distance_in_feet': 1000,
+                'percentiles': {'p50': 500, 'p90': 900},
+            },
+            {
+                'group': 'Penelope', 'count': 1, 'avg_distance_in_feet': 2000.0,
+                'min_distance_in_feet': 2000, 'max_distance_in_feet': 2000,
+                'percentiles': {'p50': 2000, 'p90': 2000},
+            },
+        ]
+
+    def test_time_buckets_and_filters(self):
+        response = self.get_stats(group_by='month')
+        assert [(row['group'], row['count']) for row in response.data['results']] == [('2025-06', 10), ('2025-07', 1)]
+        response = self.get_stats(group_by='drone_category', min_distance_in_feet=800)
+        assert [(row['group'], row['count']) for row in response.data['results']] == [('Hexacopter', 1), ('Quadcopter', 3)]
+
+    def test_invalid_parameters(self):
+        assert self.get_stats(group_by='weekday').status_code == status.HTTP_400_BAD_REQUEST
+        assert self.get_stats(percentiles='0,50').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_repeated_requests_are_cached_until_a_write(self):
+        assert self.get_stats(group_by='drone')['X-Cache'] == 'MISS'
+        assert self.get_stats(group_by='drone')['X-Cache'] == 'HIT'
+        with self.captureOnCommitCallbacks(execute=True):
+            Competition.objects.filter(distance_in_feet=2000).get().delete()
+        response = self.get_stats(group_by='drone')
+        assert response['X-Cache'] == 'MISS'
+        assert [row['group'] for row in response.data['results']] == ['Atom']
+
+
+class CompetitionFilterChoicesTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        quadcopters = DroneCategory.objects.create(name='Quadcopter')
+        self.drone = Drone.objects.create(
+            name='Atom', onwer=user, drone_category=quadcopters, manufacturing_date=timezone.now()
+        )
+        self.pilot = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+        self.idle_pilot = Pilot.objects.create(name='Peter', gender=Pilot.MALE, reces_count=0)
+        self.competition = self.compete(self.pilot)
+
+    def compete(self, pilot):
+        return Competition.objects.create(
+            pilot=pilot, drone=self.drone, distance_in_feet=500, distance_achievement_date='2025-06-22T10:00:00Z'
+        )
+
+    def is_valid(self, pilot_name):
+        return CompetitionFilter(data={'pilot_name': pilot_name}, queryset=Competition.objects.all()).is_valid()
+
+    def test_choices_are_the_names_competitions_reference(self):
+        with CaptureQueriesContext(connection) as first:
+            assert self.is_valid('Gaston')
+        assert len(first.captured_queries) == 1
+        with self.assertNumQueries(0):
+            assert self.is_valid('Gaston')
+        # a name without competitions is looked up before it is rejected
+        with self.assertNumQueries(1):
+            assert not self.is_valid('Peter')
+
+    def test_writes_of_this_process_are_applied_in_place(self):
+        assert self.is_valid('Gaston')
+        with self.captureOnCommitCallbacks(execute=True):
+            competition = self.compete(self.idle_pilot)
+        with self.assertNumQueries(0):
+            assert self.is_valid('Peter')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pilot.name = 'Penelope'
+            self.pilot.save()
+        with self.assertNumQueries(0):
+            assert self.is_valid('Penelope')
+        with self.captureOnCommitCallbacks(execute=True):
+            competition.pilot = self.pilot
+            competition.save()
+        with self.assertNumQueries(1):
+            assert not self.is_valid('Peter')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pilot.delete()
+        with self.assertNumQueries(1):
+            assert not self.is_valid('Penelope')
+
+    def test_writes_of_other_processes_reload_the_choices(self):
+        assert not self.is_valid('Peter')
+        Competition.objects.filter(pk=self.competition.pk).update(pilot=self.idle_pilot)
+        tableversions.set_table_versions(Competition._meta.db_table)
+        # another process bumped the version: one query reloads the choices
+        with self.assertNumQueries(1):
+            assert self.is_valid('Peter')
+        form = CompetitionFilter(queryset=Competition.objects.all()).form
+        assert list(form.fields['pilot_name'].choices) == [('', '---------'), ('Peter', 'Peter')]
+
+    def test_names_written_without_signals_are_accepted(self):
+        assert self.is_valid('Gaston')
+        Competition.objects.bulk_create([Competition(
+            pilot=self.idle_pilot, drone=self.drone, distance_in_feet=100,
+            distance_achievement_date='2025-06-23T10:00:00Z'
+        )])
+        assert self.is_valid('Peter')
+
+    def test_form_lists_the_choices(self):
+        form = CompetitionFilter(queryset=Competition.objects.all()).form
+        assert list(form.fields['pilot_name'].choices) == [('', '---------'), ('Gaston', 'Gaston')]
+
+
+class SharedThrottleTest(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        self.request.user = AnonymousUser()
+        self.now = 1_000_000 * 60
+
+    def get_throttle(self, window):
+        throttle = SharedAnonRateThrottle()
+        throttle.rate = '3/min'
+        throttle.num_requests, throttle.duration = 3, 60
+        throttle.window = window
+        throttle.timer = lambda: self.now
+        return throttle
+
+    def hits(self, window, count):
+        return [self.get_throttle(window).allow_request(self.request, None) for _ in range(count)]
+
+    def test_fixed_window_resets_every_period(self):
+        assert self.hits(FIXED, 4) == [True, True, True, False]
+        throttle = self.get_throttle(FIXED)
+        throttle.allow_request(self.request, None)
+        assert throttle.wait() == 60
+        self.now += 60
+        assert self.hits(FIXED, 4) == [True, True, True, False]
+
+    def test_sliding_window_weights_the_previous_period(self):
+        assert self.hits(SLIDING, 3) == [True, True, True]
+        # a third into the next minute, 3 * 2/3 = 2 earlier requests still count
+        self.now += 80
+        assert self.hits(SLIDING, 2) == [True, False]
+        self.now += 30
+        assert self.hits(SLIDING, 1) == [True]
+
+    def test_cache_store_is_the_default(self):
+        assert isinstance(get_store(), CacheThrottleStore)
+
+
+class SqliteSharedThrottleTest(SharedThrottleTest):
+    def setUp(self):
+        super().setUp()
+        settings_override = self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'THROTTLE_STORE': SQLITE})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_cache_store_is_the_default(self):
+        assert isinstance(get_store(), ThrottleStore)
+
+    def test_counters_are_shared_between_stores(self):
+        # a second connection to the same file stands in for another worker process
+        other = ThrottleStore(get_store().path)
+        assert self.hits(FIXED, 2) == [True, True]
+        assert other.hit('throttle_anon_10.0.0.1:60', 3, 60, self.now, FIXED) == (True, 3, 0)
+        assert self.hits(FIXED, 1) == [False]
+
+
+class AuthenticationCacheTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.token = Token.objects.create(user=self.user)
+        self.pilots_url = reverse(views.PilotList.name)
+        self.drones_url = reverse(views.DroneList.name)
+        customauthentication.reset_stats()
+
+    def get_pilots(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(self.token.key))
+        return self.client.get(self.pilots_url, format='json')
+
+    def get_cache_stats(self, password):
+        credentials = base64.b64encode('user01:{0}'.format(password).encode()).decode()
+        self.client.credentials(HTTP_AUTHORIZATION='Basic {0}'.format(credentials))
+        return self.client.get(reverse(views.CacheStats.name), format='json')
+
+    def test_known_token_runs_no_query(self):
+        assert self.get_pilots().status_code == status.HTTP_200_OK
+        with CaptureQueriesContext(connection) as context:
+            self.get_pilots()
+        assert not any('authtoken_token' in query['sql'] for query in context.captured_queries)
+        assert customauthentication.get_stats()['token'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+    def test_token_key_is_not_cached(self):
+        assert self.get_pilots().status_code == status.HTTP_200_OK
+        entry = cache.get(customauthentication.get_token_cache_key(self.token.key))
+        assert self.token.key not in repr(entry)
+        response = self.get_pilots()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.wsgi_request.auth.key == self.token.key
+        assert response.wsgi_request.auth.user_id == self.user.pk
+
+    def test_deleted_token_is_rejected(self):
+        assert self.get_pilots().status_code == status.HTTP_200_OK
+        self.token.delete()
+        assert self.get_pilots().status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected(self):
+        assert self.get_pilots().status_code == status.HTTP_200_OK
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        assert self.get_pilots().status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_invalidates_basic_credentials(self):
+        self.user.is_staff = True
+        self.user.save()
+        assert self.get_cache_stats('user01P4ssw0rD').status_code == status.HTTP_200_OK
+        with CaptureQueriesContext(connection) as context:
+            assert self.get_cache_stats('user01P4ssw0rD').status_code == status.HTTP_200_OK
+        assert not any('auth_user' in query['sql'] for query in context.captured_queries)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('n3wP4ssw0rD')
+            self.user.save()
+        assert self.get_cache_stats('user01P4ssw0rD').status_code == status.HTTP_401_UNAUTHORIZED
+        assert self.get_cache_stats('n3wP4ssw0rD').status_code == status.HTTP_200_OK
+
+
+class AsyncReadViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.token = Token.objects.create(user=self.user)
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        pilot = Pilot.objects.create(name='Gaston', gender=Pilot.MALE, reces_count=5)
+        for i in range(6):
+            drone = Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=self.user, drone_category=drone_category, manufacturing_date=timezone.now()
+            )
+            Competition.objects.create(
+                pilot=pilot, drone=drone, distance_in_feet=100 * i, distance_achievement_date=timezone.now()
+            )
+        self.pilot = pilot
+
+    def get_both(self, sync_name, async_name, query='', **kwargs):
+        sync_response = self.client.get(reverse(sync_name, kwargs=kwargs) + query, format='json')
+        async_response = self.client.get(reverse(async_name, kwargs=kwargs) + query, format='json')
+        return sync_response, async_response
+
+    def test_lists_match_the_sync_views(self):
+        cases = [
+            (views.DroneCategoryList.name, asyncviews.AsyncDroneCategoryList.name, ''),
+            (views.DroneList.name, asyncviews.AsyncDroneList.name, '?limit=3&offset=2&ordering=-name'),
+            (views.CompetitionList.name, asyncviews.AsyncCompetitionList.name, '?min_distance_in_feet=200'),
+            (views.CompetitionList.name, asyncviews.AsyncCompetitionList.name, '?pagination=cursor&limit=2'),
+        ]
+        for sync_name, async_name, query in cases:
+            sync_response, async_response = self.get_both(sync_name, async_name, query)
+            assert async_response.status_code == status.HTTP_200_OK
+            # next/previous links stay on the async endpoint
+            assert async_response.content.replace(b'/async/', b'/') == sync_response.content
+
+    def test_detail_and_missing_object(self):
+        drone = Drone.objects.first()
+        sync_response, async_response = self.get_both(views.DroneDetail.name, asyncviews.AsyncDroneDetail.name, pk=drone.pk)
+        assert async_response.json() == sync_response.json()
+        response = self.client.get(reverse(asyncviews.AsyncDroneDetail.name, kwargs={'pk': 0}), format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_pilots_require_a_token(self):
+        url = reverse(asyncviews.AsyncPilotDetail.name, kwargs={'pk': self.pilot.pk})
+        assert self.client.get(url, format='json').status_code == status.HTTP_401_UNAUTHORIZED
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(self.token.key))
+        sync_response, async_response = self.get_both(views.PilotDetail.name, asyncviews.AsyncPilotDetail.name, pk=self.pilot.pk)
+        assert async_response.status_code == status.HTTP_200_OK
+        assert async_response.json() == sync_response.json()
+
+    def test_conditional_get_and_cache(self):
+        url = reverse(asyncviews.AsyncDroneList.name)
+        response = self.client.get(url, format='json')
+        assert response['X-Cache'] == 'MISS'
+        response = self.client.get(url, format='json', HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert self.client.get(url, format='json')['X-Cache'] == 'HIT'
+
+
+class FastReadTest(APITestCase):
+    def setUp(self):
+        users = [
+            User.objects.create_user(username=name, email='{0}@example.com'.format(name), password='user01P4ssw0rD')
+            for name in ('user01', 'user02')
+        ]
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        pilots = [Pilot.objects.create(name=name, gender=Pilot.FEMALE, reces_count=3) for name in ('Penelope', 'Gaston')]
+        for i in range(8):
+            drone = Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=users[i % 2],
+                drone_category=drone_category, manufacturing_date=timezone.now()
+            )
+            Competition.objects.create(
+                pilot=pilots[i % 2], drone=drone, distance_in_feet=100 * i, distance_achievement_date=timezone.now()
+            )
+
+    def get_both(self, view_class, query):
+        url = reverse(view_class.name) + query
+        self.assertTrue(view_class.fast_read)
+        fast_response = self.client.get(url, format='json')
+        cache.clear()
+        view_class.fast_read = False
+        try:
+            response = self.client.get(url, format='json')
+        finally:
+            view_class.fast_read = True
+        cache.clear()
+        return fast_response, response
+
+    def test_output_matches_the_serializer(self):
+        cases = [
+            (views.DroneList, ''),
+            (views.DroneList, '?limit=3&offset=2&ordering=-name'),
+            (views.DroneList, '?has_it_completed_missions=false&ordering=manufacturing_date'),
+            (views.CompetitionList, '?min_distance_in_feet=200&pilot_name=Gaston'),
+            (views.CompetitionList, '?pagination=cursor&limit=3&ordering=-distance_in_feet'),
+        ]
+        for view_class, query in cases:
+            fast_response, response = self.get_both(view_class, query)
+            assert fast_response.status_code == status.HTTP_200_OK
+            assert fast_response.content == response.content
+
+    def test_cursor_pages_match_the_serializer(self):
+        fast_response, response = self.get_both(views.CompetitionList, '?pagination=cursor&limit=3')
+        next_url = fast_response.json()['next']
+        assert next_url == response.json()['next']
+        fast_response, response = self.get_both(views.CompetitionList, next_url.split('/competitions/')[1])
+        assert fast_response.content == response.content
+
+    def test_unsupported_serializers_have_no_encoder(self):
+        assert get_row_encoder(DroneCategorySerializer) is None
+        assert get_row_encoder(PilotSerializer) is None
+        assert get_row_encoder(DroneSerializer) is not None
+
+
+versioned_urls = types.ModuleType('versioned_urls')
+versioned_urls.urlpatterns = [
+    path('v1/', include(('drones.urls', 'drones'), namespace='v1')),
+    path('v2/', include(('drones.v2.urls', 'drones_v2'), namespace='v2')),
+]
+
+
+class HyperlinkCacheTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        self.drones = [
+            Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=user, drone_category=self.drone_category, manufacturing_date=timezone.now()
+            )
+            for i in range(5)
+        ]
+        hyperlinks._templates.clear()
+        hyperlinks.reset_stats()
+
+    def get_category(self, path=None, **params):
+        url = path or reverse(views.DroneCategoryDetail.name, kwargs={'pk': self.drone_category.pk})
+        cache.clear()
+        return self.client.get(url, params, format='json')
+
+    def test_links_match_reverse(self):
+        for params in ({}, {'format': 'json'}):
+            response = self.get_category(**params)
+            request = APIRequestFactory().get('/', params)
+            expected = [
+                drf_reverse(views.DroneDetail.name, kwargs={'pk': drone.pk}, request=Request(request))
+                for drone in self.drones
+            ]
+            assert sorted(response.json()['drones']) == sorted(expected)
+
+    def test_urls_are_resolved_once_per_view_name(self):
+        response = self.get_category()
+        # url, drones_url and the drone links
+        assert response['X-Hyperlinks'] == 'links=7, resolved=3'
+        response = self.get_category()
+        assert response['X-Hyperlinks'] == 'links=7, resolved=0'
+        endpoint = hyperlinks.get_stats()['endpoints'][views.DroneCategoryDetail.name]
+        assert endpoint == {'responses': 2, 'links': 14, 'resolved': 3, 'links_per_response': 7.0}
+
+    def test_templates_follow_the_url_namespace(self):
+        pk = self.drone_category.pk
+        with self.settings(ROOT_URLCONF=versioned_urls):
+            v1 = self.get_category('/v1/drone-categories/{0}/'.format(pk)).json()
+            v2 = self.get_category('/v2/vehicle-categories/{0}/'.format(pk)).json()
+        assert v1['url'] == 'http://testserver/v1/drone-categories/{0}/'.format(pk)
+        assert v2['url'] == 'http://testserver/v2/vehicle-categories/{0}/'.format(pk)
+        assert sorted(v1['drones']) == sorted('http://testserver/v1/drones/{0}/'.format(d.pk) for d in self.drones)
+        assert sorted(v2['drones']) == sorted('http://testserver/v2/vehicles/{0}/'.format(d.pk) for d in self.drones)
+
+
+class SparseFieldsetTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        self.pilot = Pilot.objects.create(name='Penelope', gender=Pilot.FEMALE, reces_count=3)
+        self.competitions = []
+        for i in range(3):
+            drone = Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=user, drone_category=drone_category, manufacturing_date=timezone.now()
+            )
+            self.competitions.append(Competition.objects.create(
+                pilot=self.pilot, drone=drone, distance_in_feet=100 * i, distance_achievement_date=timezone.now()
+            ))
+        self.url = reverse(views.PilotDetail.name, kwargs={'pk': self.pilot.pk})
+        self.client.get(self.url, format='json')
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response.json(), len(context.captured_queries)
+
+    def test_fields_drop_unused_queries(self):
+        data, count = self.get(self.url, fields='name')
+        assert data == {'name': 'Penelope'}
+        # the pilot only, no competitions prefetch
+        assert count == 1
+        _, full_count = self.get(self.url)
+        assert full_count == 2
+
+    def test_dotted_fields_reach_nested_serializers(self):
+        data, _ = self.get(self.url, fields='name,competitions.distance_in_feet,competitions.drone.name')
+        assert data == {
+            'name': 'Penelope',
+            'competitions': [
+                {'distance_in_feet': 200, 'drone': {'name': 'Drone 2'}},
+                {'distance_in_feet': 100, 'drone': {'name': 'Drone 1'}},
+                {'distance_in_feet': 0, 'drone': {'name': 'Drone 0'}},
+            ],
+        }
+
+    def test_expand_controls_nested_serializers(self):
+        data, _ = self.get(self.url, fields='competitions', expand='')
+        assert data['competitions'] == [
+            'http://testserver' + reverse(views.CompetitionDetail.name, kwargs={'pk': competition.pk})
+            for competition in reversed(self.competitions)
+        ]
+        data, _ = self.get(self.url, fields='competitions', expand='competitions')
+        competition = data['competitions'][0]
+        assert competition['drone'] == 'http://testserver' + reverse(
+            views.DroneDetail.name, kwargs={'pk': self.competitions[2].drone.pk}
+        )
+        data, _ = self.get(self.url, fields='competitions.drone', expand='competitions.drone')
+        assert data['competitions'][0]['drone']['name'] == 'Drone 2'
+
+    def test_fast_read_lists_honour_fields(self):
+        url = reverse(views.CompetitionList.name)
+        data, _ = self.get(url, fields='pk,pilot', ordering='distance_in_feet')
+        assert data['results'] == [{'pk': competition.pk, 'pilot': 'Penelope'} for competition in self.competitions]
+
+    def test_writes_ignore_fields(self):
+        drone = self.competitions[0].drone
+        self.client.force_authenticate(user=drone.onwer)
+        url = reverse(views.DroneList.name) + '?fields=name'
+        response = self.client.post(url, {'name': 'Drone 3', 'drone_category': 'Quadcopter'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'manufacturing_date' in response.data
+        url = reverse(views.DroneDetail.name, kwargs={'pk': drone.pk}) + '?fields=url'
+        response = self.client.patch(url, {'name': 'Renamed'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['name'] == 'Renamed'
+        drone.refresh_from_db()
+        assert drone.name == 'Renamed'
+
+
+class BoundedNestedCollectionTest(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        self.pilots = [Pilot.objects.create(name=name, gender=Pilot.FEMALE, reces_count=3) for name in ('Gaston', 'Penelope')]
+        for i in range(14):
+            drone = Drone.objects.create(
+                name='Drone {0:02}'.format(i), onwer=user, drone_category=self.drone_category,
+                manufacturing_date=timezone.now()
+            )
+            Competition.objects.create(
+                pilot=self.pilots[i % 2], drone=drone, distance_in_feet=100 * (i // 4), distance_achievement_date=timezone.now()
+            )
+        self.client.get(reverse(views.PilotList.name), format='json')
+
+    def get_all_pages(self, url):
+        results = []
+        while url:
+            response = self.client.get(url, format='json')
+            assert response.status_code == status.HTTP_200_OK
+            results += response.json()['results']
+            url = response.json()['next']
+        return results
+
+    def test_nested_competitions_are_capped(self):
+        pilot = self.pilots[0]
+        url = reverse(views.PilotDetail.name, kwargs={'pk': pilot.pk})
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NESTED_COLLECTION_LIMIT': 3}):
+            with CaptureQueriesContext(connection) as context:
+                data = self.client.get(url, format='json').json()
+        # the pilot and one windowed prefetch
+        assert len(context.captured_queries) == 2
+        competitions = self.get_all_pages(data['competitions_url'])
+        assert len(competitions) == 7
+        assert data['competitions'] == competitions[:3]
+
+    def test_pilot_list_windows_every_pilot(self):
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NESTED_COLLECTION_LIMIT': 2}):
+            results = self.client.get(reverse(views.PilotList.name), format='json').json()['results']
+        for pilot in results:
+            competitions = self.get_all_pages(pilot['competitions_url'])
+            assert pilot['competitions'] == competitions[:2]
+
+    def test_nested_drones_are_capped(self):
+        url = reverse(views.DroneCategoryDetail.name, kwargs={'pk': self.drone_category.pk})
+        data = self.client.get(url, format='json').json()
+        drones = self.get_all_pages(data['drones_url'])
+        assert [drone['name'] for drone in drones] == ['Drone {0:02}'.format(i) for i in range(14)]
+        assert data['drones'] == [drone['url'] for drone in drones[:settings.REST_FRAMEWORK['NESTED_COLLECTION_LIMIT']]]
+
+    def test_missing_parent_is_not_found(self):
+        for name in (views.PilotCompetitionList.name, views.DroneCategoryDroneList.name):
+            response = self.client.get(reverse(name, kwargs={'pk': 0}), format='json')
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class FullTextSearchTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        for name in ('Falcon Racer', 'Racer', 'Heavy Lifter', 'Night Racer Falcon', 'Scout'):
+            self.create_drone(name)
+        for name in ('Penelope Pitstop', 'Peter Perfect', 'Dick Dastardly'):
+            Pilot.objects.create(name=name, gender=Pilot.MALE, reces_count=1)
+
+    def create_drone(self, name):
+        return Drone.objects.create(
+            name=name, onwer=self.user, drone_category=self.drone_category, manufacturing_date=timezone.now()
+        )
+
+    def search(self, view_name, query):
+        response = self.client.get(reverse(view_name), query, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return [item['name'] for item in response.json()['results']]
+
+    def test_drones_match_words_anywhere_in_the_name(self):
+        assert set(self.search(views.DroneList.name, {'search': 'racer'})) == {'Falcon Racer', 'Racer', 'Night Racer Falcon'}
+        assert set(self.search(views.DroneList.name, {'search': 'falc rac'})) == {'Falcon Racer', 'Night Racer Falcon'}
+        assert self.search(views.DroneList.name, {'search': 'submarine'}) == []
+
+    def test_results_are_ranked_unless_ordered(self):
+        assert self.search(views.DroneList.name, {'search': 'racer'})[0] == 'Racer'
+        ordered = self.search(views.DroneList.name, {'search': 'racer', 'ordering': 'name'})
+        assert ordered == ['Falcon Racer', 'Night Racer Falcon', 'Racer']
+
+    def test_index_follows_writes(self):
+        drone = self.create_drone('Stealth Bomber')
+        assert self.search(views.DroneList.name, {'search': 'stealth'}) == ['Stealth Bomber']
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.name = 'Stealth Glider'
+            drone.save()
+        assert self.search(views.DroneList.name, {'search': 'bomber'}) == []
+        assert self.search(views.DroneList.name, {'search': 'glider'}) == ['Stealth Glider']
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.delete()
+        assert self.search(views.DroneList.name, {'search': 'stealth'}) == []
+
+    def test_pilots(self):
+        assert set(self.search(views.PilotList.name, {'search': 'pe'})) == {'Penelope Pitstop', 'Peter Perfect'}
+
+    def test_cursor_pages_follow_the_rank(self):
+        for i in range(6):
+            self.create_drone('Racer {0}'.format(i))
+        url = reverse(views.DroneList.name) + '?search=racer&pagination=cursor&limit=2'
+        names = []
+        while url:
+            response = self.client.get(url, format='json').json()
+            names += [drone['name'] for drone in response['results']]
+            url = response['next']
+        assert len(names) == 9
+        assert names[:8] == self.search(views.DroneList.name, {'search': 'racer', 'limit': 8})
+
+
+class AutocompleteTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        for name in ('Falcon Racer', 'falcon scout', 'Hawk', 'Falconer', 'Eagle'):
+            self.create_drone(name)
+
+    def create_drone(self, name):
+        return Drone.objects.create(
+            name=name, onwer=self.user, drone_category=self.drone_category, manufacturing_date=timezone.now()
+        )
+
+    def complete(self, query, view_name=views.DroneAutocomplete.name):
+        response = self.client.get(reverse(view_name), query, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return [match['name'] for match in response.json()]
+
+    def test_prefix_matches_ignore_case(self):
+        assert self.complete({'search': 'FAL'}) == ['Falcon Racer', 'falcon scout', 'Falconer']
+        assert self.complete({'search': 'falcon s'}) == ['falcon scout']
+        assert self.complete({'search': 'fal', 'limit': 2}) == ['Falcon Racer', 'falcon scout']
+        assert self.complete({'search': 'x'}) == []
+        assert self.complete({}) == []
+        assert self.complete({'search': 'q'}, views.DroneCategoryAutocomplete.name) == ['Quadcopter']
+
+    def test_matches_the_search_path(self):
+        for prefix in ('f', 'falcon', 'h', 'eag'):
+            response = self.client.get(reverse(views.DroneList.name), {'search': prefix, 'ordering': 'name', 'limit': 8})
+            names = [drone['name'] for drone in response.json()['results']]
+            assert sorted(self.complete({'search': prefix}), key=str.casefold) == sorted(names, key=str.casefold)
+
+    def test_returns_pks(self):
+        drone = Drone.objects.get(name='Hawk')
+        response = self.client.get(reverse(views.DroneAutocomplete.name), {'search': 'ha'})
+        assert response.json() == [{'pk': drone.pk, 'name': 'Hawk'}]
+
+    def test_writes_are_applied(self):
+        assert self.complete({'search': 'hawk'}) == ['Hawk']
+        with self.captureOnCommitCallbacks(execute=True):
+            drone = self.create_drone('Hawkeye')
+        assert self.complete({'search': 'hawk'}) == ['Hawk', 'Hawkeye']
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.name = 'Sparrow'
+            drone.save()
+        assert self.complete({'search': 'hawk'}) == ['Hawk']
+        with self.captureOnCommitCallbacks(execute=True):
+            drone.delete()
+        assert self.complete({'search': 'sp'}) == []
+
+    def test_writes_of_other_processes_reload_the_index(self):
+        assert self.complete({'search': 'hawk'}) == ['Hawk']
+        Drone.objects.filter(name='Hawk').update(name='Hawkmoth')
+        assert self.complete({'search': 'hawk'}) == ['Hawk']
+        tableversions.set_table_versions(Drone._meta.db_table)
+        assert self.complete({'search': 'hawk'}) == ['Hawkmoth']
+
+    def test_pilots_require_authentication(self):
+        Pilot.objects.create(name='Penelope', gender=Pilot.FEMALE, reces_count=1)
+        url = reverse(views.PilotAutocomplete.name)
+        assert self.client.get(url, {'search': 'pe'}).status_code == status.HTTP_401_UNAUTHORIZED
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        assert self.complete({'search': 'pe'}, views.PilotAutocomplete.name) == ['Penelope']
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse(views.DroneAutocomplete.name), {'search': 'f', 'limit': 'ten'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class QueryPlanRegressionTest(APITestCase):
+    """
+    EXPLAINs every query of the hot drone and competition paths and fails
+    when one reads a whole table without an index, or sorts every row of
+    it. Counting every row of a table is the only full read allowed.
+    """
+    tables = ('drones_competition', 'drones_drone')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.drone_category = DroneCategory.objects.create(name='Quadcopter')
+        self.pilot = Pilot.objects.create(name='Penelope', gender=Pilot.FEMALE, reces_count=3)
+        for i in range(6):
+            drone = Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=self.user, drone_category=self.drone_category,
+                manufacturing_date=timezone.now(), has_it_completed_missions=i % 2 == 0
+            )
+            Competition.objects.create(
+                pilot=self.pilot, drone=drone, distance_in_feet=100 * i, distance_achievement_date=timezone.now()
+            )
+
+    def get_paths(self):
+        drone_category_drones = reverse(views.DroneCategoryDroneList.name, kwargs={'pk': self.drone_category.pk})
+        return [
+            reverse(views.CompetitionList.name),
+            reverse(views.CompetitionList.name) + '?pagination=cursor',
+            reverse(views.CompetitionList.name) + '?min_distance_in_feet=100&max_distance_in_feet=400',
+            reverse(views.CompetitionList.name) + '?from_achievement_date=2025-01-01T00:00:00Z&ordering=distance_achievement_date',
+            reverse(views.CompetitionList.name) + '?ordering=-distance_achievement_date&pagination=cursor',
+            reverse(views.CompetitionList.name) + '?drone_name=Drone%201',
+            reverse(views.CompetitionList.name) + '?pilot_name=Penelope&ordering=-distance_in_feet',
+            reverse(views.PilotCompetitionList.name, kwargs={'pk': self.pilot.pk}),
+            reverse(views.PilotDetail.name, kwargs={'pk': self.pilot.pk}),
+            reverse(views.DroneList.name),
+            reverse(views.DroneList.name) + '?pagination=cursor&ordering=manufacturing_date',
+            reverse(views.DroneList.name) + '?has_it_completed_missions=true',
+            reverse(views.DroneList.name) + '?has_it_completed_missions=false&ordering=-manufacturing_date',
+            reverse(views.DroneList.name) + '?drone_category={0}'.format(self.drone_category.pk),
+            reverse(views.DroneList.name) + '?search=drone',
+            reverse(views.DroneCategoryDetail.name, kwargs={'pk': self.drone_category.pk}),
+            drone_category_drones,
+            drone_category_drones + '?limit=2',
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # with both disabled, a plan still holding one has no alternative
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+                cursor.execute('EXPLAIN ' + sql)
+                return [row[0].strip() for row in cursor.fetchall()]
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def get_problems(self, sql, plan):
+        if sql.startswith('SELECT COUNT(*)') and ' WHERE ' not in sql:
+            return []
+        postgresql = connection.vendor == 'postgresql'
+        if postgresql:
+            sorts = any(line.lstrip('-> ').startswith('Sort') for line in plan)
+        else:
+            sorts = any('TEMP B-TREE FOR ORDER BY' in line for line in plan)
+        problems = []
+        for table in self.tables:
+            if postgresql:
+                full_scan = any('Seq Scan on {0} '.format(table) in line for line in plan)
+                # an index scan without a condition reads the whole index
+                scans = any(' on {0} '.format(table) in line for line in plan) and not any('Cond' in line for line in plan)
+            else:
+                full_scan = 'SCAN {0}'.format(table) in plan
+                scans = any(line.startswith('SCAN {0} '.format(table)) for line in plan)
+            if full_scan:
+                problems.append('full scan of {0}'.format(table))
+            elif sorts and scans:
+                problems.append('sort of every row of {0}'.format(table))
+        return problems
+
+    def test_hot_paths_use_indexes(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN output is only parsed for SQLite and PostgreSQL.')
+        failures = []
+        for path in self.get_paths():
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path, format='json')
+            assert response.status_code == status.HTTP_200_OK, path
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or not any('"{0}"'.format(table) in sql for table in self.tables):
+                    continue
+                plan = self.explain(sql)
+                for problem in self.get_problems(sql, plan):
+                    failures.append('{0}: {1}\n  {2}\n  {3}'.format(path, problem, sql, '\n  '.join(plan)))
+        assert not failures, '\n'.join(failures)
+
+    def test_detects_a_full_scan(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Checks the SQLite plan parsing.')
+        sql = 'SELECT * FROM "drones_competition" WHERE "drones_competition"."updated_timestamp" > 0 ORDER BY "drones_competition"."updated_timestamp"'
+        assert self.get_problems(sql, self.explain(sql)) == ['full scan of drones_competition']
+        sql = 'SELECT * FROM "drones_drone" ORDER BY "drones_drone"."inserted_timestamp" LIMIT 4'
+        assert self.get_problems(sql, self.explain(sql)) == ['full scan of drones_drone']
+        sql = 'SELECT * FROM "drones_drone" INDEXED BY "drone_manufacturing_idx" ORDER BY "drones_drone"."name" LIMIT 4'
+        assert self.get_problems(sql, self.explain(sql)) == ['sort of every row of drones_drone']
+        sql = 'SELECT COUNT(*) FROM "drones_drone"'
+        assert self.get_problems(sql, self.explain(sql)) == []
+
+
+class PerformanceMetricsTest(APITestCase):
+    def setUp(self):
+        performance.reset_stats()
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        drone_category = DroneCategory.objects.create(name='Quadcopter')
+        for i in range(3):
+            Drone.objects.create(
+                name='Drone {0}'.format(i), onwer=self.user, drone_category=drone_category, manufacturing_date=timezone.now()
+            )
+
+    def get_server_timing(self, response):
+        metrics = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_reports_every_phase(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(views.DroneList.name), format='json')
+        metrics = self.get_server_timing(response)
+        assert set(metrics) == {'db', 'auth', 'throttle', 'serialize', 'render', 'total'}
+        assert metrics['db']['desc'] == '"{0} queries"'.format(len(context.captured_queries))
+        assert all(float(metric['dur']) >= 0 for metric in metrics.values())
+        assert float(metrics['total']['dur']) >= float(metrics['serialize']['dur'])
+
+    def test_server_timing_can_be_disabled(self):
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'SERVER_TIMING': False}):
+            response = self.client.get(reverse(views.DroneList.name), format='json')
+        assert 'Server-Timing' not in response
+        assert 'api_requests_total{endpoint="drone-list",method="GET",status="200"} 1' in performance.get_metrics()
+
+    def test_metrics_are_prometheus_histograms(self):
+        for _ in range(3):
+            self.client.get(reverse(views.DroneList.name), format='json')
+        self.client.get('/no-such-page/')
+        response = self.client.get(reverse(views.Metrics.name))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+        lines = response.content.decode('utf-8').splitlines()
+        assert '# TYPE api_request_duration_seconds histogram' in lines
+        assert 'api_request_duration_seconds_bucket{endpoint="drone-list",method="GET",le="+Inf"} 3' in lines
+        assert 'api_request_duration_seconds_count{endpoint="drone-list",method="GET"} 3' in lines
+        assert 'api_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in lines
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in lines
+            if line.startswith('api_response_size_bytes_bucket{endpoint="drone-list"')
+        ]
+        assert buckets == sorted(buckets) and buckets[-1] == 3
+
+    def test_metrics_are_internal(self):
+        url = reverse(views.Metrics.name)
+        with self.settings(INTERNAL_IPS=[]):
+            assert self.client.get(url).status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+            self.user.is_staff = True
+            self.user.save()
+            self.client.force_authenticate(user=self.user)
+            assert self.client.get(url).status_code == status.HTTP_200_OK
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    sizes = (1, 4, 8)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user01', email='user01@example.com', password='user01P4ssw0rD')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {0}'.format(token.key))
+        self.fixtures = {size: self.create_fixtures(size) for size in self.sizes}
+
+    def create_fixtures(self, size):
+        """
+        size categories, drones and pilots; the first category holds every
+        drone and the first pilot flew each of them.
+        """
+        categories = [DroneCategory.objects.create(name='Size {0} category {1}'.format(size, i)) for i in range(size)]
+        drones = [
+            Drone.objects.create(
+                name='Size {0} drone {1}'.format(size, i),
+                onwer=self.user,
+                drone_category=categories[0],
+                manufacturing_date=timezone.now(),
+            )
+            for i in range(size)
+        ]
+        pilots = [Pilot.objects.create(name='Size {0} pilot {1}'.format(size, i), reces_count=i) for i in range(size)]
+        competitions = []
+        for i, (pilot, drone) in enumerate(zip(pilots, drones)):
+            competitions.append(Competition.objects.create(
+                pilot=pilot, drone=drone, distance_in_feet=100 + i, distance_achievement_date=timezone.now()
+            ))
+            if i:
+                competitions.append(Competition.objects.create(
+                    pilot=pilots[0], drone=drone, distance_in_feet=100 + i, distance_achievement_date=timezone.now()
+                ))
+        return {
+            views.DroneCategoryDetail: categories[0],
+            views.DroneCategoryDroneList: categories[0],
+            views.DroneDetail: drones[0],
+            views.PilotDetail: pilots[0],
+            views.PilotCompetitionList: pilots[0],
+            views.CompetitionDetail: competitions[0],
+        }
+
+    def get_url(self, view_class, size):
+        fixtures = self.fixtures[size]
+        if view_class in fixtures:
+            url = reverse(view_class.name, kwargs={'pk': fixtures[view_class].pk})
+        else:
+            url = reverse(view_class.name)
+        if issubclass(view_class, views.LeaderboardList):
+            return url + '?' + urlencode({'top': size})
+        if issubclass(view_class, views.AutocompleteList):
+            return url + '?' + urlencode({'search': 'size', 'limit': size})
+        if issubclass(view_class, ListModelMixin):
+            return url + '?' + urlencode({'limit': size})
+        return url
+
+    def get_budgeted_views(self):
+        return [
+            pattern.callback.view_class for pattern in drones_urls.urlpatterns
+            if querybudget.get_query_budget(getattr(pattern.callback, 'view_class', None)) is not None
+        ]
+
+    def test_every_read_endpoint_has_a_budget(self):
+        read_views = {
+            pattern.callback.view_class for pattern in drones_urls.urlpatterns
+            if issubclass(getattr(pattern.callback, 'view_class', object), (ListModelMixin, RetrieveModelMixin))
+        }
+        assert read_views <= set(self.get_budgeted_views())
+
+    def test_endpoints_stay_within_their_query_budgets(self):
+        for view_class in self.get_budgeted_views():
+            urls = [(size, self.get_url(view_class, size)) for size in self.sizes]
+            self.check_query_budget(querybudget.get_query_budget(view_class), urls)
+
+    def test_normalize_sql_groups_statements_by_shape(self):
+        first = querybudget.normalize_sql(
+            'SELECT "a"."id" FROM "a" WHERE ("a"."name" = \'it\'\'s\' AND "a"."id" IN (1, 2, 3)) LIMIT 21'
+        )
+        second = querybudget.normalize_sql(
+            'SELECT "a"."id"  FROM "a"\nWHERE ("a"."name" = \'x\' AND "a"."id" IN (4)) LIMIT 8'
+        )
+        assert first == second == 'SELECT "a"."id" FROM "a" WHERE ("a"."name" = ? AND "a"."id" IN (?)) LIMIT ?'
+
+    def test_detects_an_n_plus_one(self):
+        runs = []
+        for size in self.sizes:
+            with querybudget.QueryShapes(connection) as context:
+                [drone.drone_category.name for drone in Drone.objects.filter(name__startswith='Size {0} '.format(size))]
+            runs.append((size, context.shapes))
+        growing = querybudget.find_growing_shapes(runs)
+        assert list(growing.values()) == [[1, 4, 8]]
+        assert 'FROM "drones_dronecategory"' in list(growing)[0]
+
+    def test_fails_an_endpoint_over_its_budget(self):
+        url = reverse(views.PilotList.name)
+        urls = [(size, url + '?' + urlencode({'limit': size})) for size in self.sizes]
+        # without the query planner every pilot's competitions are a query
+        with mock.patch.object(views.PilotList, 'get_queryset', lambda view: Pilot.objects.order_by('pk')):
+            with self.assertRaises(AssertionError) as raised:
+                self.check_query_budget(views.PilotList.query_budget, urls)
+        assert 'N+1: ' in str(raised.exception)
+
+
+class SeedDronesTest(TestCase):
+    options = {'categories': 5, 'drones': 60, 'pilots': 100, 'competitions': 2000, 'owners': 3, 'batch_size': 500}
+
+    def seed(self, **options):
+        output = io.StringIO()
+        call_command('seed_drones', stdout=output, **{**self.options, **options})
+        return output.getvalue()
+
+    def get_dataset(self):
+        return (
+            list(DroneCategory.objects.order_by('pk').values_list('name')),
+            list(Drone.objects.order_by('pk').values_list(
+                'name', 'onwer__username', 'drone_category__name', 'manufacturing_date', 'has_it_completed_missions'
+            )),
+            list(Pilot.objects.order_by('pk').values_list('name', 'gender', 'reces_count')),
+            list(Competition.objects.order_by('pk').values_list(
+                'pilot__name', 'drone__name', 'distance_in_feet', 'distance_achievement_date'
+            )),
+        )
+
+    def test_seeds_every_model(self):
+        output = self.seed()
+        assert DroneCategory.objects.count() == 5
+        assert Drone.objects.count() == 60
+        assert Pilot.objects.count() == 100
+        assert Competition.objects.count() == 2000
+        assert 'competitions: 2,000 rows' in output
+        assert 'run rebuild_leaderboards' in output
+
+    def seed_and_roll_back(self, seed, **options):
+        savepoint = transaction.savepoint()
+        self.seed(seed=seed, **options)
+        dataset = self.get_dataset()
+        transaction.savepoint_rollback(savepoint)
+        return dataset
+
+    def test_same_seed_same_dataset(self):
+        first = self.seed_and_roll_back(7)
+        assert self.seed_and_roll_back(7) == first
+        # batches are built from their own generator, whoever builds them
+        assert self.seed_and_roll_back(7, workers=2) == first
+        assert self.seed_and_roll_back(8) != first
+
+    def test_few_pilots_have_most_competitions(self):
+        self.seed()
+        counts = sorted(
+            Competition.objects.order_by().values('pilot').annotate(count=Count('pk')).values_list('count', flat=True),
+            reverse=True
+        )
+        # a uniform spread would give every pilot about 20
+        assert counts[0] > 200
+        assert sum(counts[:5]) > 2000 * 0.3
+
+    def test_rows_are_searchable_and_ranked(self):
+        self.seed(rebuild_leaderboards=True)
+        drone = Drone.objects.order_by('pk').first()
+        assert drone in search.search(Drone.objects.all(), drone.name)
+        # the triggers are back for rows saved later
+        pilot = Pilot.objects.create(name='Zebulon Quartz', reces_count=1)
+        assert list(search.search(Pilot.objects.all(), 'zebulon')) == [pilot]
+        assert LeaderboardEntry.objects.filter(board=LeaderboardEntry.PILOT, period=LeaderboardEntry.ALL_TIME).exists()
@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from . import asyncviews
 
 
 
@@ -7,18 +8,45 @@ urlpatterns = [
     # Drone Categories
     path('drone-categories/', views.DroneCategoryList.as_view(), name=views.DroneCategoryList.name),
     path('drone-categories/<int:pk>/', views.DroneCategoryDetail.as_view(), name=views.DroneCategoryDetail.name),
+    path('drone-categories/autocomplete/', views.DroneCategoryAutocomplete.as_view(), name=views.DroneCategoryAutocomplete.name),
+    path('drone-categories/<int:pk>/drones/', views.DroneCategoryDroneList.as_view(), name=views.DroneCategoryDroneList.name),
 
     # Drones
     path('drones/', views.DroneList.as_view(), name=views.DroneList.name),
     path('drones/<int:pk>/', views.DroneDetail.as_view(), name=views.DroneDetail.name),
+    path('drones/autocomplete/', views.DroneAutocomplete.as_view(), name=views.DroneAutocomplete.name),
 
     # Pilots
     path('pilots/', views.PilotList.as_view(), name=views.PilotList.name),
     path('pilots/<int:pk>/', views.PilotDetail.as_view(), name=views.PilotDetail.name),
+    path('pilots/autocomplete/', views.PilotAutocomplete.as_view(), name=views.PilotAutocomplete.name),
+    path('pilots/<int:pk>/competitions/', views.PilotCompetitionList.as_view(), name=views.PilotCompetitionList.name),
 
     # Competitions
     path('competitions/', views.CompetitionList.as_view(), name=views.CompetitionList.name),
     path('competitions/<int:pk>/', views.CompetitionDetail.as_view(), name=views.CompetitionDetail.name),
+    path('competitions/export/', views.CompetitionExport.as_view(), name=views.CompetitionExport.name),
+    path('competitions/bulk/', views.CompetitionBulkCreate.as_view(), name=views.CompetitionBulkCreate.name),
+    path('competitions/stats/', views.CompetitionStats.as_view(), name=views.CompetitionStats.name),
+
+    path('leaderboards/pilots/', views.PilotLeaderboard.as_view(), name=views.PilotLeaderboard.name),
+    path('leaderboards/drones/', views.DroneLeaderboard.as_view(), name=views.DroneLeaderboard.name),
+
+    # Async read endpoints
+    path('async/drone-categories/', asyncviews.AsyncDroneCategoryList.as_view(), name=asyncviews.AsyncDroneCategoryList.name),
+    path('async/drone-categories/<int:pk>/', asyncviews.AsyncDroneCategoryDetail.as_view(), name=asyncviews.AsyncDroneCategoryDetail.name),
+    path('async/drones/', asyncviews.AsyncDroneList.as_view(), name=asyncviews.AsyncDroneList.name),
+    path('async/drones/<int:pk>/', asyncviews.AsyncDroneDetail.as_view(), name=asyncviews.AsyncDroneDetail.name),
+    path('async/pilots/', asyncviews.AsyncPilotList.as_view(), name=asyncviews.AsyncPilotList.name),
+    path('async/pilots/<int:pk>/', asyncviews.AsyncPilotDetail.as_view(), name=asyncviews.AsyncPilotDetail.name),
+    path('async/competitions/', asyncviews.AsyncCompetitionList.as_view(), name=asyncviews.AsyncCompetitionList.name),
+    path('async/competitions/<int:pk>/', asyncviews.AsyncCompetitionDetail.as_view(), name=asyncviews.AsyncCompetitionDetail.name),
+
+    # Cache statistics
+    path('cache-stats/', views.CacheStats.as_view(), name=views.CacheStats.name),
+
+    # Per-endpoint timing histograms (Prometheus text format)
+    path('metrics/', views.Metrics.as_view(), name=views.Metrics.name),
 
     # Root endpoint
     path('', views.ApiRoot.as_view(), name=views.ApiRoot.name),
@@ -7,15 +7,26 @@ app_name = 'drones_v2'
 urlpatterns = [
     path('vehicle-categories/', views.DroneCategoryList.as_view(), name=views.DroneCategoryList.name),
     path('vehicle-categories/<int:pk>/', views.DroneCategoryDetail.as_view(), name=views.DroneCategoryDetail.name),
+    path('vehicle-categories/autocomplete/', views.DroneCategoryAutocomplete.as_view(), name=views.DroneCategoryAutocomplete.name),
+    path('vehicle-categories/<int:pk>/vehicles/', views.DroneCategoryDroneList.as_view(), name=views.DroneCategoryDroneList.name),
 
     path('vehicles/', views.DroneList.as_view(), name=views.DroneList.name),
     path('vehicles/<int:pk>/', views.DroneDetail.as_view(), name=views.DroneDetail.name),
+    path('vehicles/autocomplete/', views.DroneAutocomplete.as_view(), name=views.DroneAutocomplete.name),
 
     path('pilots/', views.PilotList.as_view(), name=views.PilotList.name),
     path('pilots/<int:pk>/', views.PilotDetail.as_view(), name=views.PilotDetail.name),
+    path('pilots/autocomplete/', views.PilotAutocomplete.as_view(), name=views.PilotAutocomplete.name),
+    path('pilots/<int:pk>/competitions/', views.PilotCompetitionList.as_view(), name=views.PilotCompetitionList.name),
 
     path('competitions/', views.CompetitionList.as_view(), name=views.CompetitionList.name),
     path('competitions/<int:pk>/', views.CompetitionDetail.as_view(), name=views.CompetitionDetail.name),
+    path('competitions/export/', views.CompetitionExport.as_view(), name=views.CompetitionExport.name),
+    path('competitions/bulk/', views.CompetitionBulkCreate.as_view(), name=views.CompetitionBulkCreate.name),
+    path('competitions/stats/', views.CompetitionStats.as_view(), name=views.CompetitionStats.name),
+
+    path('leaderboards/pilots/', views.PilotLeaderboard.as_view(), name=views.PilotLeaderboard.name),
+    path('leaderboards/drones/', views.DroneLeaderboard.as_view(), name=views.DroneLeaderboard.name),
 
     path('', views_v2.ApiRootVersion2.as_view(), name=views_v2.ApiRootVersion2.name),
 ]
\ No newline at end of file
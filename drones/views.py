@@ -1,24 +1,46 @@
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
-from .models import Pilot, Drone, Competition, DroneCategory
+from .models import Pilot, Drone, Competition, DroneCategory, LeaderboardEntry
 from .serializers import PilotSerializer, DroneSerializer, CompetitionSerializer, PilotCompetitionSerializer, DroneCategorySerializer
+from .serializers import PilotLeaderboardEntrySerializer, DroneLeaderboardEntrySerializer
 from rest_framework import filters
 from django_filters import AllValuesFilter, DateFilter , NumberFilter
 from .filters import CompetitionFilter
 from rest_framework import permissions
 from  drones import custompermission
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.throttling import ScopedRateThrottle
+from .customauthentication import CachedTokenAuthentication
+from .customthrottling import SharedScopedRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
+from .queryplanner import QueryPlanMixin
+from .fastread import FastReadMixin
+from .responsecache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .hyperlinks import HyperlinkStatsMixin
+from .performance import PerformanceMixin, PrometheusRenderer
+from drones import responsecache
+from drones import customauthentication
+from drones import hyperlinks
+from drones import performance
+from drones import export
+from drones import bulk
+from drones import leaderboard
+from drones import stats
+from drones import autocomplete
+from drones.apisettings import get_setting
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
 
 
-class DroneCategoryList(generics.ListCreateAPIView):
+class DroneCategoryList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = DroneCategory.objects.all()
     serializer_class = DroneCategorySerializer
     name = 'dronecategory-list'
+    query_budget = 3
+    cache_responses = True
     
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ('name',)
@@ -26,21 +48,26 @@ class DroneCategoryList(generics.ListCreateAPIView):
     ordering_fields = ('name',)
         
 
-class DroneCategoryDetail(generics.RetrieveUpdateDestroyAPIView):
+class DroneCategoryDetail(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = DroneCategory.objects.all()
     serializer_class = DroneCategorySerializer
     name = 'dronecategory-detail'
+    query_budget = 2
+    cache_responses = True
     
     
-class DroneList(generics.ListCreateAPIView):
+class DroneList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, QueryPlanMixin, generics.ListCreateAPIView):
     throttle_scope = 'drones'
-    throttle_classes = (ScopedRateThrottle,)
+    throttle_classes = (SharedScopedRateThrottle,)
     
     queryset = Drone.objects.all()
     serializer_class = DroneSerializer
     name = 'drone-list'
+    query_budget = 2
+    cache_responses = True
+    fast_read = True
     
-    filter_fields = ('name', 'drone_category', 'manufacturing_date', 'has_it_completed_missions')
+    filterset_fields = ('name', 'drone_category', 'manufacturing_date', 'has_it_completed_missions')
     search_fields = ('^name',)
     ordering_fields = ('name','manufacturing_date')
     
@@ -50,54 +77,69 @@ class DroneList(generics.ListCreateAPIView):
     )
     
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        serializer.save(onwer=self.request.user)
     
     
-class DroneDetail(generics.RetrieveUpdateDestroyAPIView):
+class DroneDetail(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     throttle_scope = 'drones'
-    throttle_classes = (ScopedRateThrottle,)    
+    throttle_classes = (SharedScopedRateThrottle,)    
     queryset = Drone.objects.all()
     serializer_class = DroneSerializer
     name = 'drone-detail'
+    query_budget = 1
+    cache_responses = True
     
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly, 
         custompermission.IsCurrentUserOwnerOrReadOnly
         )
     
-class PilotList(generics.ListCreateAPIView):
+class PilotList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, QueryPlanMixin, generics.ListCreateAPIView):
     throttle_scope = 'pilots'
-    throttle_classes = (ScopedRateThrottle,)
+    throttle_classes = (SharedScopedRateThrottle,)
     queryset = Pilot.objects.all()
     serializer_class = PilotSerializer
     name = 'pilot-list'
+    query_budget = 4
     
-    filter_fields = ('name', 'gender', 'reces_count')
+    filterset_fields = ('name', 'gender', 'reces_count')
     search_fields = ('^name',)
     ordering_fields = ('name', 'reces_count')
     
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     
-class PilotDetail(generics.RetrieveUpdateDestroyAPIView):
+class PilotDetail(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     throttle_scope = 'pilots'
-    throttle_classes = (ScopedRateThrottle,)
+    throttle_classes = (SharedScopedRateThrottle,)
     queryset = Pilot.objects.all()
     serializer_class = PilotSerializer
     name = 'pilot-detail'
-    authentication_classes = (TokenAuthentication,)
+    query_budget = 3
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     
     
-class CompetitionList(generics.ListCreateAPIView):
+class CompetitionList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Competition.objects.all()
     serializer_class = PilotCompetitionSerializer
     name = 'competition-list'
+    query_budget = 2
+    cache_responses = True
+    fast_read = True
+    cursor_ordering = ('-distance_in_feet', '-pk')
+    filterset_class = CompetitionFilter
+    ordering_fields = (
+        'distance_in_feet', 
+        'distance_achievement_date'
+        )
     
-class CompetitionDetail(generics.RetrieveUpdateDestroyAPIView):
+class CompetitionDetail(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Competition.objects.all()
     serializer_class = PilotCompetitionSerializer
     name = 'competition-detail'
+    query_budget = 1
+    cache_responses = True
     filterset_class = CompetitionFilter
     ordering_fields = (
         'distance_in_feet', 
@@ -106,7 +148,247 @@ class CompetitionDetail(generics.RetrieveUpdateDestroyAPIView):
     
     
     
-class ApiRoot(generics.GenericAPIView):
+class PilotCompetitionList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, QueryPlanMixin, generics.ListAPIView):
+    """
+    Every competition of a pilot, cursor paged in the order of the capped
+    PilotSerializer.competitions list.
+    """
+    throttle_scope = 'pilots'
+    throttle_classes = (SharedScopedRateThrottle,)
+    queryset = Competition.objects.all()
+    serializer_class = CompetitionSerializer
+    name = 'pilot-competition-list'
+    query_budget = 3
+    pagination_mode = 'cursor'
+    filter_backends = ()
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        pilot = get_object_or_404(Pilot.objects.only('pk'), pk=self.kwargs['pk'])
+        return super().get_queryset().filter(pilot=pilot)
+
+
+class DroneCategoryDroneList(PerformanceMixin, HyperlinkStatsMixin, ConditionalGetMixin, CachedResponseMixin, FastReadMixin, QueryPlanMixin, generics.ListAPIView):
+    """
+    Every drone of a category, cursor paged in the order of the capped
+    DroneCategorySerializer.drones list.
+    """
+    throttle_scope = 'drones'
+    throttle_classes = (SharedScopedRateThrottle,)
+    queryset = Drone.objects.all()
+    serializer_class = DroneSerializer
+    name = 'dronecategory-drone-list'
+    query_budget = 2
+    cache_responses = True
+    fast_read = True
+    pagination_mode = 'cursor'
+    filter_backends = ()
+
+    def get_queryset(self):
+        drone_category = get_object_or_404(DroneCategory.objects.only('pk'), pk=self.kwargs['pk'])
+        return super().get_queryset().filter(drone_category=drone_category)
+
+
+class CompetitionBulkCreate(PerformanceMixin, generics.GenericAPIView):
+    queryset = Competition.objects.all()
+    name = 'competition-bulk-create'
+    max_batch_size = 5000
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of competitions.']})
+        if len(items) > self.max_batch_size:
+            raise ValidationError({'non_field_errors': ['At most {0} competitions per batch.'.format(self.max_batch_size)]})
+        all_or_nothing = request.query_params.get('atomic', '').lower() in ('1', 'true', 'yes')
+        results, errors = bulk.bulk_create_competitions(items, all_or_nothing=all_or_nothing)
+        created = [competition.pk if competition else None for competition in results]
+        data = {
+            'created': sum(pk is not None for pk in created),
+            'results': created,
+            'errors': errors,
+        }
+        if not errors:
+            return Response(data, status=status.HTTP_201_CREATED)
+        if all_or_nothing or not data['created']:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_207_MULTI_STATUS)
+
+
+class CompetitionExport(PerformanceMixin, generics.GenericAPIView):
+    queryset = Competition.objects.all()
+    name = 'competition-export'
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = CompetitionFilter
+    ordering_fields = (
+        'distance_in_feet',
+        'distance_achievement_date'
+        )
+    # primary key order streams straight off the index
+    ordering = ('pk',)
+    export_columns = ('pk', 'distance_in_feet', 'distance_achievement_date', 'pilot__name', 'drone__name')
+    export_fields = ('pk', 'distance_in_feet', 'distance_achievement_date', 'pilot', 'drone')
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', export.NDJSON)
+        if export_format not in export.CONTENT_TYPES:
+            raise ValidationError({'export_format': 'Expected one of {0}.'.format(', '.join(export.CONTENT_TYPES))})
+        queryset = self.filter_queryset(self.get_queryset())
+        return export.streaming_response(
+            queryset, self.export_columns, self.export_fields, export_format, filename='competitions'
+        )
+
+
+class CompetitionStats(PerformanceMixin, ConditionalGetMixin, CachedResponseMixin, generics.GenericAPIView):
+    queryset = Competition.objects.all()
+    name = 'competition-stats'
+    query_budget = 1
+    cache_responses = True
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = CompetitionFilter
+
+    def get_dependency_models(self):
+        return {Competition, Pilot, Drone, DroneCategory}
+
+    def get(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            request, lambda: self.get_cached_response(request, lambda: self.build_response(request))
+        )
+
+    def build_response(self, request):
+        group_by = request.query_params.get('group_by', 'pilot')
+        if group_by not in stats.GROUPINGS:
+            raise ValidationError({'group_by': 'Expected one of {0}.'.format(', '.join(stats.GROUPINGS))})
+        try:
+            percentiles = stats.parse_percentiles(request.query_params.get('percentiles'))
+        except ValueError:
+            raise ValidationError({'percentiles': 'Expected up to {0} comma separated integers between 1 and 100.'.format(stats.MAX_PERCENTILES)})
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response({
+            'group_by': group_by,
+            'results': stats.competition_stats(queryset, group_by, percentiles),
+        })
+
+
+class LeaderboardList(PerformanceMixin, ConditionalGetMixin, CachedResponseMixin, QueryPlanMixin, generics.ListAPIView):
+    queryset = LeaderboardEntry.objects.all()
+    query_budget = 1
+    cache_responses = True
+    pagination_class = None
+    filter_backends = ()
+    board = None
+    default_top = 10
+    max_top = 100
+
+    def get_queryset(self):
+        period = self.request.query_params.get('period', LeaderboardEntry.ALL_TIME)
+        if not leaderboard.validate_period(period):
+            raise ValidationError({'period': 'Expected all, a year (2025) or a month (2025-06).'})
+        try:
+            top = min(max(int(self.request.query_params.get('top', self.default_top)), 1), self.max_top)
+        except ValueError:
+            raise ValidationError({'top': 'A valid integer is required.'})
+        drone_category_id = None
+        category = self.request.query_params.get('category')
+        if category:
+            drone_category_id = DroneCategory.objects.filter(name=category).values_list('pk', flat=True).first()
+            if drone_category_id is None:
+                return LeaderboardEntry.objects.none()
+        return leaderboard.ranked(super().get_queryset().filter(
+            board=self.board,
+            period=period,
+            drone_category_id=drone_category_id
+        ))[:top]
+
+
+class PilotLeaderboard(LeaderboardList):
+    serializer_class = PilotLeaderboardEntrySerializer
+    name = 'pilot-leaderboard'
+    query_budget = 2
+    board = LeaderboardEntry.PILOT
+    throttle_scope = 'pilots'
+    throttle_classes = (SharedScopedRateThrottle,)
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+
+class DroneLeaderboard(LeaderboardList):
+    serializer_class = DroneLeaderboardEntrySerializer
+    name = 'drone-leaderboard'
+    board = LeaderboardEntry.DRONE
+    throttle_scope = 'drones'
+    throttle_classes = (SharedScopedRateThrottle,)
+
+
+class AutocompleteList(PerformanceMixin, generics.GenericAPIView):
+    """
+    Up to ?limit= (pk, name) pairs whose name starts with ?search=, read
+    from the in-process name index of the model without a query.
+    """
+    pagination_class = None
+    filter_backends = ()
+    query_budget = 1
+    search_param = 'search'
+    limit_param = 'limit'
+
+    def get_limit(self):
+        max_limit = get_setting('AUTOCOMPLETE_LIMIT')
+        try:
+            return _positive_int(self.request.query_params.get(self.limit_param, max_limit), strict=True, cutoff=max_limit)
+        except ValueError:
+            raise ValidationError({self.limit_param: 'A valid positive integer is required.'})
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit()
+        prefix = request.query_params.get(self.search_param, '').lstrip()
+        if not prefix:
+            return Response([])
+        matches = autocomplete.get_index(self.queryset.model).lookup(prefix, limit)
+        return Response([{'pk': pk, 'name': name} for pk, name in matches])
+
+
+class DroneCategoryAutocomplete(AutocompleteList):
+    queryset = DroneCategory.objects.all()
+    name = 'dronecategory-autocomplete'
+
+
+class DroneAutocomplete(AutocompleteList):
+    queryset = Drone.objects.all()
+    name = 'drone-autocomplete'
+
+
+class PilotAutocomplete(AutocompleteList):
+    queryset = Pilot.objects.all()
+    name = 'pilot-autocomplete'
+    query_budget = 2
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+
+class CacheStats(PerformanceMixin, generics.GenericAPIView):
+    name = 'cache-stats'
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'responses': responsecache.get_stats(),
+            'authentication': customauthentication.get_stats(),
+            'hyperlinks': hyperlinks.get_stats(),
+        })
+
+
+class Metrics(generics.GenericAPIView):
+    name = 'metrics'
+    permission_classes = (custompermission.IsInternalIPOrStaff,)
+    throttle_classes = ()
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(performance.get_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ApiRoot(PerformanceMixin, generics.GenericAPIView):
     name = 'api-root'
     def get(self, request, *args, **kwargs):
         return Response({
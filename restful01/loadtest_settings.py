@@ -0,0 +1,49 @@
+"""
+Settings for the loadtest command and the server it starts:
+
+    python manage.py loadtest --settings=restful01.loadtest_settings
+
+LOADTEST_DATABASE=sqlite (the default) uses the SQLite file named by
+LOADTEST_SQLITE_PATH (loadtest.sqlite3 in the project directory);
+LOADTEST_DATABASE=postgresql keeps the local PostgreSQL database of
+settings.py. DEBUG is off, as it keeps every query in memory, and the
+throttle rates are high enough for the throttles to run without rejecting
+the traffic. runserver is a single process, so the shared cache needs no
+Redis here.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, REST_FRAMEWORK
+
+DATABASE = os.environ.get('LOADTEST_DATABASE', 'sqlite')
+if DATABASE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('LOADTEST_SQLITE_PATH', str(BASE_DIR / 'loadtest.sqlite3')),
+            'OPTIONS': {
+                # A deferred transaction that reads before it writes fails
+                # with 'database is locked' instead of waiting when another
+                # writer holds the lock, as concurrent competition creates do.
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            },
+        }
+    }
+elif DATABASE != 'postgresql':
+    raise ValueError('LOADTEST_DATABASE must be sqlite or postgresql, not {0!r}.'.format(DATABASE))
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {scope: '1000000/hour' for scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']},
+}
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'},
+}
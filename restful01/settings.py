@@ -27,6 +27,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# metrics/ answers these addresses without authentication
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -45,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'drones.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,25 +93,66 @@ DATABASES = {
 }
 
 
+# Cached counts, responses, filter choices and credentials stay in each
+# process ('default'). The table versions they are keyed by, and the
+# throttle counters, have to be seen by every worker process: 'shared'
+# needs Redis (or Memcached) reachable from all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 
-    'drones.custompagination.LimitOffsetPaginationWithUpperBound',
+    'drones.custompagination.LimitOffsetOrKeysetPagination',
     'PAGE_SIZE': 4,
+    # How paginated lists fill in 'count': 'exact', 'cached' or 'estimated'
+    'PAGINATION_COUNT_MODE': 'exact',
+    'PAGINATION_COUNT_CACHE_TIMEOUT': 300,
+    # Seconds a cached list/detail response is kept (views opt in with cache_responses)
+    'RESPONSE_CACHE_TIMEOUT': 60,
+    # ETag/Last-Modified source: 'version' (table versions in the
+    # SHARED_CACHE) or 'timestamp' (MAX(updated_timestamp) and COUNT(*) queries)
+    'CONDITIONAL_GET_FINGERPRINT': 'version',
+    # Items of a nested collection (a pilot's competitions, a category's
+    # drones) rendered in the parent; the rest is paged at its own endpoint
+    'NESTED_COLLECTION_LIMIT': 10,
+    # Names returned by the autocomplete endpoints unless ?limit= asks for fewer
+    'AUTOCOMPLETE_LIMIT': 10,
+    # Whether responses carry a Server-Timing header with their db, auth,
+    # throttle, serialize and render times (metrics/ is fed either way)
+    'SERVER_TIMING': True,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.OrderingFilter',
-        'rest_framework.filters.SearchFilter',
-        
+        # ?search= through the full-text index of toys, drones and pilots
+        'drones.search.FullTextSearchFilter',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'drones.customauthentication.CachedBasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
+    # Seconds a verified token or username/password is trusted without a lookup
+    'AUTH_CACHE_TIMEOUT': 60,
     
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'drones.customthrottling.SharedAnonRateThrottle',
+        'drones.customthrottling.SharedUserRateThrottle',
     ),
+    # Cache alias holding the table versions, shared by every worker process
+    'SHARED_CACHE': 'shared',
+    # Where the throttle counters of every worker process live: 'cache' (the
+    # SHARED_CACHE) or 'sqlite' (the THROTTLE_STORE_PATH file, one host only)
+    'THROTTLE_STORE': 'cache',
+    'THROTTLE_STORE_PATH': BASE_DIR / 'throttle.sqlite3',
+    # 'fixed' counts per calendar period, 'sliding' also weights the previous one
+    'THROTTLE_WINDOW': 'sliding',
     
     # We increased the number of requests per hour during testing
     'DEFAULT_THROTTLE_RATES': {
@@ -29,6 +29,7 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('',include('drones.urls')),
+    path('',include('toys.urls')),
     path('api-auth/', include('rest_framework.urls')),
 
 ]
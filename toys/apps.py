@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ToysConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'toys'
+
+    def ready(self):
+        from drones import tableversions
+        from .models import Toy
+
+        tableversions.connect(Toy)
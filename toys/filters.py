@@ -0,0 +1,23 @@
+from django_filters import rest_framework as filters
+from toys.models import Toy
+
+
+class ToyFilter(filters.FilterSet):
+    from_release_date = filters.DateTimeFilter(
+        field_name='release_date',
+        lookup_expr='gte'
+    )
+    to_release_date = filters.DateTimeFilter(
+        field_name='release_date',
+        lookup_expr='lte'
+    )
+
+    class Meta:
+        model = Toy
+        fields = [
+            'toy_category',
+            'was_included_in_home',
+            'release_date',
+            'from_release_date',
+            'to_release_date',
+        ]
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from drones import seeding
+from toys.models import Toy
+
+# a few categories hold most toys
+TOY_CATEGORIES = (
+    'Action figures', 'Puzzles', 'Board games', 'Dolls', 'Building blocks', 'Plush', 'Vehicles',
+    'Science kits', 'Outdoor', 'Musical', 'Card games', 'Robots',
+)
+TOY_KINDS = ('action figure', 'puzzle', 'board game', 'doll', 'brick set', 'plush', 'racer', 'kit', 'robot')
+FEATURES = (
+    'talks', 'lights up', 'glows in the dark', 'walks', 'sings', 'transforms', 'flies', 'is waterproof',
+    'has remote control', 'comes with batteries', 'folds flat', 'has 1000 pieces',
+)
+
+
+def build_toys(context, start, stop):
+    rng = seeding.get_rng(context['seed'], 'toys', start)
+    toys = []
+    for i in range(start, stop):
+        noun = rng.choice(seeding.NOUNS)
+        kind = rng.choice(TOY_KINDS)
+        toys.append(Toy(
+            name='{0} {1} {2} {3}'.format(rng.choice(seeding.ADJECTIVES), noun, kind, i)[:50],
+            description='{0} {1} {2} that {3} and {4}'.format(
+                'An' if noun[0] in 'AEIOU' else 'A', noun.lower(), kind, *rng.sample(FEATURES, 2)
+            ),
+            toy_category=TOY_CATEGORIES[seeding.skewed_index(rng, len(TOY_CATEGORIES), 2.0)],
+            release_date=seeding.random_datetime(rng, context['start'], context['end']),
+            was_included_in_home=rng.random() < 0.2,
+        ))
+    return toys
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds a synthetic set of toys generated deterministically from --seed, '
+        'bulk_create()d in batches; --workers builds the batches in parallel processes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--toys', type=int, default=1000000)
+        parser.add_argument('--start', default='2015-01-01', help='First release date.')
+        parser.add_argument('--end', default='2026-01-01', help='Toys are released before this date.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes building the batches.')
+
+    def handle(self, *args, **options):
+        try:
+            start, end = seeding.parse_date(options['start']), seeding.parse_date(options['end'])
+        except ValueError:
+            raise CommandError('--start and --end must be dates such as 2015-01-01.')
+        if start >= end:
+            raise CommandError('--start must be before --end.')
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive.')
+        with seeding.BulkLoad(Toy):
+            seeding.insert(
+                Toy, build_toys, {'seed': options['seed'], 'start': start, 'end': end}, options['toys'],
+                options['batch_size'], options['workers'], label='toys', stdout=self.stdout,
+                verbosity=options['verbosity']
+            )
+        self.stdout.write(self.style.SUCCESS('Seeded with --seed {0}.'.format(options['seed'])))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.2 on 2026-10-17 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toys', '0002_alter_toy_release_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='toy',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-17 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('toys', '0003_toy_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='toy',
+            index=models.Index(fields=['toy_category', 'name'], name='toy_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toy',
+            index=models.Index(fields=['was_included_in_home', 'name'], name='toy_in_home_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toy',
+            index=models.Index(fields=['release_date'], name='toy_release_date_idx'),
+        ),
+    ]
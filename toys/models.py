@@ -4,6 +4,7 @@ from django.db import models
 
 class Toy(models.Model):
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     name = models.CharField(max_length=50)
     description = models.TextField()
     toy_category = models.CharField(max_length=50)
@@ -13,4 +14,10 @@ class Toy(models.Model):
     
     class Meta:
         ordering = ['name']
+        # the filters of toys/, each followed by the list ordering
+        indexes = [
+            models.Index(fields=['toy_category', 'name'], name='toy_category_name_idx'),
+            models.Index(fields=['was_included_in_home', 'name'], name='toy_in_home_name_idx'),
+            models.Index(fields=['release_date'], name='toy_release_date_idx'),
+        ]
     
\ No newline at end of file
@@ -1,3 +1,151 @@
+import io
+import json
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from drones import search
+from drones.querybudget import QueryBudgetMixin
+from toys.models import Toy
+
+
+class ToyConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.toy = Toy.objects.create(
+            name='Snoopy talking action figure',
+            description='Snoopy speaks five languages',
+            toy_category='Action figures',
+            release_date=timezone.now(),
+        )
+
+    def test_unchanged_toys_return_not_modified(self):
+        url = reverse('toys:toy_list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_updated_toy_changes_the_etag(self):
+        url = reverse('toys:toy_detail', kwargs={'pk': self.toy.pk})
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.toy.was_included_in_home = True
+            self.toy.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['was_included_in_home'] is True
+
+
+    def test_invalid_credentials_are_rejected_before_not_modified(self):
+        url = reverse('toys:toy_list')
+        etag = self.client.get(url)['ETag']
+        self.client.credentials(HTTP_AUTHORIZATION='Basic bm9ib2R5Ondyb25n')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_writes_ignore_the_validators(self):
+        url = reverse('toys:toy_detail', kwargs={'pk': self.toy.pk})
+        etag = self.client.get(url)['ETag']
+        data = {**self.client.get(url).data, 'was_included_in_home': True}
+        response = self.client.put(url, data, format='json', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert 'ETag' not in response
+        self.toy.refresh_from_db()
+        assert self.toy.was_included_in_home is True
+
+
+class ToyListTest(APITestCase):
+    def setUp(self):
+        for i in range(10):
+            Toy.objects.create(
+                name='Toy {0}'.format(i),
+                description='Toy number {0}'.format(i),
+                toy_category='Action figures' if i % 2 else 'Puzzles',
+                release_date=timezone.now() - timezone.timedelta(days=i),
+                was_included_in_home=i < 3,
+            )
+
+    def test_list_is_paginated(self):
+        response = self.client.get(reverse('toys:toy_list'), {'limit': 3, 'offset': 3})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 10
+        assert [toy['name'] for toy in response.data['results']] == ['Toy 3', 'Toy 4', 'Toy 5']
+
+    def test_cursor_pages_cover_every_toy(self):
+        url = reverse('toys:toy_list') + '?pagination=cursor&limit=4'
+        names = []
+        while url:
+            response = self.client.get(url)
+            names += [toy['name'] for toy in response.data['results']]
+            url = response.data['next']
+        assert names == ['Toy {0}'.format(i) for i in range(10)]
+
+    def test_filters(self):
+        url = reverse('toys:toy_list')
+        response = self.client.get(url, {'toy_category': 'Puzzles', 'was_included_in_home': 'true'})
+        assert [toy['name'] for toy in response.data['results']] == ['Toy 0', 'Toy 2']
+        response = self.client.get(url, {'from_release_date': (timezone.now() - timezone.timedelta(days=1, hours=1)).isoformat()})
+        assert response.data['count'] == 2
+        response = self.client.get(url, {'from_release_date': 'yesterday'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_export_streams_every_filtered_toy(self):
+        response = self.client.get(reverse('toys:toy_list'), {'export_format': 'ndjson', 'toy_category': 'Puzzles'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        assert [row['name'] for row in rows] == ['Toy {0}'.format(i) for i in range(0, 10, 2)]
+        assert set(rows[0]) == set(self.client.get(reverse('toys:toy_detail', kwargs={'pk': rows[0]['id']})).data)
+        response = self.client.get(reverse('toys:toy_list'), {'export_format': 'xml'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_invalid_update_returns_errors(self):
+        toy = Toy.objects.first()
+        response = self.client.put(reverse('toys:toy_detail', kwargs={'pk': toy.pk}), {'name': ''}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_search_matches_name_and_description(self):
+        Toy.objects.create(
+            name='Wooden train', description='A puzzle of forty tracks', toy_category='Puzzles', release_date=timezone.now()
+        )
+        response = self.client.get(reverse('toys:toy_list'), {'search': 'puzzle'})
+        assert [toy['name'] for toy in response.data['results']] == ['Wooden train']
+        response = self.client.get(reverse('toys:toy_list'), {'search': 'number 7'})
+        assert [toy['name'] for toy in response.data['results']] == ['Toy 7']
+
+
+class ToyQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        for i in range(8):
+            Toy.objects.create(
+                name='Toy {0}'.format(i),
+                description='Toy number {0}'.format(i),
+                toy_category='Puzzles',
+                release_date=timezone.now(),
+            )
+
+    def test_toy_endpoints_stay_within_their_query_budgets(self):
+        url = reverse('toys:toy_list')
+        # count and page
+        self.check_query_budget(2, [(size, '{0}?limit={1}'.format(url, size)) for size in (1, 4, 8)])
+        self.check_query_budget(2, [(size, '{0}?limit={1}&search=toy'.format(url, size)) for size in (1, 4, 8)])
+        toy = Toy.objects.first()
+        self.check_query_budget(1, [(1, reverse('toys:toy_detail', kwargs={'pk': toy.pk}))])
+
+
+class SeedToysTest(TestCase):
+    def seed(self, **options):
+        call_command('seed_toys', stdout=io.StringIO(), toys=300, batch_size=100, **options)
 
-# Create your tests here.
+    def test_seeds_searchable_toys(self):
+        self.seed(seed=3)
+        assert Toy.objects.count() == 300
+        toy = Toy.objects.order_by('pk').first()
+        assert toy in search.search(Toy.objects.all(), toy.description)
+        first = list(Toy.objects.order_by('pk').values_list('name', 'description', 'toy_category', 'release_date'))
+        Toy.objects.all().delete()
+        self.seed(seed=3)
+        assert list(Toy.objects.order_by('pk').values_list('name', 'description', 'toy_category', 'release_date')) == first
@@ -1,18 +1,51 @@
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 from toys.models import Toy
+from toys.filters import ToyFilter
 from toys.serializers import ToySerializer
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response 
+from rest_framework.settings import api_settings
+from drones.conditional import condition_on
+from drones import export
+from drones import search
+
+# streamed by ?export_format=, in the order of the serializer's fields
+EXPORT_FIELDS = (
+    'id', 'created', 'updated', 'name', 'description', 'toy_category', 'release_date', 'was_included_in_home'
+)
+
+
+def export_toys(request, toys):
+    export_format = request.query_params['export_format']
+    if export_format not in export.CONTENT_TYPES:
+        raise ValidationError({'export_format': 'Expected one of {0}.'.format(', '.join(export.CONTENT_TYPES))})
+    # primary key order streams straight off the index
+    return export.streaming_response(toys.order_by('pk'), EXPORT_FIELDS, EXPORT_FIELDS, export_format, filename='toys')
 
 
 @api_view(['GET', 'POST'])
+@condition_on(Toy)
 def toy_list(request):
     if request.method == 'GET':
-        toys = Toy.objects.all()
+        toy_filter = ToyFilter(request.query_params, queryset=Toy.objects.all(), request=request)
+        if not toy_filter.is_valid():
+            return Response(toy_filter.errors, status=status.HTTP_400_BAD_REQUEST)
+        toys = toy_filter.qs
+        if search.get_terms(request.query_params.get('search', '')):
+            toys = search.search(toys, request.query_params['search']).order_by('-' + search.RANK, 'pk')
+        if 'export_format' in request.query_params:
+            return export_toys(request, toys)
+
+        pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+        if pagination_class is not None:
+            paginator = pagination_class()
+            page = paginator.paginate_queryset(toys, request)
+            if page is not None:
+                return paginator.get_paginated_response(ToySerializer(page, many=True).data)
         toys_serializer = ToySerializer(toys, many=True)
-        
         return Response(toys_serializer.data)
     
     elif request.method == 'POST':
@@ -20,10 +53,11 @@ def toy_list(request):
         if toy_serializer.is_valid():
             toy_serializer.save()
             return Response(toy_serializer.data, status=status.HTTP_201_CREATED)
-        return Response(toy_serializer.errors, status=status.HTTP_400_BAD_REQUEST400)
+        return Response(toy_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     
 @api_view(['GET', 'PUT', 'DELETE'])
+@condition_on(Toy)
 def toy_detail(request,pk):
     try:
         toy = Toy.objects.get(pk=pk)
@@ -39,7 +73,7 @@ def toy_detail(request,pk):
         if toy_serializer.is_valid():
             toy_serializer.save()
             return Response(toy_serializer.data)
-        Response(toy_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(toy_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
         toy.delete()